@@ -1,12 +1,43 @@
 from django.contrib import admin
-from .models import Post, Category, Tag, Comment, Subscription, CustomUser
+from .models import Post, Category, Tag, Comment, Subscription, CustomUser, DeletionJob
+from .changelists import AutocompleteFilter, ScalableAdminMixin
+from . import search
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('author', 'title', 'category', 'status', 'published_date')
-    search_fields = ('title', 'content', 'author__username')
-    list_filter = ('status', 'category', 'tags')
+
+class SoftDeleteAdminMixin:
+    """
+    Delete through soft_delete() so the admin never runs the cascade
+    collector; the reaper removes the rows in the background.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        # The default confirmation page collects every dependent row; list just the objects themselves
+        deleted = [str(obj) for obj in objs]
+        perms_needed = set() if self.has_delete_permission(request) else {self.model._meta.verbose_name}
+        return deleted, {self.model._meta.verbose_name_plural: len(deleted)}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        obj.soft_delete()
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            obj.soft_delete()
+
+class PostAdmin(SoftDeleteAdminMixin, ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('author', 'title', 'category', 'status', 'published_date', 'views')
+    list_select_related = ('author', 'category')
+    search_fields = ('title', 'author__username')  # The compressed body is searched through its full-text index
+    readonly_fields = ('views',)
+    list_filter = ('status', 'category', ('tags', AutocompleteFilter), ('author', AutocompleteFilter))
+    autocomplete_fields = ('author', 'category', 'tags')
     date_hierarchy = 'published_date'
     prepopulated_fields = {'title': ('content',)}  # Automatically fill title based on content
+
+    def get_search_results(self, request, queryset, search_term):
+        matches, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            matches |= queryset.filter(search.matching(search_term))
+        return matches, may_have_duplicates
     
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('id', 'name')
@@ -16,19 +47,33 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ('id', 'name')
     search_fields = ('name',)
 
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('user', 'post', 'created_at', 'parent_comment')
-    search_fields = ('user__username', 'post__title', 'content')
-    list_filter = ('created_at', 'post')
+class CommentAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'post', 'created_at', 'reply_to')
+    list_select_related = ('user', 'post')
+    search_fields = ('user__username', 'post__title')
+    list_filter = ('created_at', ('post', AutocompleteFilter), ('user', AutocompleteFilter))
+    autocomplete_fields = ('user', 'post', 'parent_comment')
 
-class SubscriptionAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'author', 'category')
-    list_filter = ('author', 'category')
+    @admin.display(description='Reply to', ordering='parent_comment')
+    def reply_to(self, comment):
+        # The parent's id rather than its __str__, which would load its user and post on every row
+        return f'#{comment.parent_comment_id}' if comment.parent_comment_id else ''
 
-class UserAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'author', 'category', 'delivery')
+    list_select_related = ('user', 'author', 'category')
+    list_filter = ('delivery', ('author', AutocompleteFilter), ('category', AutocompleteFilter), ('user', AutocompleteFilter))
+    autocomplete_fields = ('user', 'author', 'category')
+
+class UserAdmin(SoftDeleteAdminMixin, ScalableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'username', 'email')
     search_fields = ('username', 'email')
 
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'object_id', 'requested_at', 'started_at', 'finished_at', 'rows_deleted', 'chunks', 'last_error')
+    list_filter = ('kind', 'finished_at')
+    readonly_fields = ('kind', 'object_id', 'requested_at', 'started_at', 'finished_at', 'rows_deleted', 'chunks', 'last_error')
+
 # Register models in the admin site
 admin.site.register(Post, PostAdmin)
 admin.site.register(Category, CategoryAdmin)
@@ -36,3 +81,4 @@ admin.site.register(Tag, TagAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(CustomUser, UserAdmin)
 admin.site.register(Subscription, SubscriptionAdmin)
+admin.site.register(DeletionJob, DeletionJobAdmin)
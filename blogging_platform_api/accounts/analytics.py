@@ -0,0 +1,146 @@
+"""
+Per-post and per-author daily analytics.
+
+Raw events (likes, ratings, comments and subscriptions) carry a timestamp.
+aggregate_analytics groups one day of events at a time over the indexed
+timestamp columns and replaces that day's PostDailyStats and
+AuthorDailyStats rows, so re-running any range is idempotent. Range queries
+then sum a handful of rollup rows instead of scanning events.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import (
+    AnalyticsCheckpoint, AuthorDailyStats, Comment, PostDailyStats, PostLike, PostRating, Subscription,
+)
+
+CHECKPOINT = 'daily_rollups'
+POST_COUNTERS = ('likes', 'ratings', 'rating_total', 'comments')
+AUTHOR_COUNTERS = POST_COUNTERS + ('new_subscribers',)
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min), datetime.timezone.utc)
+    return start, start + datetime.timedelta(days=1)
+
+
+def aggregate_day(day):
+    """Rebuild the rollup rows for ``day`` from raw events. Returns the number of post rows written."""
+    start, end = _day_bounds(day)
+    per_post = defaultdict(lambda: dict.fromkeys(POST_COUNTERS, 0))
+    per_author = defaultdict(lambda: dict.fromkeys(AUTHOR_COUNTERS, 0))
+
+    def add(rows, **counters):
+        for row in rows:
+            for counter, source in counters.items():
+                per_post[row['post_id']][counter] += row[source] or 0
+                per_author[row['post__author_id']][counter] += row[source] or 0
+
+    in_day = {'created_at__gte': start, 'created_at__lt': end}
+    add(
+        PostLike.objects.filter(**in_day).values('post_id', 'post__author_id').annotate(n=Count('id')).order_by(),
+        likes='n',
+    )
+    add(
+        PostRating.objects.filter(**in_day).values('post_id', 'post__author_id')
+        .annotate(n=Count('id'), stars=Sum('rating')).order_by(),
+        ratings='n', rating_total='stars',
+    )
+    add(
+        Comment.objects.filter(**in_day).values('post_id', 'post__author_id').annotate(n=Count('id')).order_by(),
+        comments='n',
+    )
+    subscribers = Subscription.objects.filter(author__isnull=False, **in_day).values('author_id').annotate(n=Count('id')).order_by()
+    for row in subscribers:
+        per_author[row['author_id']]['new_subscribers'] += row['n']
+
+    with transaction.atomic():
+        PostDailyStats.objects.filter(day=day).delete()
+        AuthorDailyStats.objects.filter(day=day).delete()
+        PostDailyStats.objects.bulk_create(
+            PostDailyStats(post_id=post_id, day=day, **counters) for post_id, counters in per_post.items()
+        )
+        AuthorDailyStats.objects.bulk_create(
+            AuthorDailyStats(author_id=author_id, day=day, **counters) for author_id, counters in per_author.items()
+        )
+    return len(per_post)
+
+
+def aggregate_range(first_day, last_day):
+    """Rebuild every day from ``first_day`` to ``last_day`` inclusive. Returns the number of days processed."""
+    day = first_day
+    while day <= last_day:
+        aggregate_day(day)
+        day += datetime.timedelta(days=1)
+    return (last_day - first_day).days + 1
+
+
+def aggregate_since_checkpoint(now=None):
+    """
+    Incrementally roll up events recorded since the previous run.
+
+    The day holding the checkpoint is rebuilt again because it was only
+    partly complete last time. The first run starts from the earliest event.
+    """
+    now = now or timezone.now()
+    checkpoint = AnalyticsCheckpoint.objects.filter(name=CHECKPOINT).first()
+    if checkpoint:
+        first_day = checkpoint.processed_until.astimezone(datetime.timezone.utc).date()
+    else:
+        first_day = earliest_event_day() or now.date()
+    days = aggregate_range(first_day, now.astimezone(datetime.timezone.utc).date())
+    AnalyticsCheckpoint.objects.update_or_create(name=CHECKPOINT, defaults={'processed_until': now})
+    return days
+
+
+def earliest_event_day():
+    earliest = [
+        model.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        for model in (PostLike, PostRating, Comment, Subscription)
+    ]
+    earliest = [moment for moment in earliest if moment is not None]
+    return min(earliest).astimezone(datetime.timezone.utc).date() if earliest else None
+
+
+def _sums(counters):
+    # Aliased so the annotations don't clash with the rollup field names
+    return {f'sum_{counter}': Sum(counter) for counter in counters}
+
+
+def _unalias(row):
+    return {key.removeprefix('sum_'): (value or 0) if key.startswith('sum_') else value for key, value in row.items()}
+
+
+def author_report(author, start, end, post_id=None):
+    """Sum the rollups of ``author`` between ``start`` and ``end`` (dates, inclusive)."""
+    posts = PostDailyStats.objects.filter(post__author=author, day__gte=start, day__lte=end)
+    if post_id is not None:
+        posts = posts.filter(post_id=post_id)
+        daily_rows = posts
+        counters = POST_COUNTERS
+    else:
+        daily_rows = AuthorDailyStats.objects.filter(author=author, day__gte=start, day__lte=end)
+        counters = AUTHOR_COUNTERS
+    daily = daily_rows.values('day').annotate(**_sums(counters)).order_by('day')
+    totals = daily_rows.aggregate(**_sums(counters))
+    by_post = posts.values('post_id', 'post__title').annotate(**_sums(POST_COUNTERS)).order_by('-sum_likes', 'post_id')
+
+    return {
+        'start': start,
+        'end': end,
+        'totals': _with_average(_unalias(totals)),
+        'daily': [_with_average(_unalias(row)) for row in daily],
+        'posts': [
+            _with_average(_unalias({'post': row.pop('post_id'), 'title': row.pop('post__title'), **row}))
+            for row in by_post
+        ],
+    }
+
+
+def _with_average(row):
+    row['average_rating'] = row['rating_total'] / row['ratings'] if row['ratings'] else None
+    return row
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Connect post_published hooks, the live event publishers, revision recording, archive counts,
+        # feed regeneration and body indexing
+        from . import archive, events, feeds, notifications, revisions, search  # noqa: F401
@@ -0,0 +1,169 @@
+"""
+Archive of published posts by year and month.
+
+ArchiveMonth keeps a post count per calendar month (in TIME_ZONE) for the
+whole site, for each category and for each author. A post counts while it
+is published and not soft-deleted, and counts only ever move by the posts
+that changed:
+
+- post_save compares the month, category and author a post counted under
+  before the save (read in pre_save) with the ones it counts under after;
+- post_delete takes a counted post out;
+- queryset updates that publish or hide posts without sending signals
+  (run_scheduler, soft deletes) call adjust() on those posts first.
+
+rebuild() recounts everything from the posts table; the rebuild_archive
+command runs it after bulk imports or a TIME_ZONE change.
+
+published_range() turns a day or a month into a half-open [start, end)
+range on published_date, which the database answers from an index; the
+__date and __month transforms it replaces wrap the column in a function.
+"""
+import re
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ArchiveMonth, Category, Post
+
+KEY_FIELDS = ('status', 'deleted_at', 'published_date', 'category_id', 'author_id')
+_PERIOD = re.compile(r'(\d{4})-(\d{2})(?:-(\d{2}))?')
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def month_range(year, month):
+    """``(start, end)`` of a calendar month in the current time zone; ``end`` is the first instant after it."""
+    return _start_of(date(year, month, 1)), _start_of(date(year + month // 12, month % 12 + 1, 1))
+
+
+def day_range(day):
+    # The next midnight rather than start + 24 hours, which is off on DST changes
+    return _start_of(day), _start_of(day + timedelta(days=1))
+
+
+def published_range(value):
+    """
+    ``(start, end)`` for a ``YYYY-MM-DD`` day or a ``YYYY-MM`` month, for
+    ``published_date__gte=start, published_date__lt=end``. Raises ValueError
+    for anything else.
+    """
+    match = _PERIOD.fullmatch(value or '')
+    if not match:
+        raise ValueError(f'Expected YYYY-MM-DD or YYYY-MM, got {value!r}.')
+    year, month, day = (int(part) if part else None for part in match.groups())
+    if day is None:
+        date(year, month, 1)  # Raises ValueError for month 13
+        return month_range(year, month)
+    return day_range(date(year, month, day))
+
+
+def archive_key(status, deleted_at, published_date, category_id, author_id):
+    """``(year, month, category_id, author_id)`` a post counts under, or None if it isn't in the archive."""
+    if status != 'published' or deleted_at is not None or published_date is None:
+        return None
+    published = timezone.localtime(published_date) if timezone.is_aware(published_date) else published_date
+    return published.year, published.month, category_id, author_id
+
+
+def _scopes(category_id, author_id):
+    yield ArchiveMonth.ALL, 0
+    if category_id is not None:
+        yield ArchiveMonth.CATEGORY, category_id
+    yield ArchiveMonth.AUTHOR, author_id
+
+
+def _add(year, month, category_id, author_id, posts):
+    for scope, scope_id in _scopes(category_id, author_id):
+        cell = ArchiveMonth.objects.filter(scope=scope, scope_id=scope_id, year=year, month=month)
+        if cell.update(posts=F('posts') + posts) or posts < 0:
+            continue
+        try:
+            with transaction.atomic():
+                ArchiveMonth.objects.create(scope=scope, scope_id=scope_id, year=year, month=month, posts=posts)
+        except IntegrityError:  # Another request created the month first
+            cell.update(posts=F('posts') + posts)
+
+
+def _by_month(posts):
+    """``(month start, category_id, author_id, posts)`` rows for ``posts``, grouped in the database."""
+    return posts.order_by().annotate(month_start=TruncMonth('published_date')).values_list(
+        'month_start', 'category_id', 'author_id'
+    ).annotate(posts=Count('pk'))
+
+
+def archived(posts):
+    return posts.filter(status='published', deleted_at__isnull=True)
+
+
+def adjust(posts, sign):
+    """
+    Add (``sign`` 1) or remove (-1) ``posts`` from the archive. For queryset
+    updates that bypass post_save; call it in the same transaction, before
+    the update when removing and with the posts as they will be when adding.
+    """
+    for month_start, category_id, author_id, count in _by_month(posts):
+        _add(month_start.year, month_start.month, category_id, author_id, sign * count)
+
+
+def rebuild():
+    """Recount the whole archive from the posts table. Returns the number of months stored."""
+    counts = Counter()
+    for month_start, category_id, author_id, posts in _by_month(archived(Post.all_objects.all())):
+        for scope, scope_id in _scopes(category_id, author_id):
+            counts[scope, scope_id, month_start.year, month_start.month] += posts
+    with transaction.atomic():
+        ArchiveMonth.objects.all().delete()
+        ArchiveMonth.objects.bulk_create(
+            [ArchiveMonth(scope=scope, scope_id=scope_id, year=year, month=month, posts=posts)
+             for (scope, scope_id, year, month), posts in counts.items()],
+            batch_size=1000,
+        )
+    return len(counts)
+
+
+def _affects_archive(update_fields):
+    return update_fields is None or bool(set(KEY_FIELDS) & {Post._meta.get_field(name).attname for name in update_fields})
+
+
+@receiver(pre_save, sender=Post)
+def remember_archive_key(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._archive_key = None
+    if raw or instance.pk is None or not _affects_archive(update_fields):
+        return
+    row = Post.all_objects.filter(pk=instance.pk).values_list(*KEY_FIELDS).first()
+    instance._archive_key = row and archive_key(*row)
+
+
+@receiver(post_save, sender=Post)
+def update_archive_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _affects_archive(update_fields):
+        return
+    before = instance._archive_key
+    after = archive_key(*(getattr(instance, field) for field in KEY_FIELDS))
+    if before != after:
+        if before:
+            _add(*before, -1)
+        if after:
+            _add(*after, 1)
+
+
+@receiver(post_delete, sender=Post)
+def update_archive_on_delete(sender, instance, **kwargs):
+    key = archive_key(*(getattr(instance, field) for field in KEY_FIELDS))
+    if key:
+        _add(*key, -1)
+
+
+@receiver(post_delete, sender=Category)
+def drop_category_archive(sender, instance, **kwargs):
+    # Its posts are moved to no category by a queryset update
+    ArchiveMonth.objects.filter(scope=ArchiveMonth.CATEGORY, scope_id=instance.pk).delete()
@@ -0,0 +1,145 @@
+"""
+Helpers for the benchmark_* management commands.
+
+Benchmarks run against a throwaway test database seeded with synthetic
+data, so they never touch real content and results are repeatable.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
+from django.db import connection
+from django.utils import timezone
+
+from .models import Category, Comment, CustomUser, Post, PostLike, PostRating, Tag
+
+SEED_BATCH_SIZE = 5000
+
+VOCABULARY = (
+    'the of and to in a is that for it as with was on be by this are from at or an have not which but can '
+    'your you we our more how what when skin care product review phone camera battery screen design travel '
+    'guide recipe health fitness budget tips best new year home garden work life style easy quick simple '
+    'performance price quality experience recommend favourite daily routine results week month people'
+).split()
+
+
+def long_form_body(rng, paragraphs):
+    """Synthetic HTML article with a Zipf-like word mix, closer to real posts than seed_blog's one-liners."""
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+    body = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = rng.choices(VOCABULARY, weights, k=rng.randint(8, 20))
+            sentences.append(' '.join(words).capitalize() + '.')
+        body.append('<p>' + ' '.join(sentences) + '</p>')
+    return '\n'.join(body)
+
+
+@contextmanager
+def scratch_database(verbosity=0, on_disk=False):
+    """
+    Run the block against a freshly migrated test database that is destroyed afterwards.
+
+    SQLite test databases live in memory; pass ``on_disk=True`` for benchmarks
+    where several threads need their own connections to the same file.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    if on_disk and connection.vendor == 'sqlite':
+        handle, test_settings['NAME'] = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings['NAME'] = old_test_name
+
+
+@contextmanager
+def timer(results, label):
+    """Store the wall-clock seconds spent in the block under ``results[label]``."""
+    started = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - started
+
+
+def _unique_pairs(rng, n_users, n_posts, count):
+    """Return ``count`` distinct (user index, post index) pairs."""
+    count = min(count, n_users * n_posts)
+    flat = rng.choice(n_users * n_posts, size=count, replace=False)
+    return np.divmod(flat, n_posts)
+
+
+def seed_blog(users=1000, posts=10_000, likes=0, ratings=0, comments=0, categories=20, tags=200, days=90, seed=0):
+    """
+    Bulk-insert a synthetic blog and return the created ``(user_ids, post_ids)``.
+
+    Posts are published over the last ``days`` days. Signals are bypassed
+    (bulk_create), so no profiles or notifications are produced.
+    """
+    rng = np.random.default_rng(seed)
+    now = timezone.now()
+
+    CustomUser.objects.bulk_create(
+        (CustomUser(username=f'bench{i}', email=f'bench{i}@example.com', password='!') for i in range(users)),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    user_ids = np.asarray(CustomUser.objects.filter(username__startswith='bench').order_by('pk').values_list('pk', flat=True))
+    Category.objects.bulk_create(Category(name=f'Category {i}') for i in range(categories))
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    Tag.objects.bulk_create(Tag(name=f'tag{i}') for i in range(tags))
+    tag_ids = list(Tag.objects.values_list('pk', flat=True))
+
+    ages = rng.uniform(0, days * 86400, size=posts)
+    authors = rng.choice(user_ids, size=posts)
+    post_categories = rng.choice(category_ids, size=posts)
+    Post.objects.bulk_create(
+        (
+            Post(
+                title=f'Benchmark post {i}',
+                content=f'Synthetic content for post {i} about tag{i % tags}.',
+                author_id=int(authors[i]),
+                category_id=int(post_categories[i]),
+                published_date=now - timedelta(seconds=float(ages[i])),
+                status='published',
+            )
+            for i in range(posts)
+        ),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    post_ids = np.asarray(Post.objects.order_by('pk').values_list('pk', flat=True))
+    Post.tags.through.objects.bulk_create(
+        (Post.tags.through(post_id=int(post_id), tag_id=int(rng.choice(tag_ids))) for post_id in post_ids),
+        batch_size=SEED_BATCH_SIZE,
+    )
+
+    like_users, like_posts = _unique_pairs(rng, len(user_ids), len(post_ids), likes)
+    PostLike.objects.bulk_create(
+        (PostLike(user_id=int(user_ids[u]), post_id=int(post_ids[p])) for u, p in zip(like_users, like_posts)),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    rating_users, rating_posts = _unique_pairs(rng, len(user_ids), len(post_ids), ratings)
+    stars = rng.integers(1, 6, size=len(rating_users))
+    PostRating.objects.bulk_create(
+        (
+            PostRating(user_id=int(user_ids[u]), post_id=int(post_ids[p]), rating=int(r))
+            for u, p, r in zip(rating_users, rating_posts, stars)
+        ),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    comment_users = rng.choice(user_ids, size=comments)
+    comment_posts = rng.choice(post_ids, size=comments)
+    Comment.objects.bulk_create(
+        (
+            Comment(user_id=int(u), post_id=int(p), content=f'Synthetic comment {i}')
+            for i, (u, p) in enumerate(zip(comment_users, comment_posts))
+        ),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    return user_ids, post_ids
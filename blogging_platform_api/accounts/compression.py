@@ -0,0 +1,95 @@
+"""
+Dictionary training and recompression for CompressedTextField columns.
+"""
+import random
+import re
+from collections import Counter
+
+from django.db import transaction
+
+from .fields import compress_text, decompress_text, reset_dictionary_cache
+from .models import Comment, CompressionDictionary, Post
+
+DEFAULT_DICTIONARY_SIZE = 32 * 1024  # zlib only looks back 32KB, so a bigger dictionary is wasted
+DEFAULT_SAMPLE_SIZE = 5000
+DEFAULT_CHUNK_SIZE = 1000
+WORD_RE = re.compile(r'\S+\s*')
+
+COMPRESSED_COLUMNS = [(Post, 'content'), (Comment, 'content')]
+
+
+def train_dictionary(samples, size=DEFAULT_DICTIONARY_SIZE):
+    """
+    Build a zlib preset dictionary from sample texts.
+
+    Frequent 1-3 word phrases are scored by how many bytes they could save
+    (frequency x length) and packed into ``size`` bytes, best last, since
+    zlib encodes nearer matches more cheaply.
+    """
+    phrases = Counter()
+    for text in samples:
+        words = WORD_RE.findall(text)
+        for n in (1, 2, 3):
+            phrases.update(''.join(words[i:i + n]) for i in range(len(words) - n + 1))
+
+    scored = sorted(
+        ((count * len(phrase.encode('utf-8')), phrase) for phrase, count in phrases.items() if count > 1),
+        reverse=True,
+    )
+    chosen, used = [], 0
+    for _, phrase in scored:
+        encoded = phrase.encode('utf-8')
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b''.join(reversed(chosen))
+
+
+def sample_corpus(sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """Return up to ``sample_size`` post and comment bodies, sampled by id."""
+    rng = random.Random(seed)
+    samples = []
+    for model, field in COMPRESSED_COLUMNS:
+        ids = list(model.objects.values_list('pk', flat=True))
+        chosen = rng.sample(ids, min(len(ids), sample_size // len(COMPRESSED_COLUMNS)))
+        samples.extend(model.objects.filter(pk__in=chosen).values_list(field, flat=True).iterator(chunk_size=DEFAULT_CHUNK_SIZE))
+    return samples
+
+
+def train_and_store(sample_size=DEFAULT_SAMPLE_SIZE, size=DEFAULT_DICTIONARY_SIZE):
+    """Train a dictionary on the current corpus and make it the one used for new writes."""
+    dictionary = CompressionDictionary.objects.create(data=train_dictionary(sample_corpus(sample_size), size))
+    reset_dictionary_cache()
+    return dictionary
+
+
+def recompress(model, field, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Rewrite every value of ``model.field`` with the current dictionary.
+
+    Rows are walked in primary-key order in chunks, each written in its own
+    short transaction, so the job can be interrupted and rerun at any time.
+    Returns the number of rows rewritten.
+    """
+    last_pk, rewritten = 0, 0
+    while True:
+        chunk = list(model.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', field)[:chunk_size])
+        if not chunk:
+            return rewritten
+        with transaction.atomic():
+            model.objects.bulk_update(chunk, [field])
+        last_pk = chunk[-1].pk
+        rewritten += len(chunk)
+
+
+def storage_report(model, field, dictionary_id=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return ``(raw_bytes, stored_bytes)`` for ``model.field`` compressed with ``dictionary_id``."""
+    raw = stored = 0
+    for text in model.objects.values_list(field, flat=True).iterator(chunk_size=chunk_size):
+        raw += len(text.encode('utf-8'))
+        stored += len(compress_text(text, dictionary_id))
+    return raw, stored
+
+
+__all__ = ['train_dictionary', 'train_and_store', 'recompress', 'storage_report', 'decompress_text']
@@ -0,0 +1,345 @@
+"""
+Copying the accounts tables to another database, for the move from SQLite
+to PostgreSQL (the migrate_to_postgres command).
+
+Every table of the app, join tables included, is read from the source in
+primary-key order in keyset chunks of raw rows, and written to the target
+with its primary keys:
+
+- on PostgreSQL with COPY ... FROM STDIN, one worker thread per table.
+  Tables are copied in waves by foreign-key depth (users, categories,
+  tags, ...; then posts; then comments, likes, ratings, subscriptions,
+  ...), so a table is only loaded once everything it points at is
+  committed. Django creates foreign keys DEFERRABLE INITIALLY DEFERRED,
+  so a comment tree loads in one pass whatever order parents and replies
+  come in;
+- on any other database (a second SQLite file, in tests) with batched
+  INSERTs from a single thread.
+
+The target's id sequences are then moved past the copied ids. verify()
+compares the row count and a SHA-256 of each table on both sides, after
+normalizing what each backend returns (SQLite hands back 0/1 and strings
+where PostgreSQL has booleans and datetimes).
+
+catch_up() brings a copied target up to date: it compares both sides
+chunk by chunk and rewrites the rows that were added, changed or deleted
+since, in one transaction. The site stays on SQLite during the bulk copy
+and catch-up passes; only a last, short catch-up runs with writes stopped.
+
+Join tables to auth groups and permissions are left out: migrate creates
+those ids afresh on the target.
+"""
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+import orjson
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+APP_LABEL = 'accounts'
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_WORKERS = 4
+DELETE_BATCH_SIZE = 500
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _bool(value):
+    return None if value is None else bool(value)
+
+
+def _datetime(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:  # SQLite stores UTC without an offset
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value.astimezone(dt_timezone.utc).isoformat()
+
+
+def _iso(value):
+    return value if value is None or isinstance(value, str) else value.isoformat()
+
+
+def _bytes(value):
+    return None if value is None else bytes(value).hex()
+
+
+def _json(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+CANONICAL = {
+    'BooleanField': _bool,
+    'DateTimeField': _datetime,
+    'DateField': _iso,
+    'TimeField': _iso,
+    'BinaryField': _bytes,
+    'JSONField': _json,
+}
+
+
+class Table:
+    """A model's table: its columns, primary key first, and the tables it points at."""
+
+    def __init__(self, model):
+        self.model = model
+        self.name = model._meta.db_table
+        pk = model._meta.pk
+        fields = [pk] + [field for field in model._meta.concrete_fields if field is not pk]
+        self.columns = [field.column for field in fields]
+        self.depends_on = {
+            field.related_model._meta.db_table for field in fields if field.is_relation and field.related_model is not model
+        }
+        self._canonical = [CANONICAL.get(field.get_internal_type()) for field in fields]
+
+    def __str__(self):
+        return self.name
+
+    def fingerprint(self, row):
+        """A row as bytes that are the same whichever backend it was read from."""
+        values = [convert(value) if convert else value for convert, value in zip(self._canonical, row)]
+        return orjson.dumps(values, option=orjson.OPT_SORT_KEYS)
+
+
+def tables():
+    """The app's tables, leaving out join tables to models of other apps."""
+    return [
+        Table(model) for model in apps.get_app_config(APP_LABEL).get_models(include_auto_created=True)
+        if all(field.related_model._meta.app_label == APP_LABEL for field in model._meta.concrete_fields if field.is_relation)
+    ]
+
+
+def waves(tables):
+    """``tables`` in groups that only point at tables of earlier groups (or themselves)."""
+    remaining = {table.name: table for table in tables}
+    done, groups = set(), []
+    while remaining:
+        group = sorted((table for table in remaining.values() if table.depends_on <= done), key=str)
+        if not group:
+            raise ValueError(f"Foreign keys between {', '.join(sorted(remaining))} form a cycle.")
+        groups.append(group)
+        for table in group:
+            done.add(table.name)
+            del remaining[table.name]
+    return groups
+
+
+def _read(alias, table, low=None, high=None, limit=None):
+    """Raw rows of ``table`` with ``low < pk <= high`` (either bound may be None), in primary-key order."""
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    pk = quote(table.columns[0])
+    conditions, params = [], []
+    if low is not None:
+        conditions.append(f'{pk} > %s')
+        params.append(low)
+    if high is not None:
+        conditions.append(f'{pk} <= %s')
+        params.append(high)
+    sql = f"SELECT {', '.join(map(quote, table.columns))} FROM {quote(table.name)}"
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += f' ORDER BY {pk}'
+    if limit:
+        sql += f' LIMIT {int(limit)}'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def read_chunks(alias, table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Every row of ``table``, in lists of up to ``chunk_size`` read by keyset."""
+    low = None
+    while True:
+        rows = _read(alias, table, low, limit=chunk_size)
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        low = rows[-1][0]
+
+
+def _pairs(source, target, table, chunk_size):
+    """``(source rows, target rows)`` over the same primary-key ranges, covering both tables."""
+    low = None
+    while True:
+        rows = _read(source, table, low, limit=chunk_size)
+        full = len(rows) == chunk_size
+        high = rows[-1][0] if full else None  # The last range is open, so extra target rows show up
+        yield rows, _read(target, table, low, high)
+        if not full:
+            return
+        low = high
+
+
+def copy_text(rows):
+    """``rows`` in the text format of PostgreSQL's COPY."""
+    return ''.join(
+        '\t'.join(
+            '\\N' if value is None
+            else '\\\\x' + bytes(value).hex() if isinstance(value, (bytes, memoryview))
+            else str(value).translate(_COPY_ESCAPES)
+            for value in row
+        ) + '\n'
+        for row in rows
+    )
+
+
+class _Reader:
+    """File-like view of an iterator of byte strings, for psycopg2's copy_expert()."""
+
+    def __init__(self, blocks):
+        self.blocks = iter(blocks)
+        self.buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            block = next(self.blocks, None)
+            if block is None:
+                break
+            self.buffer += block
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def write(alias, table, chunks):
+    """Insert lists of raw rows into ``table``, keeping their primary keys."""
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    columns = ', '.join(map(quote, table.columns))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            sql = f'COPY {quote(table.name)} ({columns}) FROM STDIN'
+            raw = cursor.cursor
+            if hasattr(raw, 'copy'):  # psycopg 3
+                with raw.copy(sql) as copy:
+                    for rows in chunks:
+                        copy.write(copy_text(rows))
+            else:
+                raw.copy_expert(sql, _Reader(copy_text(rows).encode() for rows in chunks))
+        else:
+            sql = f"INSERT INTO {quote(table.name)} ({columns}) VALUES ({', '.join(['%s'] * len(table.columns))})"
+            for rows in chunks:
+                cursor.executemany(sql, rows)
+
+
+def _delete(alias, table, pks):
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    pks = list(pks)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), DELETE_BATCH_SIZE):
+            batch = pks[start:start + DELETE_BATCH_SIZE]
+            cursor.execute(
+                f"DELETE FROM {quote(table.name)} WHERE {quote(table.columns[0])} IN ({', '.join(['%s'] * len(batch))})", batch
+            )
+
+
+def count(alias, table):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table.name)}')
+        return cursor.fetchone()[0]
+
+
+def copy_table(source, target, table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Copy every row of ``table`` into its empty copy in ``target``, in one transaction. Returns the row count."""
+    copied = 0
+
+    def chunks():
+        nonlocal copied
+        for rows in read_chunks(source, table, chunk_size):
+            copied += len(rows)
+            yield rows
+
+    with transaction.atomic(using=target):
+        if count(target, table):
+            raise ValueError(f'{table} already has rows in {target!r}; run a catch-up pass instead.')
+        write(target, table, chunks())
+    return copied
+
+
+def reset_sequences(alias, tables):
+    """Move the target's id sequences past the copied ids (nothing to do on SQLite)."""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [table.model for table in tables]):
+            cursor.execute(sql)
+
+
+def copy_all(source, target, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE, on_table=None):
+    """
+    Copy every table, wave by wave; within a wave up to ``workers`` tables
+    load at once on PostgreSQL. ``on_table(table, rows)`` is called as each
+    table finishes.
+    """
+    if connections[target].vendor != 'postgresql':
+        workers = 1  # SQLite has a single writer
+
+    def run(table):
+        rows = copy_table(source, target, table, chunk_size)
+        if on_table:
+            on_table(table, rows)
+
+    def run_in_thread(table):
+        try:
+            run(table)
+        finally:
+            connections.close_all()  # This thread's connections only
+
+    every = tables()
+    for group in waves(every):
+        if workers == 1:
+            for table in group:
+                run(table)
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(group))) as pool:
+                list(pool.map(run_in_thread, group))  # Re-raises a worker's error
+    reset_sequences(target, every)
+
+
+def catch_up_table(source, target, table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Rewrite the target rows of ``table`` that differ from the source. Returns ``(written, deleted)``."""
+    written = deleted = 0
+    for source_rows, target_rows in _pairs(source, target, table, chunk_size):
+        current = {row[0]: table.fingerprint(row) for row in target_rows}
+        changed = [row for row in source_rows if current.get(row[0]) != table.fingerprint(row)]
+        gone = current.keys() - {row[0] for row in source_rows}
+        _delete(target, table, [pk for pk in gone] + [row[0] for row in changed if row[0] in current])
+        write(target, table, [changed])
+        written += len(changed)
+        deleted += len(gone)
+    return written, deleted
+
+
+def catch_up(source, target, chunk_size=DEFAULT_CHUNK_SIZE, on_table=None):
+    """
+    Bring every table of ``target`` in line with ``source`` in one transaction,
+    so foreign keys only have to hold once all of them are done.
+    ``on_table(table, written, deleted)`` is called per table.
+    """
+    every = tables()
+    with transaction.atomic(using=target):
+        for group in waves(every):
+            for table in group:
+                written, deleted = catch_up_table(source, target, table, chunk_size)
+                if on_table:
+                    on_table(table, written, deleted)
+        reset_sequences(target, every)
+
+
+def verify(source, target, table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """``((source rows, sha256), (target rows, sha256))`` of ``table``; equal when the copy is exact."""
+    counts, digests = [0, 0], [hashlib.sha256(), hashlib.sha256()]
+    for pair in _pairs(source, target, table, chunk_size):
+        for side, rows in enumerate(pair):
+            counts[side] += len(rows)
+            for row in rows:
+                digests[side].update(table.fingerprint(row))
+    return (counts[0], digests[0].hexdigest()), (counts[1], digests[1].hexdigest())
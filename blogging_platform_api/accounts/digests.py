@@ -0,0 +1,113 @@
+"""
+Hourly and daily subscription digests.
+
+notify_subscribers queues a DigestEntry for every subscriber who doesn't
+want one email per post. send_digests works through the users whose
+digest is due a batch at a time: the batch's pending entries, with their
+users and posts, come from one query ordered by user; each digest is
+rendered once and the batch is sent over a single SMTP connection.
+
+Each user's DigestMark records the last entry that went out and is
+advanced right after their email is sent, so a run that crashes partway
+resumes with the users who weren't emailed yet; at most the email in
+flight when it stopped can go out twice.
+"""
+import logging
+import time
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import DigestEntry, DigestMark, Subscription
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {Subscription.HOURLY: timedelta(hours=1), Subscription.DAILY: timedelta(days=1)}
+DEFAULT_BATCH_SIZE = 200  # Users per query and per SMTP connection
+DEFAULT_INTERVAL = 60  # Seconds between digest ticks
+
+
+def pending_entries(delivery):
+    """Entries of ``delivery`` digests that are past their user's high-water mark."""
+    sent = DigestMark.objects.filter(user=OuterRef('user'), delivery=delivery, sent_through__gte=OuterRef('pk'))
+    return DigestEntry.objects.filter(delivery=delivery).exclude(Exists(sent))
+
+
+def due_users(delivery, now, after=0, limit=DEFAULT_BATCH_SIZE):
+    """Ids of users past ``after`` with pending entries whose last digest is at least a period old."""
+    recent = DigestMark.objects.filter(user=OuterRef('user'), delivery=delivery, sent_at__gt=now - PERIODS[delivery])
+    users = pending_entries(delivery).filter(user_id__gt=after).exclude(Exists(recent))
+    return list(users.order_by('user_id').values_list('user_id', flat=True).distinct()[:limit])
+
+
+def digest_message(username, email, delivery, posts):
+    subject = f"{len(posts)} new post{'s' if len(posts) != 1 else ''} from your subscriptions"
+    body = render_to_string('emails/digest.txt', {'username': username, 'delivery': delivery, 'posts': posts})
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [email])
+
+
+def _advance(user_id, delivery, sent_through, now):
+    DigestMark.objects.bulk_create(
+        [DigestMark(user_id=user_id, delivery=delivery, sent_through=sent_through, sent_at=now)],
+        update_conflicts=True,
+        unique_fields=['user', 'delivery'],
+        update_fields=['sent_through', 'sent_at'],
+    )
+
+
+def send_batch(delivery, user_ids, now, connection):
+    """Email the digests of ``user_ids`` over ``connection`` and return how many were sent."""
+    rows = pending_entries(delivery).filter(user_id__in=user_ids).order_by('user_id', 'pk').values_list(
+        'user_id', 'user__username', 'user__email', 'user__is_active',
+        'pk', 'post_id', 'post__title', 'post__author__username', 'post__deleted_at',
+    )
+    sent = 0
+    with connection:
+        for user_id, entries in groupby(rows, key=itemgetter(0)):
+            entries = list(entries)
+            _, username, email, is_active, *_ = entries[0]
+            posts = [
+                {'title': title, 'author': author, 'url': reverse('accounts:post-retrieve-update-destroy', args=[post_id])}
+                for *_, post_id, title, author, deleted_at in entries if deleted_at is None
+            ]
+            if posts and is_active and email:
+                connection.send_messages([digest_message(username, email, delivery, posts)])
+                sent += 1
+            _advance(user_id, delivery, entries[-1][4], now)
+    # Entries behind the marks are only kept until here; a crash before this line just leaves them to the next run
+    DigestEntry.objects.filter(delivery=delivery, user_id__in=user_ids).filter(
+        Exists(DigestMark.objects.filter(user=OuterRef('user'), delivery=delivery, sent_through__gte=OuterRef('pk')))
+    ).delete()
+    return sent
+
+
+def send_digests(delivery, now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Send every due ``delivery`` digest and return how many emails went out."""
+    now = now or timezone.now()
+    sent = after = 0
+    while True:
+        user_ids = due_users(delivery, now, after=after, limit=batch_size)
+        if not user_ids:
+            return sent
+        sent += send_batch(delivery, user_ids, now, get_connection())
+        after = user_ids[-1]
+
+
+def run_digests(interval=DEFAULT_INTERVAL, batch_size=DEFAULT_BATCH_SIZE, iterations=None, clock=timezone.now, sleep=time.sleep):
+    """Send due hourly and daily digests every ``interval`` seconds, forever or for ``iterations`` ticks."""
+    tick = 0
+    while iterations is None or tick < iterations:
+        for delivery in PERIODS:
+            count = send_digests(delivery, now=clock(), batch_size=batch_size)
+            if count:
+                logger.info('Sent %d %s digest(s).', count, delivery)
+        tick += 1
+        if iterations is None or tick < iterations:
+            sleep(interval)
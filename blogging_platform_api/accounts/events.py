@@ -0,0 +1,284 @@
+"""
+Live post events for the server-sent events endpoint.
+
+Comment, like and rating hooks publish small deltas to a per-post channel
+once their transaction commits. Every worker keeps a bounded ring buffer
+per channel, so a reconnecting client sends ``Last-Event-ID`` and gets what
+it missed, or a ``reset`` event when that has already been dropped. Open
+streams are ``Listener`` objects, each an asyncio queue fed from whatever
+thread delivered the event.
+
+``EVENTS_BACKEND`` names the class that carries events between workers.
+The default LocalBackend delivers within this process only, which is all
+a single ASGI worker needs.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+import orjson
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .fast_path import stats_annotations
+from .models import Comment, Post, PostLike, PostRating
+from .serializers import CommentSerializer
+from .signals import post_stats_changed
+
+DEFAULT_BACKEND = 'accounts.events.LocalBackend'
+DEFAULT_BUFFER_SIZE = 100  # Events kept per post for Last-Event-ID resume
+DEFAULT_MAX_CHANNELS = 10_000  # Posts with a buffer; the least recently active are dropped first
+DEFAULT_KEEPALIVE = 15  # Seconds between comment lines on an idle stream, so proxies keep it open
+RETRY_MILLISECONDS = 3000  # Reconnect delay suggested to EventSource clients
+
+# ``id`` is a microsecond timestamp: ordered across workers, and it fits in a JavaScript number
+Event = namedtuple('Event', ['id', 'type', 'data'])
+RESET = Event(None, 'reset', {})  # "You missed events; refetch the post"
+
+
+class LocalBackend:
+    """
+    Deliver events to listeners in this process.
+
+    A cross-worker backend implements the same two methods: ``publish`` sends
+    the event to every worker (e.g. Redis PUBLISH or Postgres NOTIFY) whose
+    subscriber thread calls ``broker.deliver(channel, event)``, and
+    ``has_listeners`` returns True unless it can tell nobody is listening
+    anywhere.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, channel, event):
+        self.broker.deliver(channel, event)
+
+    def has_listeners(self, channel):
+        return self.broker.has_listeners(channel)
+
+
+class _Channel:
+    __slots__ = ('events', 'dropped_through')
+
+    def __init__(self, buffer_size, dropped_through):
+        self.events = deque(maxlen=buffer_size)
+        self.dropped_through = dropped_through  # Newest event id no longer in the buffer
+
+
+class Listener:
+    """
+    One open stream on a channel. Use as ``async with broker.listen(...)``;
+    ``await listener.next(timeout)`` returns the next event (the resumed
+    backlog first), or None when ``timeout`` seconds pass without one.
+    """
+
+    def __init__(self, broker, channel, last_event_id=None):
+        self.broker = broker
+        self.channel = channel
+        self.last_event_id = last_event_id
+        self.loop = None
+        self.queue = None
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.broker.buffer_size)
+        for event in self.broker.attach(self, self.last_event_id):
+            self._put(event)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker.detach(self)
+
+    async def next(self, timeout=None):
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def push(self, event):
+        """Queue ``event`` from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # The loop is closed, so the stream is already gone
+
+    def _put(self, event):
+        if self.queue.full():
+            # The client stopped reading: drop its backlog and tell it to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESET
+        self.queue.put_nowait(event)
+
+
+class EventBroker:
+    """Per-post channels with ring buffers and the listeners attached to them in this worker."""
+
+    def __init__(self, backend_class=LocalBackend, buffer_size=DEFAULT_BUFFER_SIZE, max_channels=DEFAULT_MAX_CHANNELS):
+        self.buffer_size = buffer_size
+        self.max_channels = max_channels
+        self.backend = backend_class(self)
+        self._lock = threading.Lock()
+        self._channels = OrderedDict()
+        self._listeners = {}
+        self._last_id = current_event_id()
+        self._floor = self._last_id  # Anything at or before this happened before we were listening
+
+    def next_id(self):
+        with self._lock:
+            self._last_id = max(current_event_id(), self._last_id + 1)
+            return self._last_id
+
+    def publish(self, channel, type, data):
+        event = Event(self.next_id(), type, data)
+        self.backend.publish(channel, event)
+        return event
+
+    def deliver(self, channel, event):
+        """Buffer ``event`` and wake this worker's listeners on ``channel``."""
+        with self._lock:
+            state = self._channels.get(channel)
+            if state is None:
+                state = self._channels[channel] = _Channel(self.buffer_size, self._floor)
+                if len(self._channels) > self.max_channels:
+                    _, evicted = self._channels.popitem(last=False)
+                    if evicted.events:
+                        self._floor = max(self._floor, evicted.events[-1].id)
+            else:
+                self._channels.move_to_end(channel)
+            if len(state.events) == self.buffer_size:
+                state.dropped_through = state.events[0].id
+            state.events.append(event)
+            listeners = list(self._listeners.get(channel, ()))
+        for listener in listeners:
+            listener.push(event)
+
+    def listen(self, channel, last_event_id=None):
+        return Listener(self, channel, last_event_id)
+
+    def attach(self, listener, last_event_id=None):
+        """Register ``listener`` and return the events it missed since ``last_event_id``."""
+        with self._lock:
+            self._listeners.setdefault(listener.channel, set()).add(listener)
+            if last_event_id is None:
+                return []
+            state = self._channels.get(listener.channel)
+            if last_event_id < (state.dropped_through if state else self._floor):
+                return [RESET]
+            return [event for event in state.events if event.id > last_event_id] if state else []
+
+    def detach(self, listener):
+        with self._lock:
+            listeners = self._listeners.get(listener.channel)
+            if listeners is not None:
+                listeners.discard(listener)
+                if not listeners:
+                    del self._listeners[listener.channel]
+
+    def has_listeners(self, channel):
+        return bool(self._listeners.get(channel))
+
+    def listener_count(self):
+        with self._lock:
+            return sum(len(listeners) for listeners in self._listeners.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """This worker's broker, configured from ``EVENTS_BACKEND`` and ``EVENTS_BUFFER_SIZE``."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = EventBroker(
+                import_string(getattr(settings, 'EVENTS_BACKEND', DEFAULT_BACKEND)),
+                getattr(settings, 'EVENTS_BUFFER_SIZE', DEFAULT_BUFFER_SIZE),
+            )
+        return _broker
+
+
+def reset_broker():
+    """Drop the broker (buffers and listeners); the next get_broker() builds a new one."""
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def current_event_id():
+    """An id a client can resume from to get everything published after now."""
+    return time.time_ns() // 1000
+
+
+def format_event(event):
+    """``event`` in text/event-stream framing."""
+    lines = [] if event.id is None else [f'id: {event.id}']
+    lines.append(f'event: {event.type}')
+    lines.append(f'data: {orjson.dumps(event.data).decode()}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(channel, last_event_id=None):
+    """The body of an SSE response: resumed backlog, then live events, with keepalives while idle."""
+    keepalive = getattr(settings, 'EVENTS_KEEPALIVE', DEFAULT_KEEPALIVE)
+    async with get_broker().listen(channel, last_event_id) as listener:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while True:
+            event = await listener.next(keepalive)
+            yield ': keepalive\n\n' if event is None else format_event(event)
+
+
+def publish_on_commit(post_id, type, build):
+    """
+    Publish ``build()`` on the post's channel once the current transaction
+    commits. The payload is only built if someone may be listening.
+    """
+    def send():
+        broker = get_broker()
+        if broker.backend.has_listeners(post_id):
+            broker.publish(post_id, type, build())
+
+    transaction.on_commit(send)
+
+
+def comment_delta(comment):
+    return CommentSerializer(comment).data
+
+
+def stats_delta(post_id):
+    stats = Post.objects.filter(pk=post_id).annotate(**stats_annotations()).values_list(
+        'fast_likes_count', 'fast_average_rating'
+    ).first()
+    likes_count, average_rating = stats or (0, None)
+    return {'likes_count': likes_count, 'average_rating': average_rating}
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment(sender, instance, created, **kwargs):
+    publish_on_commit(instance.post_id, 'comment' if created else 'comment_edited', lambda: comment_delta(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def publish_comment_deleted(sender, instance, **kwargs):
+    comment_id = instance.pk
+    publish_on_commit(instance.post_id, 'comment_deleted', lambda: {'id': comment_id})
+
+
+@receiver([post_save, post_delete], sender=PostLike)
+@receiver([post_save, post_delete], sender=PostRating)
+def publish_stats(sender, instance, **kwargs):
+    post_id = instance.post_id
+    publish_on_commit(post_id, 'stats', lambda: stats_delta(post_id))
+
+
+@receiver(post_stats_changed)
+def publish_bulk_stats(sender, post_ids, **kwargs):
+    for post_id in post_ids:
+        publish_on_commit(post_id, 'stats', lambda post_id=post_id: stats_delta(post_id))
@@ -0,0 +1,184 @@
+"""
+Serializer-free read path for post lists.
+
+PostSerializer builds a tree of field objects per row and runs several
+queries per post (tags, likes, ratings, comments). For anonymous list
+reads we instead fetch plain ``values_list`` tuples for a whole page in a
+fixed number of queries and turn them into dicts with a mapper compiled
+once per field list. The output has exactly the shape and formatting of
+PostSerializer (and CommentSerializer for nested comments); FastPathParityTest
+keeps the two byte-for-byte identical.
+"""
+from collections import defaultdict
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+from .models import Comment, Post, PostLike, PostRating
+
+# Same formatting as the serializers' DateTimeFields, including timezone handling
+_post_datetime = serializers.DateTimeField().to_representation
+_comment_datetime = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S").to_representation
+
+COMMENT_COLUMNS = ('id', 'user__email', 'post_id', 'content', 'created_at', 'parent_comment_id')
+MAX_SUBTREE_COMMENTS = 5000  # Comments comment_subtrees() loads per call, requested ones included
+
+# Output field -> column fetched with values_list
+POST_COLUMNS = {
+    'id': 'id',
+    'title': 'title',
+    'content': 'content',
+    'excerpt': 'excerpt',
+    'author': 'author__username',
+    'category': 'category__name',  # PostSerializer.to_representation swaps the id for the name
+    'category_name': 'category__name',
+    'published_date': 'published_date',
+    'created_at': 'created_at',
+    'average_rating': 'fast_average_rating',
+    'likes_count': 'fast_likes_count',
+    'views': 'views',
+    'status': 'status',
+    'updated_at': 'updated_at',
+}
+POST_CONVERTERS = {'published_date': _post_datetime, 'created_at': _post_datetime, 'updated_at': _post_datetime}
+# Output fields built from side queries: (post_id, tags, comments) -> value
+POST_RELATED = {
+    'tags': lambda post_id, tags, comments: list(tags.get(post_id, ())),
+    'tags_names': lambda post_id, tags, comments: list(tags.get(post_id, ())),
+    'comments': lambda post_id, tags, comments: comments.get(post_id, []),
+}
+
+
+def stats_annotations():
+    """``fast_likes_count`` and ``fast_average_rating`` as correlated subqueries, so they never multiply rows."""
+    likes = PostLike.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('pk')).values('n')
+    ratings = PostRating.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(avg=Avg('rating')).values('avg')
+    return {
+        'fast_likes_count': Coalesce(Subquery(likes, output_field=IntegerField()), Value(0)),
+        'fast_average_rating': Subquery(ratings),
+    }
+
+
+@lru_cache(maxsize=None)
+def compile_post_mapper(fields):
+    """
+    Return ``(columns, mapper)`` for a tuple of PostSerializer field names.
+
+    ``columns`` is what to pass to ``values_list`` (the primary key first);
+    ``mapper(row, tags, comments)`` turns one fetched tuple into the dict
+    the serializer would have produced.
+    """
+    columns = list(dict.fromkeys(['id'] + [POST_COLUMNS[field] for field in fields if field in POST_COLUMNS]))
+    steps = []
+    for field in fields:
+        if field in POST_COLUMNS:
+            steps.append((field, columns.index(POST_COLUMNS[field]), POST_CONVERTERS.get(field), None))
+        else:
+            steps.append((field, None, None, POST_RELATED[field]))
+
+    def mapper(row, tags, comments):
+        post_id = row[0]
+        data = {}
+        for field, index, convert, related in steps:
+            if related is not None:
+                data[field] = related(post_id, tags, comments)
+            else:
+                value = row[index]
+                data[field] = convert(value) if convert is not None and value is not None else value
+        return data
+
+    return tuple(columns), mapper
+
+
+def tags_by_post(post_ids):
+    tags = defaultdict(list)
+    through = Post.tags.through.objects.filter(post_id__in=post_ids).order_by('tag_id')
+    for post_id, name in through.values_list('post_id', 'tag__name'):
+        tags[post_id].append(name)
+    return tags
+
+
+def _nest(rows):
+    """
+    CommentSerializer-shaped dicts for comment rows in id order, each with its
+    replies nested. Returns ``(by_id, nodes)``; ``nodes`` holds
+    ``(created_at, post_id, parent_id, node)`` for every row.
+    """
+    by_id, replies = {}, defaultdict(list)
+    nodes = []
+    for comment_id, user, post_id, content, created_at, parent_id in rows:
+        by_id[comment_id] = {
+            'id': comment_id,
+            'user': user,  # StringRelatedField: CustomUser.__str__ is the email
+            'post': post_id,
+            'content': content,
+            'created_at': _comment_datetime(created_at),
+            'parent_comment': parent_id,
+            'replies': replies[comment_id],
+        }
+        replies[parent_id].append(by_id[comment_id])
+        nodes.append((created_at, post_id, parent_id, by_id[comment_id]))
+    return by_id, nodes
+
+
+def comment_trees(post_ids):
+    """
+    Every comment on ``post_ids`` as a CommentSerializer-shaped dict with its
+    replies nested, in one query. Returns ``(by_id, top_level)`` where
+    ``top_level`` maps each post to its top-level comments, newest first.
+    """
+    by_id, nodes = _nest(Comment.objects.filter(post_id__in=post_ids).order_by('id').values_list(*COMMENT_COLUMNS))
+    top_level = defaultdict(list)
+    for created_at, post_id, parent_id, node in sorted(nodes, key=lambda item: item[0], reverse=True):
+        if parent_id is None:
+            top_level[post_id].append(node)
+    return by_id, top_level
+
+
+def comment_subtrees(comment_ids, limit=MAX_SUBTREE_COMMENTS):
+    """
+    ``{id: node}`` for ``comment_ids`` with their replies nested as in
+    comment_trees(), in one query however many comments their posts have.
+    A recursive query walks down from the requested comments breadth-first
+    and stops after ``limit`` comments, so one huge thread can't be loaded
+    whole: replies past the cap (the deepest ones) are left out.
+    """
+    if not comment_ids:
+        return {}
+    quote = connection.ops.quote_name
+    table, parent = quote(Comment._meta.db_table), quote('parent_comment_id')
+    subtree = RawSQL(
+        f"WITH RECURSIVE subtree(id) AS ("
+        f"SELECT id FROM {table} WHERE id IN ({', '.join(['%s'] * len(comment_ids))}) "
+        f"UNION ALL SELECT reply.id FROM {table} reply JOIN subtree ON reply.{parent} = subtree.id"
+        f") SELECT id FROM subtree LIMIT %s",
+        [*comment_ids, limit],
+    )
+    return _nest(Comment.objects.filter(pk__in=subtree).order_by('id').values_list(*COMMENT_COLUMNS))[0]
+
+
+def comment_rows(post_ids):
+    """Top-level comments per post, newest first, with replies nested the way CommentSerializer nests them."""
+    return comment_trees(post_ids)[1]
+
+
+def post_rows(post_ids, fields):
+    """
+    Serializer-shaped dicts for ``post_ids`` (in that order) using at most
+    three queries however many posts are requested. Missing ids are skipped.
+    """
+    post_ids = list(post_ids)
+    if not post_ids:
+        return []
+    columns, mapper = compile_post_mapper(tuple(fields))
+    queryset = Post.objects.filter(pk__in=post_ids)
+    if 'fast_likes_count' in columns or 'fast_average_rating' in columns:
+        queryset = queryset.annotate(**stats_annotations())
+    tags = tags_by_post(post_ids) if {'tags', 'tags_names'} & set(fields) else {}
+    comments = comment_rows(post_ids) if 'comments' in fields else {}
+    by_id = {row[0]: mapper(row, tags, comments) for row in queryset.values_list(*columns)}
+    return [by_id[post_id] for post_id in post_ids if post_id in by_id]
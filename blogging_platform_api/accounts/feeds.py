@@ -0,0 +1,214 @@
+"""
+Atom and RSS feeds, generated ahead of time.
+
+A Feed row holds the gzip-compressed XML of one feed: the whole site, an
+author, a category or a tag, as Atom or RSS, with the FEED_LENGTH newest
+posts. When a post that is or was listed changes (saved, tagged, published
+by run_scheduler or soft-deleted), only the feeds it appears in are
+regenerated, after the transaction commits. Last-Modified and the ETag
+only move when the XML actually changed.
+
+load() reads a feed's ETag, Last-Modified and bytes from the cache (set on
+regeneration, kept FEED_CACHE_TIMEOUT seconds), so a poll that finds
+nothing new is answered with a 304 and no database query.
+"""
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.contrib.syndication.views import add_domain
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+from .models import Category, Feed, Post, Tag
+
+User = get_user_model()
+
+GENERATORS = {'atom': Atom1Feed, 'rss': Rss201rev2Feed}
+DEFAULT_LENGTH = 20
+DEFAULT_CACHE_TIMEOUT = 300  # Seconds; regeneration replaces the entry, this only bounds per-process caches
+FEED_FIELDS = {'title', 'content', 'excerpt', 'status', 'deleted_at', 'published_date', 'category', 'author'}
+
+
+def _cache_key(scope, scope_id, fmt):
+    return f'feed:{scope}:{scope_id}:{fmt}'
+
+
+def feed_url(scope, scope_id, fmt):
+    if scope == Feed.ALL:
+        return reverse('accounts:feed', args=[fmt])
+    return reverse('accounts:scoped-feed', args=[scope, scope_id, fmt])
+
+
+def _describe(scope, scope_id):
+    """``(title, link)`` of a feed, or None if its author, category or tag no longer exists."""
+    site_name = Site.objects.get_current().name
+    if scope == Feed.ALL:
+        return site_name, reverse('accounts:post-list-create')
+    if scope == Feed.AUTHOR:
+        name = User.objects.filter(pk=scope_id, deleted_at__isnull=True).values_list('username', flat=True).first()
+        link = reverse('accounts:posts-by-author', args=[scope_id])
+    elif scope == Feed.CATEGORY:
+        name = Category.objects.filter(pk=scope_id).values_list('name', flat=True).first()
+        link = reverse('accounts:posts-by-category', args=[scope_id])
+    else:
+        name = Tag.objects.filter(pk=scope_id).values_list('name', flat=True).first()
+        link = f"{reverse('accounts:post-list-create')}?tags={scope_id}"
+    return (f'{site_name}: {name}', link) if name is not None else None
+
+
+def scope_posts(scope, scope_id):
+    posts = Post.objects.visible()
+    if scope == Feed.AUTHOR:
+        return posts.filter(author_id=scope_id)
+    if scope == Feed.CATEGORY:
+        return posts.filter(category_id=scope_id)
+    if scope == Feed.TAG:
+        return posts.filter(tags=scope_id)
+    return posts
+
+
+def render(scope, scope_id):
+    """``{format: XML bytes}`` of a feed, or None if its subject is gone."""
+    described = _describe(scope, scope_id)
+    if described is None:
+        return None
+    title, link = described
+    domain = Site.objects.get_current().domain
+    length = getattr(settings, 'FEED_LENGTH', DEFAULT_LENGTH)
+    posts = list(
+        scope_posts(scope, scope_id).defer('content').select_related('author', 'category')
+        .prefetch_related('tags').order_by('-published_date', '-pk')[:length]
+    )
+    documents = {}
+    for fmt, generator in GENERATORS.items():
+        feed = generator(
+            title=title, link=add_domain(domain, link, secure=True), description=title,
+            language=settings.LANGUAGE_CODE, feed_url=add_domain(domain, feed_url(scope, scope_id, fmt), secure=True),
+        )
+        for post in posts:
+            url = add_domain(domain, post.get_absolute_url(), secure=True)
+            categories = ([post.category.name] if post.category else []) + [tag.name for tag in post.tags.all()]
+            feed.add_item(
+                title=post.title, link=url, description=post.excerpt, unique_id=url, unique_id_is_permalink=True,
+                pubdate=post.published_date, author_name=post.author.username, categories=categories,
+            )
+        documents[fmt] = feed.writeString('utf-8').encode()
+    return documents
+
+
+def regenerate(scope, scope_id):
+    """
+    Render a feed and store the formats whose XML changed. Returns how many
+    were stored, or None (dropping the feed) if its subject is gone.
+    """
+    documents = render(scope, scope_id)
+    if documents is None:
+        Feed.objects.filter(scope=scope, scope_id=scope_id).delete()
+        cache.delete_many([_cache_key(scope, scope_id, fmt) for fmt in GENERATORS])
+        return None
+    current = dict(Feed.objects.filter(scope=scope, scope_id=scope_id).values_list('format', 'etag'))
+    now = timezone.now()
+    timeout = getattr(settings, 'FEED_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+    stored = 0
+    for fmt, xml in documents.items():
+        etag = hashlib.sha256(xml).hexdigest()
+        if current.get(fmt) == etag:
+            continue
+        body = gzip.compress(xml, mtime=0)
+        Feed.objects.update_or_create(scope=scope, scope_id=scope_id, format=fmt, defaults={'body': body, 'etag': etag, 'last_modified': now})
+        cache.set(_cache_key(scope, scope_id, fmt), (etag, now, body), timeout)
+        stored += 1
+    return stored
+
+
+def load(scope, scope_id, fmt):
+    """``(etag, last_modified, gzipped XML)`` of a feed, generating it on first use; None if it has no subject."""
+    key = _cache_key(scope, scope_id, fmt)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+    feeds = Feed.objects.filter(scope=scope, scope_id=scope_id, format=fmt).values_list('etag', 'last_modified', 'body')
+    row = feeds.first()
+    if row is None:
+        if regenerate(scope, scope_id) is None:
+            return None
+        row = feeds.first()
+    entry = (row[0], row[1], bytes(row[2]))
+    cache.set(key, entry, getattr(settings, 'FEED_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT))
+    return entry
+
+
+def scopes_of(posts):
+    """Every feed scope the posts in ``posts`` belong to, whether or not they are listed right now."""
+    authors = set(posts.order_by().values_list('author_id', flat=True).distinct())
+    if not authors:
+        return set()
+    scopes = {(Feed.ALL, 0)} | {(Feed.AUTHOR, author_id) for author_id in authors}
+    scopes |= {(Feed.CATEGORY, category_id) for category_id in posts.order_by().exclude(category=None).values_list('category_id', flat=True).distinct()}
+    tags = Post.tags.through.objects.filter(post__in=posts.values('pk')).values_list('tag_id', flat=True).distinct()
+    return scopes | {(Feed.TAG, tag_id) for tag_id in tags}
+
+
+def regenerate_later(scopes):
+    """Regenerate ``scopes`` once the current transaction commits."""
+    scopes = sorted(scopes)
+    if scopes:
+        transaction.on_commit(lambda: [regenerate(scope, scope_id) for scope, scope_id in scopes])
+
+
+def _listed(post):
+    return post.status == 'published' and post.deleted_at is None
+
+
+@receiver(post_save, sender=Post)
+def regenerate_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not FEED_FIELDS & set(update_fields)):
+        return
+    # Set by accounts.archive's pre_save: (year, month, category_id, author_id) if the post was listed before
+    before = getattr(instance, '_archive_key', None)
+    if not before and not _listed(instance):
+        return  # Drafts and scheduled posts aren't in any feed
+    scopes = scopes_of(Post.all_objects.filter(pk=instance.pk))
+    if before:
+        # Moved out of a category or to another author: the old feeds drop it
+        scopes |= {(Feed.AUTHOR, before[3])} | ({(Feed.CATEGORY, before[2])} if before[2] else set())
+    regenerate_later(scopes)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def regenerate_on_tags(sender, instance, action, pk_set=None, **kwargs):
+    if isinstance(instance, Tag):
+        if action.startswith('post_'):
+            regenerate_later({(Feed.TAG, instance.pk)})
+        return
+    if action == 'pre_clear':
+        instance._feed_cleared_tags = set(instance.tags.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear') and _listed(instance):
+        removed = pk_set if action != 'post_clear' else getattr(instance, '_feed_cleared_tags', set())
+        regenerate_later(scopes_of(Post.all_objects.filter(pk=instance.pk)) | {(Feed.TAG, tag_id) for tag_id in removed or ()})
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def drop_feeds(sender, instance, **kwargs):
+    scope = Feed.CATEGORY if sender is Category else Feed.TAG
+    Feed.objects.filter(scope=scope, scope_id=instance.pk).delete()
+    cache.delete_many([_cache_key(scope, instance.pk, fmt) for fmt in GENERATORS])
+
+
+def all_scopes():
+    """Every feed there can be: the site, authors with published posts, categories and tags."""
+    authors = Post.objects.filter(status='published').order_by().values_list('author_id', flat=True).distinct()
+    return (
+        [(Feed.ALL, 0)] + [(Feed.AUTHOR, author_id) for author_id in authors]
+        + [(Feed.CATEGORY, pk) for pk in Category.objects.values_list('pk', flat=True)]
+        + [(Feed.TAG, pk) for pk in Tag.objects.values_list('pk', flat=True)]
+    )
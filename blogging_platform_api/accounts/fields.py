@@ -0,0 +1,131 @@
+"""
+CompressedTextField: a text field stored as compressed bytes.
+
+Python code, serializers and templates only ever see ``str``. On disk each
+value starts with a one-byte header:
+
+    0x00  UTF-8 text stored as is (short values, where compression doesn't pay)
+    0x01  zlib stream
+    0x02  zlib stream made with a preset dictionary; the next 4 bytes hold the
+          CompressionDictionary id (big-endian)
+
+Dictionaries are trained on our own posts and comments by the
+compress_content command, which makes short and medium bodies compress far
+better than plain zlib. Values written with an older dictionary stay
+readable because the dictionary id travels with the value.
+"""
+import struct
+import threading
+import zlib
+
+from django import forms
+from django.apps import apps
+from django.db import models
+from django.utils.html import strip_tags
+
+RAW, ZLIB, ZLIB_DICT = 0, 1, 2
+MIN_COMPRESS_LENGTH = 64  # Bytes; shorter values are stored raw
+COMPRESSION_LEVEL = 6
+
+_dictionaries = {}
+_current = {'id': None, 'loaded': False}
+_lock = threading.Lock()
+
+
+def _dictionary_model():
+    return apps.get_model('accounts', 'CompressionDictionary')
+
+
+def get_dictionary(dictionary_id):
+    """Return the bytes of a stored dictionary, cached for the life of the process."""
+    data = _dictionaries.get(dictionary_id)
+    if data is None:
+        data = bytes(_dictionary_model().objects.values_list('data', flat=True).get(pk=dictionary_id))
+        with _lock:
+            _dictionaries[dictionary_id] = data
+    return data
+
+
+def current_dictionary_id():
+    """Id of the newest dictionary (used for writes), looked up once per process."""
+    if not _current['loaded']:
+        dictionary_id = _dictionary_model().objects.order_by('-pk').values_list('pk', flat=True).first()
+        with _lock:
+            _current.update(id=dictionary_id, loaded=True)
+    return _current['id']
+
+
+def reset_dictionary_cache():
+    """Forget cached dictionaries, e.g. after training a new one."""
+    with _lock:
+        _dictionaries.clear()
+        _current.update(id=None, loaded=False)
+
+
+def compress_text(text, dictionary_id=None):
+    data = text.encode('utf-8')
+    if len(data) < MIN_COMPRESS_LENGTH:
+        return bytes([RAW]) + data
+    if dictionary_id is not None:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=get_dictionary(dictionary_id))
+        compressed = compressor.compress(data) + compressor.flush()
+        header = bytes([ZLIB_DICT]) + struct.pack('>I', dictionary_id)
+    else:
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        header = bytes([ZLIB])
+    if len(compressed) + len(header) >= len(data) + 1:
+        return bytes([RAW]) + data
+    return header + compressed
+
+
+def decompress_text(value):
+    value = bytes(value)
+    kind = value[0]
+    if kind == RAW:
+        return value[1:].decode('utf-8')
+    if kind == ZLIB:
+        return zlib.decompress(value[1:]).decode('utf-8')
+    if kind == ZLIB_DICT:
+        (dictionary_id,) = struct.unpack('>I', value[1:5])
+        decompressor = zlib.decompressobj(zdict=get_dictionary(dictionary_id))
+        return (decompressor.decompress(value[5:]) + decompressor.flush()).decode('utf-8')
+    raise ValueError(f'Unknown compressed text header {kind}')
+
+
+class CompressedTextField(models.BinaryField):
+    description = 'Text stored compressed'
+    empty_values = [None, '']
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decompress_text(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return decompress_text(value)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        return compress_text(str(value), current_dictionary_id())
+
+    def get_default(self):
+        default = models.Field.get_default(self)
+        return '' if default in (b'', None) and not self.null else default
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{'form_class': forms.CharField, 'widget': forms.Textarea, **kwargs})
+
+
+def plain_text(value):
+    """``value`` with HTML tags stripped and whitespace collapsed."""
+    return ' '.join(strip_tags(value or '').split())
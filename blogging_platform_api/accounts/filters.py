@@ -1,8 +1,35 @@
+import operator
+from functools import reduce
+
 import django_filters
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.filters import SearchFilter
+
+from . import search
+from .archive import day_range
 from .models import Post
 
+
+class HalfOpenDateRangeFilter(django_filters.DateFromToRangeFilter):
+    """
+    A date range on a datetime column as ``>=`` the first day's midnight and
+    ``<`` the midnight after the last day. Unlike ``__date`` this is a plain
+    range an index can answer, and unlike BETWEEN ... 23:59:59.999999 it
+    can't be rounded into the next day by databases with coarser precision.
+    """
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        if value.start is not None:
+            qs = qs.filter(**{f'{self.field_name}__gte': value.start})
+        if value.stop is not None:
+            qs = qs.filter(**{f'{self.field_name}__lt': day_range(value.stop.date())[1]})
+        return qs.distinct() if self.distinct else qs
+
+
 class PostFilter(django_filters.FilterSet):
-    published_date = django_filters.DateFromToRangeFilter(field_name='published_date')
+    published_date = HalfOpenDateRangeFilter(field_name='published_date')
     category = django_filters.CharFilter(field_name='category__name', lookup_expr='icontains')
     tags = django_filters.CharFilter(field_name='tags__name', lookup_expr='icontains')
 
@@ -11,4 +38,25 @@ class PostFilter(django_filters.FilterSet):
         fields = ['category', 'published_date', 'tags']
 
 
+class PostSearchFilter(SearchFilter):
+    """
+    SearchFilter that also looks for each term in the post body, through its
+    full-text index (accounts.search); the compressed column can't be searched.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request) or []
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
 
+        orm_lookups = [self.construct_search(str(search_field), queryset) for search_field in search_fields]
+        conditions = (
+            reduce(operator.or_, (Q(**{orm_lookup: term}) for orm_lookup in orm_lookups), search.matching(term))
+            for term in search_terms
+        )
+        matches = queryset.filter(reduce(operator.and_, conditions))
+        if self.must_call_distinct(queryset, search_fields):
+            # As SearchFilter does: an EXISTS rather than DISTINCT over the joined rows
+            return queryset.filter(Exists(matches.filter(pk=OuterRef('pk'))))
+        return matches
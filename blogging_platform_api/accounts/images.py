@@ -0,0 +1,207 @@
+"""
+Profile pictures: content-addressed storage and thumbnails.
+
+HashingUploadHandler streams every upload to a temporary file in chunks,
+computing its SHA-256 on the way. store_upload files the image once under
+images/<aa>/<sha256>/ in the default storage (moving the temporary file
+into place), so identical uploads share one StoredImage and one set of
+files. The process_images worker renders VARIANTS as WebP and JPEG in a
+process pool: decoding and resizing are CPU-bound and mostly hold the GIL.
+
+Until an image is processed, variant URLs fall back to the original.
+Pillow is imported only where images are read or written, keeping it off
+the boot path.
+"""
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils import timezone
+
+from .models import Profile, StoredImage
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {'small': 48, 'medium': 96, 'large': 256}  # Longest side in pixels
+FORMATS = {
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}  # Accepted upload formats
+MAX_PIXELS = 40_000_000  # Larger images are refused before they are decoded
+CHUNK_SIZE = 64 * 1024
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_INTERVAL = 10  # Seconds between worker ticks
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Write every upload straight to a temporary file, hashing chunks as they arrive."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.digest.hexdigest()
+        return file
+
+
+def image_dir(sha256):
+    return f'images/{sha256[:2]}/{sha256}'
+
+
+def _sha256(file):
+    if getattr(file, 'sha256', None):
+        return file.sha256
+    digest = hashlib.sha256()
+    for chunk in file.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_upload(file):
+    """
+    Return the StoredImage for ``file``, writing it to storage only if these
+    bytes haven't been stored before. Raises ValidationError for files that
+    aren't a supported image.
+    """
+    from PIL import Image
+
+    sha256 = _sha256(file)
+    existing = StoredImage.objects.filter(sha256=sha256).first()
+    if existing is not None:
+        return existing
+    file.seek(0)
+    try:
+        # Only the header is read here; pixels are decoded by the worker
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Upload a valid image.')
+    if image_format not in EXTENSIONS:
+        raise ValidationError(f'Unsupported image format {image_format}.')
+    if width * height > MAX_PIXELS:
+        raise ValidationError('The image is too large.')
+    name = f'{image_dir(sha256)}/original.{EXTENSIONS[image_format]}'
+    if not default_storage.exists(name):
+        file.seek(0)
+        name = default_storage.save(name, file)
+    image, _ = StoredImage.objects.get_or_create(sha256=sha256, defaults={'original': name, 'width': width, 'height': height})
+    return image
+
+
+def set_profile_picture(profile, file):
+    """Store ``file`` and make it the profile's picture (saved by the caller)."""
+    profile.picture = store_upload(file)
+    profile.profile_picture = profile.picture.original
+
+
+def render_variants(source_path, target_dir):
+    """
+    Write every variant of the image at ``source_path`` into ``target_dir`` and
+    return ``{size: {format: filename}}``. Runs in a worker process.
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(target_dir, exist_ok=True)
+    variants = {}
+    with Image.open(source_path) as image:
+        largest = max(VARIANTS.values())
+        # JPEGs are decoded at the smallest DCT scale that still covers the largest variant
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+        # Shrink step by step from the largest variant, each from the previous one
+        for size_name, size in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+            image = image.copy()
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            variants[size_name] = {}
+            for image_format, options in FORMATS.items():
+                frame = image
+                if image_format == 'jpeg' and image.mode == 'RGBA':
+                    frame = Image.new('RGB', image.size, 'white')
+                    frame.paste(image, mask=image.getchannel('A'))
+                filename = f'{size_name}.{image_format}'
+                partial = os.path.join(target_dir, f'.{filename}.partial')
+                frame.save(partial, image_format.upper(), **options)
+                # Readers never see a half-written thumbnail
+                os.replace(partial, os.path.join(target_dir, filename))
+                variants[size_name][image_format] = filename
+    return variants
+
+
+def process_pending(executor=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Render thumbnails of up to ``batch_size`` unprocessed images, in
+    ``executor``'s processes if given, and return how many were processed.
+    """
+    images = list(StoredImage.objects.filter(processed_at__isnull=True).order_by('pk')[:batch_size])
+    jobs = [(default_storage.path(image.original), default_storage.path(image_dir(image.sha256))) for image in images]
+    if executor is None:
+        results = [_attempt(render_variants, *job) for job in jobs]
+    else:
+        results = [future.result() for future in [executor.submit(_attempt, render_variants, *job) for job in jobs]]
+    now = timezone.now()
+    for image, (variants, error) in zip(images, results):
+        if error:
+            # Kept on the original rather than retried forever
+            logger.error('Could not render thumbnails of image %s: %s', image.sha256, error)
+        names = {size: {fmt: f'{image_dir(image.sha256)}/{filename}' for fmt, filename in formats.items()} for size, formats in variants.items()}
+        StoredImage.objects.filter(pk=image.pk).update(variants=names, processed_at=now, last_error=error)
+    return len(images)
+
+
+def _attempt(function, *args):
+    try:
+        return function(*args), ''
+    except Exception as error:  # Pillow raises a wide range of errors on broken files
+        return {}, f'{type(error).__name__}: {error}'
+
+
+def run_image_worker(interval=DEFAULT_INTERVAL, batch_size=DEFAULT_BATCH_SIZE, workers=None, iterations=None, sleep=time.sleep):
+    """Process new images every ``interval`` seconds with a pool of ``workers`` processes."""
+    tick = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while iterations is None or tick < iterations:
+            # Drain the backlog before sleeping
+            while (count := process_pending(executor, batch_size=batch_size)):
+                logger.info('Rendered thumbnails of %d image(s).', count)
+            tick += 1
+            if iterations is None or tick < iterations:
+                sleep(interval)
+
+
+def adopt_existing_pictures():
+    """Move pictures uploaded before content-addressed storage into it; returns how many profiles changed."""
+    adopted = 0
+    for profile in Profile.objects.filter(picture__isnull=True).exclude(profile_picture=''):
+        try:
+            with default_storage.open(profile.profile_picture.name) as file:
+                set_profile_picture(profile, file)
+        except (OSError, ValidationError) as error:
+            logger.warning('Skipping the picture of profile %s: %s', profile.pk, error)
+            continue
+        profile.save(update_fields=['picture', 'profile_picture'])
+        adopted += 1
+    return adopted
+
+
+def variant_urls(image):
+    """``{size: {format: url}}`` for a StoredImage; every size points at the original until it is processed."""
+    if image is None:
+        return {}
+    if not image.variants:
+        original = default_storage.url(image.original)
+        return {size: {fmt: original for fmt in FORMATS} for size in VARIANTS}
+    return {size: {fmt: default_storage.url(name) for fmt, name in formats.items()} for size, formats in image.variants.items()}
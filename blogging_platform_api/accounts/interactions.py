@@ -0,0 +1,294 @@
+"""
+Like and rating ingestion.
+
+Single actions are one ``INSERT ... ON CONFLICT`` (or ``DELETE``) statement
+each, guarded by an EXISTS on the post so a missing post needs no extra round
+trip. Batches (from the batch endpoint or from the micro-batcher that merges
+concurrent requests) are coalesced and written with ``bulk_create`` and one
+``DELETE`` per relation in one transaction. Neither path sends per-row model
+signals; the posts they changed are touched and announced once.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Post, PostLike, PostRating, Subscription, touch_posts
+from .signals import post_stats_changed
+
+LIKE, UNLIKE, RATE, CLEAR_RATING = 'like', 'unlike', 'rate', 'clear_rating'
+ACTIONS = (LIKE, UNLIKE, RATE, CLEAR_RATING)
+
+# Per-action outcomes
+CREATED, EXISTS, UPDATED, DELETED, NOT_FOUND = 'created', 'exists', 'updated', 'deleted', 'not_found'
+
+# Per-viewer fields added to serialized posts for logged-in users (see viewer_state)
+VIEWER_FIELDS = ('liked_by_me', 'my_rating', 'following_author', 'following_category')
+
+Interaction = namedtuple('Interaction', ['user_id', 'action', 'post_id', 'rating'], defaults=[None])
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _now():
+    # Raw SQL bypasses field conversion, so adapt the timestamp the way the backend stores it
+    return connection.ops.adapt_datetimefield_value(timezone.now())
+
+
+def _post_exists(post_id):
+    return Post.objects.filter(pk=post_id).exists()
+
+
+def like_post(user_id, post_id):
+    """Return CREATED, EXISTS (already liked) or NOT_FOUND."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {_table(PostLike)} (post_id, user_id, created_at) "
+            f"SELECT %s, %s, %s WHERE EXISTS (SELECT 1 FROM {_table(Post)} WHERE id = %s AND deleted_at IS NULL) "
+            f"ON CONFLICT (post_id, user_id) DO NOTHING",
+            [post_id, user_id, _now(), post_id],
+        )
+        if cursor.rowcount:
+            touch_posts([post_id])  # Raw SQL skips the post_save receivers
+            post_stats_changed.send(sender=PostLike, post_ids=[post_id])
+            return CREATED
+    # Only the rare duplicate/missing case pays for a second query
+    return EXISTS if _post_exists(post_id) else NOT_FOUND
+
+
+def rate_post(user_id, post_id, rating):
+    """Create or replace the user's rating. Return UPDATED or NOT_FOUND."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {_table(PostRating)} (post_id, user_id, rating, created_at) "
+            f"SELECT %s, %s, %s, %s WHERE EXISTS (SELECT 1 FROM {_table(Post)} WHERE id = %s AND deleted_at IS NULL) "
+            f"ON CONFLICT (post_id, user_id) DO UPDATE SET rating = excluded.rating",
+            [post_id, user_id, rating, _now(), post_id],
+        )
+        if not cursor.rowcount:
+            return NOT_FOUND
+    touch_posts([post_id])
+    post_stats_changed.send(sender=PostRating, post_ids=[post_id])
+    return UPDATED
+
+
+def _delete_one(model, user_id, post_id):
+    # Nothing references likes or ratings, so skip the collector and its per-row signals
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {_table(model)} WHERE post_id = %s AND user_id = %s", [post_id, user_id])
+        if not cursor.rowcount:
+            return NOT_FOUND
+    touch_posts([post_id])
+    post_stats_changed.send(sender=model, post_ids=[post_id])
+    return DELETED
+
+
+def unlike_post(user_id, post_id):
+    """Return DELETED or NOT_FOUND (the user had not liked the post)."""
+    return _delete_one(PostLike, user_id, post_id)
+
+
+def clear_rating(user_id, post_id):
+    """Return DELETED or NOT_FOUND (the user had not rated the post)."""
+    return _delete_one(PostRating, user_id, post_id)
+
+
+def viewer_state(user_id, posts):
+    """
+    The user's own state for each of ``posts`` (``(post_id, author_id,
+    category_id)`` triples), as ``{post_id: {'liked_by_me', 'my_rating',
+    'following_author', 'following_category'}}``.
+
+    One query per relation for the whole page, however many posts it has.
+    """
+    posts = list(posts)
+    if not posts:
+        return {}
+    post_ids = {post_id for post_id, author_id, category_id in posts}
+    author_ids = {author_id for post_id, author_id, category_id in posts}
+    category_ids = {category_id for post_id, author_id, category_id in posts if category_id is not None}
+    subscriptions = Subscription.objects.filter(user_id=user_id)
+
+    liked = set(PostLike.objects.filter(user_id=user_id, post_id__in=post_ids).values_list('post_id', flat=True))
+    ratings = dict(PostRating.objects.filter(user_id=user_id, post_id__in=post_ids).values_list('post_id', 'rating'))
+    authors = set(subscriptions.filter(author_id__in=author_ids).values_list('author_id', flat=True))
+    categories = set(
+        subscriptions.filter(category_id__in=category_ids).values_list('category_id', flat=True)
+    ) if category_ids else set()
+    return {
+        post_id: {
+            'liked_by_me': post_id in liked,
+            'my_rating': ratings.get(post_id),
+            'following_author': author_id in authors,
+            'following_category': category_id in categories,
+        }
+        for post_id, author_id, category_id in posts
+    }
+
+
+def _pairs_filter(pairs):
+    """Q matching any of the given (user_id, post_id) pairs, grouped by user."""
+    by_user = {}
+    for user_id, post_id in pairs:
+        by_user.setdefault(user_id, set()).add(post_id)
+    query = Q(pk__in=[])
+    for user_id, post_ids in by_user.items():
+        query |= Q(user_id=user_id, post_id__in=post_ids)
+    return query
+
+
+def apply_interactions(interactions):
+    """
+    Apply a batch of ``Interaction`` tuples in one transaction and return one outcome per input.
+
+    Later actions on the same (user, post) win over earlier ones, so a like
+    followed by an unlike in the same batch writes nothing. Every action type
+    costs a constant number of statements regardless of batch size.
+    """
+    interactions = list(interactions)
+    outcomes = [None] * len(interactions)
+    existing_posts = set(Post.objects.filter(pk__in={item.post_id for item in interactions}).values_list('pk', flat=True))
+
+    # Keep only the final like/unlike and rate/clear action per (user, post)
+    final_like, final_rating = {}, {}
+    for index, item in enumerate(interactions):
+        if item.post_id not in existing_posts:
+            outcomes[index] = NOT_FOUND
+            continue
+        target = final_like if item.action in (LIKE, UNLIKE) else final_rating
+        target[(item.user_id, item.post_id)] = index
+
+    likes = [key for key, index in final_like.items() if interactions[index].action == LIKE]
+    unlikes = [key for key, index in final_like.items() if interactions[index].action == UNLIKE]
+    ratings = [key for key, index in final_rating.items() if interactions[index].action == RATE]
+    clears = [key for key, index in final_rating.items() if interactions[index].action == CLEAR_RATING]
+
+    with transaction.atomic():
+        if likes or unlikes:
+            liked = set(PostLike.objects.filter(_pairs_filter(likes + unlikes)).values_list('user_id', 'post_id'))
+        else:
+            liked = set()
+        if likes:
+            PostLike.objects.bulk_create(
+                [PostLike(user_id=user_id, post_id=post_id) for user_id, post_id in likes if (user_id, post_id) not in liked],
+                ignore_conflicts=True,
+            )
+        if unlikes:
+            unliked = PostLike.objects.filter(_pairs_filter(unlikes))
+            unliked._raw_delete(unliked.db)
+        if ratings:
+            PostRating.objects.bulk_create(
+                [PostRating(user_id=key[0], post_id=key[1], rating=interactions[final_rating[key]].rating) for key in ratings],
+                update_conflicts=True,
+                unique_fields=['post', 'user'],
+                update_fields=['rating'],
+            )
+        if clears:
+            cleared = PostRating.objects.filter(_pairs_filter(clears))
+            rated = set(cleared.values_list('user_id', 'post_id'))
+            cleared._raw_delete(cleared.db)
+        else:
+            rated = set()
+        # bulk_create and _raw_delete skip the per-row receivers that version the template cache
+        changed = {post_id for _, post_id in likes + ratings}
+        changed.update(post_id for _, post_id in (liked & set(unlikes)) | (rated & set(clears)))
+        touch_posts(changed)
+        post_stats_changed.send(sender=Post, post_ids=changed)
+
+    for key in likes:
+        outcomes[final_like[key]] = EXISTS if key in liked else CREATED
+    for key in unlikes:
+        outcomes[final_like[key]] = DELETED if key in liked else NOT_FOUND
+    for key in ratings:
+        outcomes[final_rating[key]] = UPDATED
+    for key in clears:
+        outcomes[final_rating[key]] = DELETED if key in rated else NOT_FOUND
+    # Actions superseded by a later one in the same batch share its outcome
+    for index, item in enumerate(interactions):
+        if outcomes[index] is None:
+            target = final_like if item.action in (LIKE, UNLIKE) else final_rating
+            outcomes[index] = outcomes[target[(item.user_id, item.post_id)]]
+    return outcomes
+
+
+class MicroBatcher:
+    """
+    Merge interactions submitted concurrently by request threads into one transaction.
+
+    The first thread to arrive becomes the leader: it waits ``window``
+    seconds for followers to queue their actions, applies the whole batch
+    with ``apply_interactions`` and hands each thread its own outcome.
+    """
+
+    def __init__(self, window, max_batch=500):
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._leader_active = False
+
+    def submit(self, interaction):
+        done = threading.Event()
+        slot = {'event': done}
+        with self._lock:
+            self._pending.append((interaction, slot))
+            lead = not self._leader_active
+            if lead:
+                self._leader_active = True
+        if lead:
+            self._lead()
+        done.wait()
+        if 'error' in slot:
+            raise slot['error']
+        return slot['outcome']
+
+    def _lead(self):
+        time.sleep(self.window)  # Let concurrent requests join the batch
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                if not batch:
+                    self._leader_active = False
+                    return
+            try:
+                outcomes = apply_interactions([interaction for interaction, _ in batch])
+            except Exception as error:
+                for _, slot in batch:
+                    slot['error'] = error
+                    slot['event'].set()
+            else:
+                for (_, slot), outcome in zip(batch, outcomes):
+                    slot['outcome'] = outcome
+                    slot['event'].set()
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def submit_interaction(interaction):
+    """
+    Apply one interaction, micro-batched with concurrent requests when
+    ``INTERACTION_BATCH_WINDOW`` (seconds) is set, otherwise as a single upsert.
+    """
+    global _batcher
+    window = getattr(settings, 'INTERACTION_BATCH_WINDOW', None)
+    if window:
+        with _batcher_lock:
+            if _batcher is None or _batcher.window != window:
+                _batcher = MicroBatcher(window)
+        return _batcher.submit(interaction)
+
+    if interaction.action == LIKE:
+        return like_post(interaction.user_id, interaction.post_id)
+    if interaction.action == UNLIKE:
+        return unlike_post(interaction.user_id, interaction.post_id)
+    if interaction.action == RATE:
+        return rate_post(interaction.user_id, interaction.post_id, interaction.rating)
+    return clear_rating(interaction.user_id, interaction.post_id)
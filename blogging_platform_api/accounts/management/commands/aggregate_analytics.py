@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from accounts.analytics import aggregate_range, aggregate_since_checkpoint, earliest_event_day
+
+
+class Command(BaseCommand):
+    help = 'Roll up likes, ratings, comments and subscriptions into daily per-post and per-author stats. Run hourly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=str, help='First day (YYYY-MM-DD) to rebuild; use "earliest" to backfill everything.')
+        parser.add_argument('--until', type=str, help='Last day (YYYY-MM-DD) to rebuild, inclusive. Defaults to today.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['since']:
+            # Explicit backfill: each day is rebuilt from raw events, so re-running is safe
+            since = earliest_event_day() if options['since'] == 'earliest' else parse_date(options['since'])
+            until = parse_date(options['until']) if options['until'] else timezone.now().date()
+            if since is None or until is None:
+                raise CommandError('Dates must be given as YYYY-MM-DD.')
+            days = aggregate_range(since, until)
+        else:
+            days = aggregate_since_checkpoint()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {days} day(s) in {elapsed:.2f}s.'))
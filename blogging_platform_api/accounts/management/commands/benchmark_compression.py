@@ -0,0 +1,82 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from accounts.benchmarks import long_form_body, scratch_database, seed_blog, timer
+from accounts.compression import recompress, storage_report, train_and_store
+from accounts import search
+from accounts.fields import decompress_text
+from accounts.models import Post, make_excerpt
+from accounts.serializers import PostSerializer, PostSummarySerializer
+
+
+class Command(BaseCommand):
+    help = 'Report storage savings and read latency of compressed post bodies on a seeded scratch database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--paragraphs', type=int, default=8, help='Average paragraphs per post.')
+        parser.add_argument('--reads', type=int, default=2000, help='Random single-post reads to time.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        results = {}
+        with scratch_database():
+            seed_blog(users=200, posts=options['posts'])
+            posts = list(Post.objects.only('pk'))
+            for post in posts:
+                post.content = long_form_body(rng, max(1, int(rng.gauss(options['paragraphs'], 3))))
+                post.excerpt = make_excerpt(post.content)
+            with timer(results, 'write_plain'):
+                Post.objects.bulk_update(posts, ['content', 'excerpt'], batch_size=1000)
+            with timer(results, 'index'):
+                search.rebuild()
+
+            raw, plain = storage_report(Post, 'content')
+            searchable = search.index_size()
+            with timer(results, 'train'):
+                dictionary = train_and_store()
+            _, trained = storage_report(Post, 'content', dictionary.pk)
+            with timer(results, 'recompress'):
+                recompress(Post, 'content')
+
+            post_ids = [post.pk for post in posts]
+            sample = rng.sample(post_ids, min(options['reads'], len(post_ids)))
+            stored = dict(Post.objects.filter(pk__in=sample).values_list('pk', 'content').iterator())
+            blobs = [Post._meta.get_field('content').get_prep_value(stored[pk]) for pk in sample]
+            with timer(results, 'decompress'):
+                for blob in blobs:
+                    decompress_text(blob)
+            with timer(results, 'read_full'):
+                for pk in sample:
+                    Post.objects.get(pk=pk).content
+            with timer(results, 'read_excerpt'):
+                for pk in sample:
+                    Post.objects.defer('content').get(pk=pk).excerpt
+
+            page = Post.objects.order_by('-published_date')[:100]
+            with timer(results, 'list_full'):
+                PostSerializer(page, many=True).data
+            with timer(results, 'list_summary'):
+                PostSummarySerializer(page.defer('content'), many=True).data
+
+        reads = len(sample)
+        self.stdout.write(f"Seeded {options['posts']} posts, {raw / 2**20:.1f} MiB of body text")
+        self.stdout.write(f"  zlib:              {plain / 2**20:.1f} MiB ({1 - plain / raw:.0%} smaller)")
+        self.stdout.write(
+            f"  zlib + dictionary: {trained / 2**20:.1f} MiB ({1 - trained / raw:.0%} smaller), "
+            f"trained in {results['train']:.2f}s, recompressed in {results['recompress']:.2f}s"
+        )
+        self.stdout.write(
+            f"  full-text index: {searchable / 2**20:.1f} MiB, built in {results['index']:.2f}s; "
+            f"body and index together take {(trained + searchable) / raw:.0%} of the uncompressed body"
+        )
+        self.stdout.write(f"Decompress one body: {results['decompress'] / reads * 1e6:.0f} us")
+        self.stdout.write(
+            f"Single-post read: {results['read_full'] / reads * 1e6:.0f} us with body, "
+            f"{results['read_excerpt'] / reads * 1e6:.0f} us excerpt only"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"100-post list page: {results['list_full'] * 1000:.0f} ms full serializer, "
+            f"{results['list_summary'] * 1000:.0f} ms summary serializer"
+        ))
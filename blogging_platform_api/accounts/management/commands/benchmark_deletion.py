@@ -0,0 +1,98 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from accounts.benchmarks import scratch_database
+from accounts.models import Comment, CustomUser, Post, PostLike, PostRating
+from accounts.reaper import DEFAULT_CHUNK_SIZE, reap_pending
+
+SEED_BATCH_SIZE = 5000
+
+
+class WriteLockTimer:
+    """Time from the first write statement of a transaction to the end of the block: how long writers are blocked."""
+
+    def __init__(self):
+        self.first_write = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.first_write is None and sql.lstrip().upper().startswith(('DELETE', 'UPDATE', 'INSERT')):
+            self.first_write = time.perf_counter()
+        return execute(sql, params, many, context)
+
+
+def seed_popular_post(interactions):
+    """One published post with ``interactions`` likes, ratings, comments and replies (40/30/30 split)."""
+    likes, ratings = interactions * 4 // 10, interactions * 3 // 10
+    comments = interactions - likes - ratings
+    users = CustomUser.objects.bulk_create(
+        [CustomUser(username=f'user{i}', email=f'user{i}@example.com') for i in range(max(likes, ratings, 1))],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    post = Post.objects.create(title='Popular', content='Body', author=users[0], status='published')
+    PostLike.objects.bulk_create([PostLike(post=post, user=user) for user in users[:likes]], batch_size=SEED_BATCH_SIZE)
+    PostRating.objects.bulk_create(
+        [PostRating(post=post, user=user, rating=1 + i % 5) for i, user in enumerate(users[:ratings])],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    now = timezone.now()
+    top = Comment.objects.bulk_create(
+        [Comment(post=post, user=users[i % len(users)], content=f'Comment {i}', created_at=now) for i in range(comments * 2 // 3)],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    Comment.objects.bulk_create(
+        [Comment(post=post, user=users[i % len(users)], content=f'Reply {i}', created_at=now, parent_comment=top[i % len(top)])
+         for i in range(comments - len(top))],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    return post
+
+
+class Command(BaseCommand):
+    help = "Compare write-lock hold time of Django's cascade delete with soft delete plus the chunked reaper."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interactions', type=int, default=100_000, help='Likes, ratings and comments on the post.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per reaper transaction.')
+
+    def handle(self, *args, **options):
+        interactions = options['interactions']
+        with scratch_database(on_disk=True):
+            post = seed_popular_post(interactions)
+            lock = WriteLockTimer()
+            tracemalloc.start()
+            started = time.perf_counter()
+            with connection.execute_wrapper(lock):
+                post.delete()
+            ended = time.perf_counter()
+            cascade_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            cascade = {'total': ended - started, 'lock': ended - lock.first_write}
+
+        with scratch_database(on_disk=True):
+            post = seed_popular_post(interactions)
+            started = time.perf_counter()
+            post.soft_delete()
+            hide = time.perf_counter() - started
+            chunks = []
+            tracemalloc.start()
+            started = time.perf_counter()
+            reap_pending(chunk_size=options['chunk_size'], on_chunk=lambda model, rows, seconds: chunks.append(seconds))
+            reaper_total = time.perf_counter() - started
+            reaper_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self.stdout.write(f"Post with {interactions:,} interactions")
+        self.stdout.write(
+            f"CASCADE delete: {cascade['total']:.2f} s total, write lock held {cascade['lock'] * 1000:.0f} ms in one "
+            f"transaction, peak Python memory {cascade_peak / 2**20:.1f} MiB"
+        )
+        self.stdout.write(f"Soft delete: hidden in {hide * 1000:.1f} ms")
+        self.stdout.write(
+            f"Reaper: {len(chunks)} transactions of <= {options['chunk_size']} rows in {reaper_total:.2f} s; longest "
+            f"{max(chunks) * 1000:.1f} ms, median {sorted(chunks)[len(chunks) // 2] * 1000:.1f} ms, "
+            f"peak Python memory {reaper_peak / 2**20:.1f} MiB"
+        )
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from accounts import events
+from accounts.benchmarks import scratch_database, seed_blog
+from accounts.models import Post
+
+
+class Connection:
+    """One SSE client driven straight through the ASGI application, without sockets."""
+
+    def __init__(self, application, path):
+        self.application = application
+        self.path = path
+        self.chunks = 0
+        self.opened = asyncio.Event()
+        self.received = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self.requested = False
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.body' and message.get('body'):
+            self.chunks += 1
+            (self.opened if self.chunks == 1 else self.received).set()
+
+    def run(self):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': self.path, 'raw_path': self.path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        return asyncio.create_task(self.application(scope, self.receive, self.send))
+
+
+class Command(BaseCommand):
+    help = 'Hold many idle server-sent event streams in one worker and time fanning an event out to all of them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000, help='Concurrent idle streams to open.')
+        parser.add_argument('--memory-budget', type=int, default=512, help='MiB a worker may spend on streams.')
+
+    def handle(self, *args, **options):
+        count = options['connections']
+        with scratch_database(on_disk=True), override_settings(ALLOWED_HOSTS=['localhost'], EVENTS_KEEPALIVE=3600):
+            seed_blog(users=10, posts=1)
+            post_id = Post.objects.values_list('pk', flat=True).get()
+            Post.objects.filter(pk=post_id).update(status='published')
+            events.reset_broker()
+            results = asyncio.run(self.measure(get_asgi_application(), f'/posts/{post_id}/events/', post_id, count))
+            events.reset_broker()
+
+        per_connection = results['memory'] / count
+        capacity = options['memory_budget'] * 1024 * 1024 / per_connection
+        self.stdout.write(
+            f"{count} idle streams opened in {results['open']:.2f} s; "
+            f"{per_connection / 1024:.1f} KiB of Python heap each"
+        )
+        self.stdout.write(f"One event fanned out to all {count} streams in {results['fanout'] * 1000:.1f} ms")
+        self.stdout.write(f"Closed all streams in {results['close'] * 1000:.0f} ms")
+        self.stdout.write(
+            f"At {options['memory_budget']} MiB per worker: ~{capacity:,.0f} idle streams "
+            f"(file descriptors and the ASGI server's own buffers come on top)"
+        )
+
+    async def measure(self, application, path, post_id, count):
+        results = {}
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        connections = [Connection(application, path) for _ in range(count)]
+        tasks = [connection.run() for connection in connections]
+        await asyncio.gather(*(connection.opened.wait() for connection in connections))
+        results['open'] = time.perf_counter() - started
+        results['memory'] = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        assert events.get_broker().listener_count() == count
+
+        started = time.perf_counter()
+        await sync_to_async(events.get_broker().publish)(post_id, 'stats', {'likes_count': 1, 'average_rating': None})
+        await asyncio.gather(*(connection.received.wait() for connection in connections))
+        results['fanout'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for connection in connections:
+            connection.disconnect.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        results['close'] = time.perf_counter() - started
+        return results
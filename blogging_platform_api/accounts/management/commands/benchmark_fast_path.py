@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+from accounts.benchmarks import scratch_database, seed_blog, timer
+from accounts.fast_path import post_rows
+from accounts.models import Post
+from accounts.renderers import ORJSONRenderer
+from accounts.serializers import PostSerializer
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/s of PostSerializer + JSONRenderer against the fast read path + ORJSONRenderer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--pages', type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size, pages = options['page_size'], options['pages']
+        results, queries = {}, {}
+        with scratch_database():
+            seed_blog(
+                users=500, posts=options['posts'],
+                likes=options['posts'] * 5, ratings=options['posts'] * 2, comments=options['posts'] * 2,
+            )
+            post_ids = list(Post.objects.visible().order_by('-published_date').values_list('pk', flat=True))
+            page_ids = [post_ids[i * page_size:(i + 1) * page_size] for i in range(pages)]
+
+            queries['serializer'], queries['fast'] = QueryCounter(), QueryCounter()
+            with connection.execute_wrapper(queries['serializer']), timer(results, 'serializer'):
+                for ids in page_ids:
+                    JSONRenderer().render(PostSerializer(Post.objects.filter(pk__in=ids).order_by('-published_date'), many=True).data)
+            with connection.execute_wrapper(queries['fast']), timer(results, 'fast'):
+                for ids in page_ids:
+                    ORJSONRenderer().render(post_rows(ids, PostSerializer.Meta.fields))
+
+        rows = page_size * pages
+        for label, name in [('serializer', 'PostSerializer + JSONRenderer'), ('fast', 'fast path + ORJSONRenderer')]:
+            self.stdout.write(
+                f"{name:32} {rows / results[label]:>10,.0f} rows/s  "
+                f"({queries[label].count / pages:.0f} queries per {page_size}-row page)"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {results['serializer'] / results['fast']:.1f}x"))
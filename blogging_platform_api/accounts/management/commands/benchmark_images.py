@@ -0,0 +1,75 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from PIL import Image
+
+from accounts.benchmarks import scratch_database
+from accounts.images import VARIANTS, process_pending, store_upload
+from accounts.models import StoredImage
+
+
+def camera_photo(rng, size):
+    """A noisy gradient JPEG that compresses roughly like a phone photo."""
+    width, height = size
+    x, y = np.meshgrid(np.linspace(0, 1, width), np.linspace(0, 1, height))
+    channels = [np.sin(x * rng.uniform(2, 9) + y * rng.uniform(2, 9)) * 90 + 128 for _ in range(3)]
+    pixels = np.stack(channels, axis=-1) + rng.normal(0, 12, (height, width, 3))
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, 'JPEG', quality=92)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Report thumbnail sizes against the original upload and time rendering them serially and in a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=24)
+        parser.add_argument('--width', type=int, default=4000)
+        parser.add_argument('--height', type=int, default=3000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        uploads = [camera_photo(rng, (options['width'], options['height'])) for _ in range(options['images'])]
+        media = tempfile.mkdtemp()
+        results = {}
+        try:
+            with scratch_database(), override_settings(MEDIA_ROOT=media):
+                for data in uploads + uploads[:1]:  # The repeat is deduplicated
+                    store_upload(ContentFile(data, name='upload.jpg'))
+                stored = StoredImage.objects.count()
+                for label, workers in [('serial', None), ('pool', options['workers'])]:
+                    StoredImage.objects.update(processed_at=None, variants={})
+                    started = time.perf_counter()
+                    if workers is None:
+                        process_pending(batch_size=len(uploads))
+                    else:
+                        with ProcessPoolExecutor(max_workers=workers) as executor:
+                            process_pending(executor, batch_size=len(uploads))
+                    results[label] = time.perf_counter() - started
+                variant_bytes = {
+                    (size, image_format): sum(default_storage.size(image.variants[size][image_format]) for image in StoredImage.objects.all())
+                    for size in VARIANTS for image_format in ('webp', 'jpeg')
+                }
+        finally:
+            shutil.rmtree(media)
+
+        count = len(uploads)
+        original = sum(map(len, uploads)) / count
+        self.stdout.write(f"{count + 1} uploads of {options['width']}x{options['height']} JPEGs stored as {stored} images; original {original / 1024:.0f} KiB each")
+        for size, longest in VARIANTS.items():
+            webp, jpeg = variant_bytes[size, 'webp'] / count, variant_bytes[size, 'jpeg'] / count
+            self.stdout.write(f"  {size:<6} ({longest}px): WebP {webp / 1024:5.1f} KiB, JPEG {jpeg / 1024:5.1f} KiB ({original / webp:,.0f}x smaller than the original)")
+        self.stdout.write(
+            f"Rendering all variants: {results['serial'] / count * 1000:.0f} ms per image serially, "
+            f"{results['pool'] / count * 1000:.0f} ms per image with {options['workers']} worker processes"
+        )
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import numpy as np
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.shortcuts import get_object_or_404
+from django.test import override_settings
+
+from accounts import interactions
+from accounts.benchmarks import scratch_database, seed_blog
+from accounts.interactions import Interaction, submit_interaction
+from accounts.models import Post, PostLike, PostRating
+
+
+def legacy_interaction(interaction):
+    """The pre-upsert LikePostView/RatePostView logic, kept here as the baseline."""
+    post = get_object_or_404(Post, pk=interaction.post_id)
+    if interaction.action == interactions.LIKE:
+        PostLike.objects.get_or_create(post=post, user_id=interaction.user_id)
+    else:
+        rating, created = PostRating.objects.get_or_create(post=post, user_id=interaction.user_id, defaults={'rating': interaction.rating})
+        if not created:
+            rating.rating = interaction.rating
+            rating.save()
+
+
+class Command(BaseCommand):
+    help = 'Compare like/rate ingestion throughput (legacy, upsert, micro-batched) at several concurrency levels.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--actions', type=int, default=4000, help='Actions per run, split across clients.')
+        parser.add_argument('--window', type=float, default=0.002, help='Micro-batching window in seconds.')
+
+    def handle(self, *args, **options):
+        with scratch_database(on_disk=True):
+            user_ids, post_ids = seed_blog(users=2000, posts=2000)
+            modes = [
+                ('legacy', legacy_interaction, None),
+                ('upsert', submit_interaction, None),
+                ('micro-batched', submit_interaction, options['window']),
+            ]
+            for clients in options['clients']:
+                for name, apply, window in modes:
+                    PostLike.objects.all().delete()
+                    PostRating.objects.all().delete()
+                    with override_settings(INTERACTION_BATCH_WINDOW=window):
+                        elapsed = self._run(apply, clients, options['actions'], user_ids, post_ids)
+                    self.stdout.write(
+                        f"{clients:>3} clients  {name:<14} {options['actions'] / elapsed:>9,.0f} actions/s"
+                    )
+
+    def _run(self, apply, clients, total, user_ids, post_ids):
+        rng = np.random.default_rng(clients)
+        workload = [
+            Interaction(int(rng.choice(user_ids)), interactions.LIKE, int(rng.choice(post_ids)))
+            if i % 2 else
+            Interaction(int(rng.choice(user_ids)), interactions.RATE, int(rng.choice(post_ids)), int(rng.integers(1, 6)))
+            for i in range(total)
+        ]
+        shares = [workload[i::clients] for i in range(clients)]
+        errors = []
+
+        def client(actions):
+            try:
+                for action in actions:
+                    apply(action)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client, args=(share,)) for share in shares]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if errors:
+            raise errors[0]
+        return elapsed
@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from accounts.benchmarks import scratch_database, seed_blog, timer
+
+
+class Command(BaseCommand):
+    help = 'Time training and writing recommendations on a seeded scratch database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interactions', type=int, default=1_000_000, help='Total likes + ratings (split 2:1).')
+        parser.add_argument('--posts', type=int, default=20_000)
+        parser.add_argument('--users', type=int, default=50_000)
+
+    def handle(self, *args, **options):
+        interactions = options['interactions']
+        results = {}
+        output = StringIO()
+        with scratch_database():
+            with timer(results, 'seed'):
+                seed_blog(
+                    users=options['users'],
+                    posts=options['posts'],
+                    likes=interactions * 2 // 3,
+                    ratings=interactions - interactions * 2 // 3,
+                )
+            call_command('build_recommendations', stdout=output)
+
+        self.stdout.write(f"Seeded {interactions} interactions in {results['seed']:.1f}s")
+        self.stdout.write(output.getvalue().rstrip())
@@ -0,0 +1,85 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.benchmarks import long_form_body, scratch_database, seed_blog, timer
+from accounts.compression import storage_report
+from accounts.fields import compress_text
+from accounts.models import Post, PostRevision
+from accounts.revisions import DEFAULT_SNAPSHOT_INTERVAL, _pieces, rebuild
+
+
+def edit(rng, text):
+    """A typical small edit: reword, insert or delete one sentence."""
+    pieces = _pieces(text)
+    position = rng.randrange(len(pieces))
+    sentence = long_form_body(rng, 1)[3:-4].split('. ')[0] + '. '
+    action = rng.random()
+    if action < 0.6:
+        pieces[position] = sentence
+    elif action < 0.85 or len(pieces) < 2:
+        pieces.insert(position, sentence)
+    else:
+        del pieces[position]
+    return ''.join(pieces)
+
+
+class Command(BaseCommand):
+    help = 'Compare storage growth of delta revisions with full-copy versioning, and time rebuilding old versions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200)
+        parser.add_argument('--edits', type=int, default=50, help='Edits saved per post.')
+        parser.add_argument('--paragraphs', type=int, default=12, help='Paragraphs per post.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        results = {}
+        edits = options['edits']
+        with scratch_database():
+            seed_blog(users=20, posts=options['posts'])
+            posts = list(Post.objects.all())
+            full_raw = full_compressed = 0
+            with timer(results, 'save'):
+                for post in posts:
+                    post.content = long_form_body(rng, options['paragraphs'])
+                    for _ in range(edits + 1):
+                        post.save()
+                        full_raw += len(post.content.encode('utf-8'))
+                        full_compressed += len(compress_text(post.content))
+                        post.content = edit(rng, post.content)
+            # seed_blog bypasses signals, so each post's first revision is the save above
+            delta_raw, delta_compressed = storage_report(PostRevision, 'body')
+            revisions = PostRevision.objects.count()
+
+            chains = list(PostRevision.objects.values_list('post_id', 'number'))
+            sample = rng.sample(chains, min(1000, len(chains)))
+            started = time.perf_counter()
+            for post_id, number in sample:
+                rebuild(post_id, number)
+            average_rebuild = (time.perf_counter() - started) / len(sample)
+            # Revision n replays (n - 1) % interval deltas on top of its snapshot
+            interval = getattr(settings, 'REVISION_SNAPSHOT_INTERVAL', DEFAULT_SNAPSHOT_INTERVAL)
+            worst = max(range(1, edits + 2), key=lambda number: ((number - 1) % interval, number))
+            started = time.perf_counter()
+            rebuild(posts[0].pk, worst)
+            worst_rebuild = time.perf_counter() - started
+            vendor = connection.vendor
+
+        versions = len(posts) * (edits + 1)
+        self.stdout.write(f"{len(posts)} posts x {edits + 1} versions = {versions:,} revisions stored ({revisions:,}) on {vendor}")
+        self.stdout.write(
+            f"Full copies:           {full_raw / 2**20:8.1f} MiB raw, {full_compressed / 2**20:8.1f} MiB compressed "
+            f"({full_compressed / versions / 1024:.2f} KiB per edit)"
+        )
+        self.stdout.write(
+            f"Deltas with snapshots: {delta_raw / 2**20:8.1f} MiB raw, {delta_compressed / 2**20:8.1f} MiB compressed "
+            f"({delta_compressed / versions / 1024:.2f} KiB per edit, {full_compressed / delta_compressed:.1f}x smaller)"
+        )
+        self.stdout.write(
+            f"Rebuild: {average_rebuild * 1000:.2f} ms on average, {worst_rebuild * 1000:.2f} ms for revision {worst} "
+            f"({(worst - 1) % interval} deltas replayed); saving {results['save'] / versions * 1000:.2f} ms per edit"
+        )
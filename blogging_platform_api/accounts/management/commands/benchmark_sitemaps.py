@@ -0,0 +1,88 @@
+import os
+import resource
+import tempfile
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from accounts.benchmarks import SEED_BATCH_SIZE, scratch_database, seed_blog, timer
+from accounts.models import CustomUser, Post
+from accounts.sitemaps import DEFAULT_CHUNK_SIZE, build_sitemaps
+
+
+def seed_posts(posts, authors):
+    """
+    ``posts`` published posts spread over ``authors`` authors. On SQLite the
+    posts are generated by one INSERT ... SELECT, which takes seconds for
+    millions of rows where bulk_create takes many minutes.
+    """
+    if connection.vendor != 'sqlite':
+        seed_blog(users=authors, posts=posts)
+        return
+    CustomUser.objects.bulk_create(
+        (CustomUser(username=f'bench{i}', email=f'bench{i}@example.com', password='!') for i in range(authors)),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    first, last = CustomUser.objects.filter(username__startswith='bench').order_by('pk').values_list('pk', flat=True)[::max(authors - 1, 1)][:2]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        # Content is a raw CompressedTextField value: header byte 0x00, then 'Body'
+        cursor.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < %s)
+            INSERT INTO accounts_post (title, content, excerpt, author_id, category_id, published_date, created_at,
+                                       status, related_stale, trending_score, views, updated_at, deleted_at)
+            SELECT 'Benchmark post ' || i, X'00426F6479', 'Body', %s + i %% %s, NULL, %s, %s,
+                   'published', 0, 0, 0, %s, NULL
+            FROM n
+            """,
+            [posts, first, last - first + 1, now, now, now],
+        )
+
+
+def peak_rss():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Measure time and peak memory of a full sitemap build, a no-op rebuild and a one-post rebuild.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5_000_000)
+        parser.add_argument('--authors', type=int, default=100_000)
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows read per keyset query.')
+
+    def handle(self, *args, **options):
+        results = {}
+        chunk_size = options['chunk_size']
+        with scratch_database(on_disk=True), tempfile.TemporaryDirectory() as root, override_settings(SITEMAP_ROOT=root):
+            with timer(results, 'seed'):
+                seed_posts(options['posts'], options['authors'])
+            rss_before = peak_rss()
+            tracemalloc.start()
+            with timer(results, 'full'):
+                full = build_sitemaps(chunk_size=chunk_size)
+            python_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            rss_after = peak_rss()
+            size = sum(os.path.getsize(os.path.join(root, name)) for name in os.listdir(root))
+
+            with timer(results, 'unchanged'):
+                unchanged = build_sitemaps(chunk_size=chunk_size)
+            Post.objects.filter(pk=Post.objects.order_by('pk').values_list('pk', flat=True)[options['posts'] // 2]).update(
+                updated_at=timezone.now()
+            )
+            with timer(results, 'one'):
+                one = build_sitemaps(chunk_size=chunk_size)
+
+        self.stdout.write(f"Seeded {options['posts']:,} posts by {options['authors']:,} authors in {results['seed']:.1f}s")
+        self.stdout.write(
+            f"Full build: {full[0]} shards, {size / 2**20:.1f} MiB gzipped, in {results['full']:.1f}s; "
+            f"peak Python memory {python_peak / 2**20:.1f} MiB, peak RSS {rss_before:.0f} -> {rss_after:.0f} MiB"
+        )
+        self.stdout.write(f"No changes: {unchanged[0]} shards written in {results['unchanged']:.2f}s")
+        self.stdout.write(self.style.SUCCESS(f"One post changed: {one[0]} shards written in {results['one']:.2f}s"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from accounts.startup import FIRST_REQUEST_PATH, LAZY_MODULES, STARTUP_BUDGET_SECONDS, measure_startup
+
+
+class Command(BaseCommand):
+    help = 'Profile a cold start: import time per module and time to first response in a fresh interpreter.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts to measure; the fastest is reported.')
+        parser.add_argument('--top', type=int, default=20, help='Modules to list by self and cumulative import time.')
+        parser.add_argument('--path', default=FIRST_REQUEST_PATH, help='Path of the first request.')
+
+    def handle(self, *args, **options):
+        reports = [measure_startup(options['path']) for _ in range(options['runs'])]
+        best = min(reports, key=lambda report: report['total'])
+        imports = best['imports']
+        top = options['top']
+
+        self.stdout.write(f"Modules imported: {len(imports)}")
+        self.stdout.write(f"Top {top} by self time:")
+        for name, self_us, cumulative_us in sorted(imports, key=lambda item: item[1], reverse=True)[:top]:
+            self.stdout.write(f"  {self_us / 1000:7.1f} ms  {name}")
+        self.stdout.write(f"Top {top} by cumulative time:")
+        for name, self_us, cumulative_us in sorted(imports, key=lambda item: item[2], reverse=True)[:top]:
+            self.stdout.write(f"  {cumulative_us / 1000:7.1f} ms  {name}")
+
+        self.stdout.write(
+            f"Django setup {best['setup'] * 1000:.0f} ms, URLconf {best['urlconf'] * 1000:.0f} ms, "
+            f"first response ({options['path']} -> {best['status']}) {best['first_response'] * 1000:.0f} ms"
+        )
+        self.stdout.write(
+            f"Time to first response: {best['total'] * 1000:.0f} ms best, "
+            f"{max(report['total'] for report in reports) * 1000:.0f} ms worst of {len(reports)} "
+            f"(budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms)"
+        )
+        loaded = best['loaded_lazy_modules']
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"Loaded at boot but should be lazy: {', '.join(loaded)}"))
+        else:
+            self.stdout.write(f"Not loaded at boot: {', '.join(LAZY_MODULES)}")
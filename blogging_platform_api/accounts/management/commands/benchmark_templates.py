@@ -0,0 +1,79 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from accounts.benchmarks import scratch_database, seed_blog, timer
+from accounts.fast_path import post_rows
+from accounts.models import Category, Post, RelatedPost, Tag, taxonomy_version
+from accounts.serializers import PostSummarySerializer
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Time post_list.html and post_detail.html rendering with and without the template fragment cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200, help='Posts on the list page.')
+        parser.add_argument('--renders', type=int, default=20, help='Renders of each page per scenario.')
+
+    def handle(self, *args, **options):
+        renders = options['renders']
+        request = RequestFactory().get('/posts/')
+        request.user = AnonymousUser()
+        results, queries = {}, {}
+        with scratch_database():
+            seed_blog(users=100, posts=options['posts'], likes=options['posts'] * 5, ratings=options['posts'] * 2,
+                      comments=options['posts'] * 3)
+            post_ids = list(Post.objects.visible().order_by('-published_date').values_list('pk', flat=True))
+            list_posts = post_rows(post_ids, PostSummarySerializer.Meta.fields)
+            detail_posts = list(Post.objects.filter(pk__in=post_ids[:renders]))
+
+            def render_list():
+                render_to_string('post_list.html', {
+                    'posts': list_posts, 'categories': Category.objects.all(), 'tags': Tag.objects.all(),
+                    'taxonomy_version': taxonomy_version(),
+                }, request)
+
+            def render_details():
+                for post in detail_posts:
+                    render_to_string('post_detail.html', {
+                        'post': post, 'related_posts': RelatedPost.objects.filter(post=post),
+                    }, request)
+
+            scenarios = [('uncached', NO_CACHE), ('cached', None)]
+            for label, caches in scenarios:
+                with override_settings(CACHES=caches) if caches else override_settings():
+                    cache.clear()
+                    render_list()
+                    render_details()  # Warm up (fills the cache when enabled)
+                    for page, render in [('list', render_list), ('detail', render_details)]:
+                        counter = QueryCounter()
+                        with connection.execute_wrapper(counter), timer(results, (label, page)):
+                            for _ in range(renders if page == 'list' else 1):
+                                render()
+                        queries[(label, page)] = counter.count
+
+        per_list = {label: results[(label, 'list')] / renders * 1000 for label, _ in scenarios}
+        per_detail = {label: results[(label, 'detail')] / len(detail_posts) * 1000 for label, _ in scenarios}
+        self.stdout.write(
+            f"post_list.html ({len(list_posts)} posts): {per_list['uncached']:.1f} ms uncached, "
+            f"{per_list['cached']:.1f} ms cached ({per_list['uncached'] / per_list['cached']:.1f}x)"
+        )
+        self.stdout.write(
+            f"post_detail.html: {per_detail['uncached']:.2f} ms uncached "
+            f"({queries[('uncached', 'detail')] / len(detail_posts):.0f} queries), "
+            f"{per_detail['cached']:.2f} ms cached ({queries[('cached', 'detail')] / len(detail_posts):.0f} queries)"
+        )
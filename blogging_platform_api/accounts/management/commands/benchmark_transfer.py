@@ -0,0 +1,67 @@
+import os
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+
+from accounts.benchmarks import scratch_database, seed_blog, timer
+from accounts.transfer import DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, export_ndjson, import_lines
+
+
+@contextmanager
+def traced(peaks, label, enabled):
+    """Store the peak traced memory of the block under ``peaks[label]`` when ``enabled``."""
+    if not enabled:
+        yield
+        return
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        peaks[label] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = 'Export a seeded blog to NDJSON and import it into an empty database, reporting rows/s and peak memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20_000)
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--interactions', type=int, default=400_000, help='Likes + ratings + comments (split 2:1:1).')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--trace-memory', action='store_true', help='Also report peak Python memory (tracemalloc slows both steps down).')
+
+    def handle(self, *args, **options):
+        interactions = options['interactions']
+        trace = options['trace_memory']
+        results, peaks, sections = {}, {}, {}
+
+        def on_batch(kind, rows, seconds):
+            done, spent = sections.get(kind, (0, 0))
+            sections[kind] = (done + rows, spent + seconds)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.ndjson')
+            with scratch_database(on_disk=True):
+                seed_blog(
+                    users=options['users'], posts=options['posts'], likes=interactions // 2, ratings=interactions // 4,
+                    comments=interactions - interactions // 2 - interactions // 4,
+                )
+                with traced(peaks, 'export', trace), timer(results, 'export'), open(path, 'wb') as stream:
+                    for block in export_ndjson(chunk_size=options['chunk_size']):
+                        stream.write(block)
+            size = os.path.getsize(path)
+
+            with scratch_database(on_disk=True), open(path, 'rb') as stream:
+                with traced(peaks, 'import', trace), timer(results, 'import'):
+                    run = import_lines(stream, batch_size=options['batch_size'], on_batch=on_batch)
+
+        rows = run.rows_created + run.rows_skipped
+        self.stdout.write(f'{rows:,} rows, {size / 2**20:.1f} MiB of NDJSON')
+        for step in ('export', 'import'):
+            memory = f", peak Python memory {peaks[step] / 2**20:.1f} MiB" if trace else ''
+            self.stdout.write(self.style.SUCCESS(f"{step.capitalize()}: {results[step]:.1f}s, {rows / results[step]:,.0f} rows/s{memory}"))
+        self.stdout.write('Import by section: ' + ', '.join(f'{kind} {done / spent:,.0f} rows/s' for kind, (done, spent) in sections.items()))
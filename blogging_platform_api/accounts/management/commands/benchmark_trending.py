@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from accounts.benchmarks import scratch_database, seed_blog, timer
+from accounts.trending import recompute_trending_scores
+
+
+class Command(BaseCommand):
+    help = 'Time a full trending-score recompute on a seeded scratch database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interactions', type=int, default=1_000_000, help='Total likes + ratings + comments (split 2:1:1).')
+        parser.add_argument('--posts', type=int, default=20_000)
+        parser.add_argument('--users', type=int, default=50_000)
+
+    def handle(self, *args, **options):
+        interactions = options['interactions']
+        results = {}
+        with scratch_database():
+            with timer(results, 'seed'):
+                seed_blog(
+                    users=options['users'],
+                    posts=options['posts'],
+                    likes=interactions // 2,
+                    ratings=interactions // 4,
+                    comments=interactions - interactions // 2 - interactions // 4,
+                )
+            with timer(results, 'recompute'):
+                scored = recompute_trending_scores()
+
+        self.stdout.write(f"Seeded {interactions} interactions on {options['posts']} posts in {results['seed']:.1f}s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {scored} trending scores in {results['recompute']:.2f}s "
+            f"({interactions / results['recompute']:,.0f} interactions/s)"
+        ))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.feeds import all_scopes, regenerate
+
+
+class Command(BaseCommand):
+    help = 'Generate every Atom and RSS feed. Feeds are regenerated as posts change and built on first request otherwise; run this after a deploy or bulk import.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scopes = all_scopes()
+        stored = sum(regenerate(scope, scope_id) or 0 for scope, scope_id in scopes)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Checked {len(scopes)} feeds, stored {stored} changed documents in {elapsed:.2f}s.'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.related import DEFAULT_CHUNK_SIZE, DEFAULT_NEIGHBOURS, refresh_related_posts
+
+
+class Command(BaseCommand):
+    help = 'Precompute the related posts shown on post pages and served by posts/<pk>/related/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help=(
+            'Recompute every published post, not only changed ones and the posts listing them. Run it '
+            'periodically (e.g. nightly): it is the only pass that adds a changed post to lists it was not in.'
+        ))
+        parser.add_argument('--neighbours', type=int, default=DEFAULT_NEIGHBOURS, help='Number of related posts kept per post.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Posts compared per similarity batch.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        refreshed = refresh_related_posts(
+            full=options['full'],
+            k=options['neighbours'],
+            chunk_size=options['chunk_size'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Refreshed related posts for {refreshed} posts in {elapsed:.2f}s.'))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.sitemaps import DEFAULT_CHUNK_SIZE, build_sitemaps, sitemap_root
+
+
+class Command(BaseCommand):
+    help = 'Write the sitemap index and rewrite the sitemap shards whose posts changed. Run it from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows read per keyset query.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written, removed = build_sitemaps(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} and removed {removed} sitemap shards in {sitemap_root()} in {elapsed:.2f}s.'
+        ))
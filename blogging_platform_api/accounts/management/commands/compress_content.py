@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.compression import (
+    COMPRESSED_COLUMNS, DEFAULT_CHUNK_SIZE, DEFAULT_DICTIONARY_SIZE, DEFAULT_SAMPLE_SIZE, recompress, train_and_store,
+)
+
+
+class Command(BaseCommand):
+    help = 'Train a compression dictionary on current posts and comments and rewrite stored bodies with it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE, help='Bodies sampled for training.')
+        parser.add_argument('--dictionary-size', type=int, default=DEFAULT_DICTIONARY_SIZE, help='Dictionary size in bytes.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows rewritten per transaction.')
+        parser.add_argument('--no-recompress', action='store_true', help='Only train; existing rows keep their dictionary.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        dictionary = train_and_store(options['sample_size'], options['dictionary_size'])
+        self.stdout.write(f'Trained dictionary {dictionary.pk} ({len(dictionary.data)} bytes).')
+        if options['no_recompress']:
+            return
+        for model, field in COMPRESSED_COLUMNS:
+            rewritten = recompress(model, field, options['chunk_size'])
+            self.stdout.write(f'Recompressed {rewritten} {model._meta.verbose_name_plural}.')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Done in {elapsed:.2f}s.'))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.trending import DEFAULT_CHUNK_SIZE, DEFAULT_HALF_LIFE_HOURS, recompute_trending_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute the time-decayed trending score of every published post. Run periodically (e.g. every 15 minutes).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--half-life-hours', type=float, default=DEFAULT_HALF_LIFE_HOURS, help='Hours for a post\'s engagement weight to halve.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Interaction rows streamed per chunk.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scored = recompute_trending_scores(half_life_hours=options['half_life_hours'], chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} posts in {elapsed:.2f}s.'))
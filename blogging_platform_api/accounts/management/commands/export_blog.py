@@ -0,0 +1,36 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.transfer import DEFAULT_CHUNK_SIZE, export_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Write users, categories, tags, posts, comments, likes, ratings and subscriptions as NDJSON, for import_blog.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to write; gzipped if it ends in .gz, '-' for stdout.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows read per query.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.perf_counter()
+        lines = 0
+        if path == '-':
+            stream = sys.stdout.buffer
+        else:
+            stream = gzip.open(path, 'wb') if path.endswith('.gz') else open(path, 'wb')
+        try:
+            for block in export_ndjson(chunk_size=options['chunk_size']):
+                stream.write(block)
+                lines += block.count(b'\n')
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+        if path != '-':
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'Exported {lines - 2} rows to {path} in {elapsed:.2f}s ({(lines - 2) / elapsed:,.0f} rows/s).'
+            ))
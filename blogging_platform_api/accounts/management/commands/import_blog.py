@@ -0,0 +1,35 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.transfer import DEFAULT_BATCH_SIZE, import_lines
+
+
+class Command(BaseCommand):
+    help = 'Import an export_blog file. Run it again with the same file to resume an import that stopped part-way.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Export to read; gunzipped if it ends in .gz, '-' for stdin.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per transaction.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.perf_counter()
+        if path == '-':
+            stream = sys.stdin.buffer
+        else:
+            stream = gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+        try:
+            run = import_lines(stream, batch_size=options['batch_size'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Import {run.export_id} finished: {run.rows_created} rows created, {run.rows_skipped} skipped, '
+            f'in {elapsed:.2f}s. Run build_feeds, build_sitemaps and build_related_posts to catch up.'
+        ))
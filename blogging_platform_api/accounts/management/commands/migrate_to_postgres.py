@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.dbcopy import DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, catch_up, copy_all, tables, verify
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the accounts tables to another database (PostgreSQL: DATABASES["postgres"]), then verify them. '
+        'Create its schema first with "migrate --database=<target>"; run again with --catch-up until the '
+        'cut-over, and once more with writes stopped. Then run "rebuild_search_index --database=<target>".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', required=True, help='DATABASES alias to copy to.')
+        parser.add_argument('--source', default='default', help='DATABASES alias to copy from.')
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Tables loaded at once (PostgreSQL only).')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows read per query.')
+        parser.add_argument('--catch-up', action='store_true', help='Apply what changed in the source since the last pass.')
+        parser.add_argument('--no-verify', action='store_true', help='Skip comparing row counts and checksums.')
+
+    def handle(self, *args, **options):
+        source, target, chunk_size = options['source'], options['target'], options['chunk_size']
+        if source == target:
+            raise CommandError('--source and --target are the same database.')
+
+        started = time.perf_counter()
+        last = [started]
+
+        def report(table, *counts):
+            now = time.perf_counter()
+            elapsed, last[0] = now - last[0], now
+            if options['catch_up']:
+                self.stdout.write(f'{table}: {counts[0]} rows written, {counts[1]} deleted in {elapsed:.2f}s')
+            else:
+                self.stdout.write(f'{table}: {counts[0]} rows in {elapsed:.2f}s ({counts[0] / max(elapsed, 1e-9):,.0f} rows/s)')
+
+        try:
+            if options['catch_up']:
+                catch_up(source, target, chunk_size=chunk_size, on_table=report)
+            else:
+                copy_all(source, target, workers=options['workers'], chunk_size=chunk_size, on_table=report)
+        except ValueError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f'Copied {source} to {target} in {time.perf_counter() - started:.2f}s.'))
+
+        if options['no_verify']:
+            return
+        mismatched = []
+        for table in tables():
+            (source_rows, source_sum), (target_rows, target_sum) = verify(source, target, table, chunk_size)
+            if (source_rows, source_sum) != (target_rows, target_sum):
+                mismatched.append(f'{table} ({source_rows} rows in {source}, {target_rows} in {target})')
+        if mismatched:
+            raise CommandError('Tables differ: ' + ', '.join(mismatched) + '. Run again with --catch-up.')
+        self.stdout.write(self.style.SUCCESS('Row counts and checksums match.'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.images import DEFAULT_BATCH_SIZE, DEFAULT_INTERVAL, adopt_existing_pictures, run_image_worker
+
+
+class Command(BaseCommand):
+    help = 'Render WebP and JPEG thumbnails of uploaded profile pictures in a process pool. Runs as a worker unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the current backlog once and exit (for cron).')
+        parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between checks when running as a worker.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Images handed to the pool at a time.')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU).')
+        parser.add_argument('--adopt', action='store_true', help='First move pictures uploaded before content-addressed storage into it.')
+
+    def handle(self, *args, **options):
+        if options['adopt']:
+            self.stdout.write(f'Adopted {adopt_existing_pictures()} existing profile picture(s).')
+        if options['once']:
+            run_image_worker(batch_size=options['batch_size'], workers=options['workers'], iterations=1)
+            self.stdout.write(self.style.SUCCESS('Thumbnail backlog processed.'))
+            return
+        self.stdout.write(f"Rendering thumbnails every {options['interval']}s; press Ctrl+C to stop.")
+        run_image_worker(interval=options['interval'], batch_size=options['batch_size'], workers=options['workers'])
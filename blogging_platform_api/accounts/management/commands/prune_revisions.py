@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.revisions import prune_revisions, revisions_to_prune
+
+
+class Command(BaseCommand):
+    help = 'Delete old post revisions, keeping the newest --keep-last of each post and any younger than --days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-last', type=int, default=50, help='Revisions always kept per post.')
+        parser.add_argument('--days', type=int, default=90, help='Revisions younger than this are always kept.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be pruned without deleting.')
+
+    def handle(self, *args, **options):
+        if options['keep_last'] < 1:
+            self.stderr.write('--keep-last must be at least 1.')
+            return
+        older_than = timezone.now() - timedelta(days=options['days'])
+        posts = deleted = 0
+        # Materialise the plan first: pruning changes the revisions it was computed from
+        for post_id, keep_from in list(revisions_to_prune(options['keep_last'], older_than)):
+            posts += 1
+            if options['dry_run']:
+                self.stdout.write(f"Post {post_id}: would delete revisions before {keep_from}")
+            else:
+                deleted += prune_revisions(post_id, keep_from)
+        if options['dry_run']:
+            self.stdout.write(f"{posts} post(s) have revisions to prune.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} revision(s) from {posts} post(s)."))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from accounts.search import DEFAULT_CHUNK_SIZE, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Reindex every post body for search. Saved posts are indexed as they change; run this after copying the '
+        'database (e.g. migrate_to_postgres) and now and then on SQLite to drop entries superseded by edits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='DATABASES alias to reindex.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Posts read per query.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        indexed = rebuild(using=options['database'], chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} posts in {elapsed:.2f}s.'))
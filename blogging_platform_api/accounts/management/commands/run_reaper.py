@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import DeletionJob
+from accounts.reaper import DEFAULT_CHUNK_SIZE, DEFAULT_INTERVAL, reap_pending, run_reaper
+
+
+class Command(BaseCommand):
+    help = 'Delete the rows of soft-deleted posts and users in small chunks. Runs as a worker unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Finish pending deletions once and exit (for cron).')
+        parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between checks when running as a worker.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows deleted per transaction.')
+        parser.add_argument('--status', action='store_true', help='List unfinished deletion jobs and their progress, then exit.')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            pending = DeletionJob.objects.filter(finished_at__isnull=True).order_by('requested_at')
+            for job in pending:
+                started = f"started {job.started_at:%Y-%m-%d %H:%M:%S}" if job.started_at else 'waiting'
+                error = f"; last error: {job.last_error}" if job.last_error else ''
+                self.stdout.write(
+                    f"{job.kind} {job.object_id}: {started}, {job.rows_deleted} rows in {job.chunks} chunks{error}"
+                )
+            self.stdout.write(f"{len(pending)} deletion job(s) pending.")
+            return
+        if options['once']:
+            finished = reap_pending(chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Finished {finished} deletion job(s).'))
+            return
+        self.stdout.write(f"Reaping soft-deleted posts and users every {options['interval']}s; press Ctrl+C to stop.")
+        run_reaper(interval=options['interval'], chunk_size=options['chunk_size'])
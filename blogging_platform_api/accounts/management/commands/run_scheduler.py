@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from accounts.scheduler import DEFAULT_BATCH_SIZE, DEFAULT_INTERVAL, publish_due_posts, run_scheduler
+
+
+class Command(BaseCommand):
+    help = 'Publish scheduled posts whose published_date has passed. Runs as a worker unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Publish due posts once and exit (for cron).')
+        parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between checks when running as a worker.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Posts published per transaction.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            published = publish_due_posts(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Published {published} scheduled post(s).'))
+            return
+        self.stdout.write(f"Publishing scheduled posts every {options['interval']}s; press Ctrl+C to stop.")
+        run_scheduler(interval=options['interval'], batch_size=options['batch_size'])
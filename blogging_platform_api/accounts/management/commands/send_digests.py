@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from accounts.digests import DEFAULT_BATCH_SIZE, DEFAULT_INTERVAL, PERIODS, run_digests, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Email hourly and daily subscription digests that are due. Runs as a worker unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send due digests once and exit (for cron).')
+        parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between checks when running as a worker.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Users per query and per SMTP connection.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            for delivery in PERIODS:
+                sent = send_digests(delivery, batch_size=options['batch_size'])
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent} {delivery} digest(s).'))
+            return
+        self.stdout.write(f"Sending due digests every {options['interval']}s; press Ctrl+C to stop.")
+        run_digests(interval=options['interval'], batch_size=options['batch_size'])
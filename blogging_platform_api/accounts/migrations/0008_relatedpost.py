@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-19 11:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_alter_postrating_unique_together_postlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='related_stale',
+            field=models.BooleanField(db_index=True, default=True),
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_posts', to='accounts.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.post')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'unique_together': {('post', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-19 11:33
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_future_posts(apps, schema_editor):
+    # Future-dated posts were previously visible early; hand them to the scheduler
+    Post = apps.get_model('accounts', 'Post')
+    Post.objects.filter(status='published', published_date__gt=timezone.now()).update(status='scheduled')
+
+
+def unschedule_posts(apps, schema_editor):
+    Post = apps.get_model('accounts', 'Post')
+    Post.objects.filter(status='scheduled').update(status='published')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('scheduled', 'Scheduled'), ('published', 'Published')], default='draft', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'published_date'], name='post_status_published_idx'),
+        ),
+        migrations.RunPython(schedule_future_posts, unschedule_posts),
+    ]
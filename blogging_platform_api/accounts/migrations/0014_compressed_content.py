@@ -0,0 +1,117 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:05
+
+import accounts.fields
+from django.db import migrations, models, transaction
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+CHUNK_SIZE = 1000
+
+
+def make_excerpt(content, length=280):
+    # Copied from accounts.models as it was when this migration was written
+    return Truncator(' '.join(strip_tags(content or '').split())).chars(length)
+
+
+def _copy_column(model, source, target, excerpt=False):
+    # Walk the table by primary key so only one chunk of bodies is in memory at a time
+    last_pk = 0
+    while True:
+        rows = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', source)[:CHUNK_SIZE])
+        if not rows:
+            return
+        objs = [model(pk=pk, **{target: text or ''}) for pk, text in rows]
+        fields = [target]
+        if excerpt:
+            for obj in objs:
+                obj.excerpt = make_excerpt(getattr(obj, target))
+            fields.append('excerpt')
+        # The migration isn't atomic, so each chunk commits on its own instead of the
+        # whole copy holding one write transaction open
+        with transaction.atomic():
+            model.objects.bulk_update(objs, fields)
+        last_pk = rows[-1][0]
+
+
+def compress_content(apps, schema_editor):
+    _copy_column(apps.get_model('accounts', 'Post'), 'content', 'content_compressed', excerpt=True)
+    _copy_column(apps.get_model('accounts', 'Comment'), 'content', 'content_compressed')
+
+
+def decompress_content(apps, schema_editor):
+    _copy_column(apps.get_model('accounts', 'Post'), 'content_compressed', 'content')
+    _copy_column(apps.get_model('accounts', 'Comment'), 'content_compressed', 'content')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0013_scheduled_publishing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompressionDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=280),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='content_compressed',
+            field=accounts.fields.CompressedTextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='content_compressed',
+            field=accounts.fields.CompressedTextField(null=True),
+        ),
+        migrations.RunPython(compress_content, decompress_content),
+        # blank=True changes no schema, but lets a rollback re-add the columns with '' for existing rows
+        migrations.AlterField(
+            model_name='post',
+            name='content',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='content',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='content',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='content',
+        ),
+        migrations.RenameField(
+            model_name='post',
+            old_name='content_compressed',
+            new_name='content',
+        ),
+        migrations.RenameField(
+            model_name='comment',
+            old_name='content_compressed',
+            new_name='content',
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='content',
+            field=accounts.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='content',
+            field=accounts.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:05
+
+import accounts.fields
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def snapshot_existing_posts(apps, schema_editor):
+    # Every post starts its history with a snapshot of its current version. Copying the
+    # stored (already compressed) content in SQL avoids a round trip through Python.
+    Post = apps.get_model('accounts', 'Post')
+    PostRevision = apps.get_model('accounts', 'PostRevision')
+    quote = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(PostRevision._meta.db_table)} (post_id, number, title, is_snapshot, body, created_at) "
+            f"SELECT id, 1, title, %s, content, updated_at FROM {quote(Post._meta.db_table)}",
+            [True],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('body', accounts.fields.CompressedTextField(editable=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='accounts.post')),
+            ],
+            options={
+                'ordering': ['number'],
+                'unique_together': {('post', 'number')},
+            },
+        ),
+        migrations.RunPython(snapshot_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_post_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='delivery',
+            field=models.CharField(choices=[('immediate', 'One email per post'), ('hourly', 'Hourly digest'), ('daily', 'Daily digest')], default='immediate', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='DigestEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivery', models.CharField(choices=[('immediate', 'One email per post'), ('hourly', 'Hourly digest'), ('daily', 'Daily digest')], max_length=10)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['delivery', 'user', 'id'], name='digest_entry_pending_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DigestMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivery', models.CharField(choices=[('immediate', 'One email per post'), ('hourly', 'Hourly digest'), ('daily', 'Daily digest')], max_length=10)),
+                ('sent_through', models.PositiveBigIntegerField(default=0)),
+                ('sent_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'delivery')},
+            },
+        ),
+    ]
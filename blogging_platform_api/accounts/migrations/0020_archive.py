@@ -0,0 +1,64 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:28
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def count_existing_posts(apps, schema_editor):
+    # Same grouping as accounts.archive.rebuild(), against the historical models
+    Post = apps.get_model('accounts', 'Post')
+    ArchiveMonth = apps.get_model('accounts', 'ArchiveMonth')
+    rows = Post.objects.filter(status='published', deleted_at__isnull=True).order_by().annotate(
+        month_start=TruncMonth('published_date')
+    ).values_list('month_start', 'category_id', 'author_id').annotate(posts=Count('pk'))
+    counts = Counter()
+    for month_start, category_id, author_id, posts in rows:
+        counts['all', 0, month_start.year, month_start.month] += posts
+        if category_id is not None:
+            counts['category', category_id, month_start.year, month_start.month] += posts
+        counts['author', author_id, month_start.year, month_start.month] += posts
+    ArchiveMonth.objects.bulk_create(
+        [ArchiveMonth(scope=scope, scope_id=scope_id, year=year, month=month, posts=posts)
+         for (scope, scope_id, year, month), posts in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_stored_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'All posts'), ('category', 'Category'), ('author', 'Author')], max_length=10)),
+                ('scope_id', models.PositiveBigIntegerField(default=0)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('posts', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', 'published_date'], name='post_category_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'published_date'], name='post_author_published_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivemonth',
+            unique_together={('scope', 'scope_id', 'year', 'month')},
+        ),
+        migrations.RunPython(count_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Feed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'All posts'), ('author', 'Author'), ('category', 'Category'), ('tag', 'Tag')], max_length=10)),
+                ('scope_id', models.PositiveBigIntegerField(default=0)),
+                ('format', models.CharField(choices=[('atom', 'Atom'), ('rss', 'RSS')], max_length=4)),
+                ('body', models.BinaryField()),
+                ('etag', models.CharField(max_length=64)),
+                ('last_modified', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('scope', 'scope_id', 'format')},
+            },
+        ),
+    ]
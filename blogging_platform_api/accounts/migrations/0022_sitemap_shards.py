@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_feeds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=20)),
+                ('number', models.PositiveIntegerField()),
+                ('fingerprint', models.CharField(max_length=200)),
+                ('urls', models.PositiveIntegerField(default=0)),
+                ('lastmod', models.DateTimeField()),
+                ('generated_at', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('section', 'number')},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:02
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+CHUNK_SIZE = 1000
+
+
+def _plain_text(value):
+    # Copied from accounts.fields.plain_text as it was when this migration was written
+    return ' '.join(strip_tags(value or '').split())
+
+
+def _fill(model):
+    # Walk the table by primary key so only one chunk of bodies is in memory at a time
+    last_pk = 0
+    while True:
+        rows = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'content')[:CHUNK_SIZE])
+        if not rows:
+            return
+        model.objects.bulk_update([model(pk=pk, search_text=_plain_text(text)) for pk, text in rows], ['search_text'])
+        last_pk = rows[-1][0]
+
+
+def fill_search_text(apps, schema_editor):
+    _fill(apps.get_model('accounts', 'Post'))
+    _fill(apps.get_model('accounts', 'Comment'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_imports'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:10
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+CHUNK_SIZE = 1000
+
+# Tables as accounts.search expects them when this migration was written
+POSTGRES_TABLES = [
+    "CREATE TABLE accounts_post_search ("
+    " post_id bigint NOT NULL PRIMARY KEY REFERENCES accounts_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,"
+    " document tsvector NOT NULL)",
+    "CREATE INDEX accounts_post_search_document ON accounts_post_search USING gin (document)",
+]
+SQLITE_TABLES = [
+    "CREATE VIRTUAL TABLE accounts_post_fts USING fts5(body, content='')",
+    "CREATE TABLE accounts_post_search ("
+    " post_id integer NOT NULL PRIMARY KEY REFERENCES accounts_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,"
+    " doc_id integer NOT NULL UNIQUE)",
+]
+
+
+def _plain_text(value):
+    # Copied from accounts.fields.plain_text as it was when this migration was written
+    return ' '.join(strip_tags(value or '').split())
+
+
+def _chunks(model, column):
+    # Walk the table by primary key so only one chunk of bodies is in memory at a time
+    last_pk = 0
+    while True:
+        rows = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', column)[:CHUNK_SIZE])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def create_index(apps, schema_editor):
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    for sql in POSTGRES_TABLES if postgres else SQLITE_TABLES:
+        schema_editor.execute(sql)
+    # search_text already holds the plain text of every body, so nothing is decompressed
+    with schema_editor.connection.cursor() as cursor:
+        for rows in _chunks(apps.get_model('accounts', 'Post'), 'search_text'):
+            for post_id, text in rows:
+                if postgres:
+                    cursor.execute(
+                        "INSERT INTO accounts_post_search (post_id, document) VALUES (%s, to_tsvector('simple', %s))",
+                        [post_id, text],
+                    )
+                else:
+                    cursor.execute("INSERT INTO accounts_post_fts (body) VALUES (%s)", [text])
+                    cursor.execute("INSERT INTO accounts_post_search (post_id, doc_id) VALUES (%s, %s)", [post_id, cursor.lastrowid])
+
+
+def drop_index(apps, schema_editor):
+    # Runs after the search_text columns are back: refill them, as search reads them again
+    for model_name in ('Post', 'Comment'):
+        model = apps.get_model('accounts', model_name)
+        for rows in _chunks(model, 'content'):
+            model.objects.bulk_update([model(pk=pk, search_text=_plain_text(text)) for pk, text in rows], ['search_text'])
+    schema_editor.execute("DROP TABLE accounts_post_search")
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute("DROP TABLE accounts_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0025_comment_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+        migrations.RemoveField(
+            model_name='comment',
+            name='search_text',
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='search_text',
+        ),
+    ]
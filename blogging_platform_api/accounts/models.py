@@ -1,20 +1,61 @@
+import time
+
 from django.contrib.auth.models import AbstractUser, User
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, m2m_changed
 from django.dispatch import receiver
 from django.db.models import Avg, Count
 from django.urls import reverse
+from django.db import transaction
+from django.core.cache import cache
+from django.utils.text import Truncator
+from .fields import CompressedTextField, plain_text
+from .signals import post_published, post_stats_changed
+
+EXCERPT_LENGTH = 280
+TAXONOMY_VERSION_KEY = 'taxonomy-version'
+POSTS_VERSION_KEY = 'posts-version'
 
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)  # Soft-deleted; accounts.reaper removes the rows
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
     def __str__(self):
         return self.email
 
+    def soft_delete(self):
+        """
+        Deactivate the user and hide their posts, comments, likes and ratings
+        at once; their rows are deleted in the background by the reaper
+        (accounts.reaper).
+        """
+        from .archive import adjust, archived  # Both import this module
+        from .feeds import regenerate_later, scopes_of
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Their comments, likes and ratings on other people's posts disappear with them
+            activity = {
+                post_id for model in (Comment, PostLike, PostRating)
+                for post_id in model.all_objects.filter(user=self).values_list('post_id', flat=True).distinct()
+            }
+            CustomUser.objects.filter(pk=self.pk).update(is_active=False, deleted_at=now)
+            # The update below sends no signals
+            listed = archived(Post.objects.filter(author=self))
+            adjust(listed, -1)
+            regenerate_later(scopes_of(listed))
+            Post.objects.filter(author=self).update(deleted_at=now)
+            DeletionJob.objects.create(kind=DeletionJob.USER, object_id=self.pk)
+        bump_posts_version()
+        if activity:
+            touch_posts(activity)
+            post_stats_changed.send(sender=CustomUser, post_ids=activity)
+        self.is_active, self.deleted_at = False, now
+
 User = get_user_model()
 
 class Category(models.Model):
@@ -24,9 +65,37 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class CompressionDictionary(models.Model):
+    """Preset zlib dictionary trained on our posts and comments by the compress_content command."""
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Dictionary {self.pk} ({len(self.data)} bytes)"
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    """Plain-text teaser of a post body, stored so list pages never need the full content."""
+    return Truncator(plain_text(content)).chars(length)
+
+
+class PostQuerySet(models.QuerySet):
+    def visible(self, now=None):
+        """Published posts whose published_date has passed. Served by the (status, published_date) index."""
+        return self.filter(status='published', published_date__lte=now or timezone.now())
+
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
+    """Default manager: soft-deleted posts are left out of every query."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Post(models.Model):
     title = models.CharField(max_length=255)
-    content = models.TextField()
+    content = CompressedTextField()
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)  # Kept in sync by save()
     author = models.ForeignKey(User,  related_name='authored_posts', on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     tags = models.ManyToManyField('Tag', blank=True)
@@ -34,11 +103,75 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     likes = models.ManyToManyField(User, related_name='liked_posts', blank=True)
     ratings = models.ManyToManyField(User, related_name='rated_posts', through='PostRating')
-    status = models.CharField(max_length=10, choices=[('draft', 'Draft'), ('published', 'Published')], default='draft')
+    status = models.CharField(max_length=10, choices=[('draft', 'Draft'), ('scheduled', 'Scheduled'), ('published', 'Published')], default='draft')
+    related_stale = models.BooleanField(default=True, db_index=True)  # Neighbours need recomputing
+    trending_score = models.FloatField(default=0)  # Written by the compute_trending command
+    views = models.PositiveIntegerField(default=0)  # Flushed periodically from accounts.view_counts
+    updated_at = models.DateTimeField(auto_now=True)  # Also bumped by touch_posts; versions the template fragment cache
+    deleted_at = models.DateTimeField(null=True, blank=True)  # Soft-deleted; accounts.reaper removes the rows
+
+    objects = PostManager()
+    all_objects = PostQuerySet.as_manager()  # Including soft-deleted posts
+
+    # Only ever changed by queryset updates (view flushes, soft_delete(), compute_trending,
+    # the related-posts flag), so save() leaves them out on existing rows
+    DB_MANAGED_FIELDS = {'views', 'deleted_at', 'trending_score', 'related_stale'}
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-trending_score'], name='post_status_trending_idx'),
+            models.Index(fields=['status', 'published_date'], name='post_status_published_idx'),
+            # Date ranges within a category's or an author's posts
+            models.Index(fields=['category', 'published_date'], name='post_category_published_idx'),
+            models.Index(fields=['author', 'published_date'], name='post_author_published_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Future-dated posts wait for run_scheduler to publish them
+        if self.status == 'published' and self.published_date > timezone.now():
+            self.status = 'scheduled'
+        self.excerpt = make_excerpt(self.content)
+        became_published = self.status == 'published' and getattr(self, '_loaded_status', None) != 'published'
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # Writing back the values loaded with the instance would undo changes made since
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DB_MANAGED_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        if became_published:
+            transaction.on_commit(lambda: post_published.send_robust(sender=Post, post=self))
     
+    def soft_delete(self):
+        """
+        Hide the post from every query at once; its comments, likes, ratings
+        and other rows are deleted in the background by the reaper (accounts.reaper).
+        """
+        from .archive import adjust, archived  # Both import this module
+        from .feeds import regenerate_later, scopes_of
+
+        now = timezone.now()
+        with transaction.atomic():
+            # The update below sends no signals
+            listed = archived(Post.all_objects.filter(pk=self.pk))
+            adjust(listed, -1)
+            regenerate_later(scopes_of(listed))
+            Post.all_objects.filter(pk=self.pk).update(deleted_at=now)
+            DeletionJob.objects.create(kind=DeletionJob.POST, object_id=self.pk)
+        bump_posts_version()
+        self.deleted_at = now
+
     def get_absolute_url(self):
         return reverse('accounts:post-retrieve-update-destroy', args=[str(self.id)])
     
@@ -57,13 +190,26 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
     
+class ActivityManager(models.Manager):
+    """
+    Default manager of comments, likes and ratings: rows on soft-deleted posts
+    or by soft-deleted users are left out until the reaper removes them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(post__deleted_at__isnull=True, user__deleted_at__isnull=True)
+
+
 class Comment(models.Model):
     user = models.ForeignKey(User, related_name='comments', on_delete=models.CASCADE)
     post = models.ForeignKey(Post, related_name='comments', on_delete=models.CASCADE)
-    content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    content = CompressedTextField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     parent_comment = models.ForeignKey('self', null=True, blank=True, related_name='replies', on_delete=models.CASCADE)
 
+    objects = ActivityManager()
+    all_objects = models.Manager()  # Including rows hidden by a soft delete
+
     def __str__(self):
         return f"Comment by {self.user.username} on {self.post.title}"
 
@@ -72,6 +218,10 @@ class PostRating(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     rating = models.PositiveIntegerField(choices=[(1, '1 Star'), (2, '2 Stars'), (3, '3 Stars'), (4, '4 Stars'), (5, '5 Stars')])
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = ActivityManager()
+    all_objects = models.Manager()
 
     class Meta:
         unique_together = ('post', 'user')  # Ensure users can't rate the same post multiple times
@@ -79,15 +229,38 @@ class PostRating(models.Model):
 class PostLike(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = ActivityManager()
+    all_objects = models.Manager()
 
     class Meta:
         unique_together = ('post', 'user')  # Ensure users can't like the same post multiple times
 
+class StoredImage(models.Model):
+    """
+    An uploaded image stored once under its SHA-256 (accounts.images), with
+    the thumbnails the process_images worker generated for it.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    original = models.CharField(max_length=255)  # Storage name of the untouched upload
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    variants = models.JSONField(default=dict, blank=True)  # {"small": {"webp": name, "jpeg": name}, ...}
+    created_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.sha256[:12]
+
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True) 
 
-    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True)
+    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True)  # The original; shared by identical uploads
+    picture = models.ForeignKey(StoredImage, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
@@ -107,10 +280,15 @@ def save_profile(sender, instance, **kwargs):
 
 
 class Subscription(models.Model):
+    IMMEDIATE, HOURLY, DAILY = 'immediate', 'hourly', 'daily'
+    DELIVERY_CHOICES = [(IMMEDIATE, 'One email per post'), (HOURLY, 'Hourly digest'), (DAILY, 'Daily digest')]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     # Choose either author or category
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='subscribers', blank=True, null=True)
     category = models.ForeignKey('accounts.Category', on_delete=models.CASCADE, related_name='subscribers', blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    delivery = models.CharField(max_length=10, choices=DELIVERY_CHOICES, default=IMMEDIATE)
 
     class Meta:
         unique_together = (('user', 'author'), ('user', 'category'))  # Prevent duplicate subscriptions
@@ -119,4 +297,289 @@ class Subscription(models.Model):
         if self.author:
             return f"{self.user.username} subscribed to {self.author.username}"
         else:
-            return f"{self.user.username} subscribed to category {self.category.name}"
\ No newline at end of file
+            return f"{self.user.username} subscribed to category {self.category.name}"
+
+
+class RelatedPost(models.Model):
+    """Precomputed nearest neighbour of a post, written by the build_related_posts command."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_posts')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('post', 'rank')  # Also the index used to serve a post's neighbours
+        ordering = ['rank']
+
+    def __str__(self):
+        return f"{self.related.title} related to {self.post.title}"
+
+
+class Recommendation(models.Model):
+    """Precomputed "for you" post, written by the build_recommendations command."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='recommendations')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('user', 'rank')  # Also the index used to serve a user's recommendations
+        ordering = ['rank']
+
+    def __str__(self):
+        return f"{self.post.title} recommended to {self.user.username}"
+
+
+class PostDailyStats(models.Model):
+    """Per-post, per-day event counts maintained by the aggregate_analytics command."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    likes = models.PositiveIntegerField(default=0)
+    ratings = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)  # Sum of stars, for averages over any range
+    comments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('post', 'day')
+        indexes = [models.Index(fields=['day'], name='postdailystats_day_idx')]
+
+
+class AuthorDailyStats(models.Model):
+    """Per-author, per-day event counts across all of the author's posts."""
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    likes = models.PositiveIntegerField(default=0)
+    ratings = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    new_subscribers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('author', 'day')
+        indexes = [models.Index(fields=['day'], name='authordailystats_day_idx')]
+
+
+class AnalyticsCheckpoint(models.Model):
+    """High-water mark of the last aggregate_analytics run."""
+    name = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.processed_until}"
+
+
+class ArchiveMonth(models.Model):
+    """
+    Published posts in one calendar month, site-wide or within one category or
+    one author's posts. Kept up to date incrementally by accounts.archive.
+    """
+    ALL = 'all'
+    CATEGORY = 'category'
+    AUTHOR = 'author'
+    SCOPE_CHOICES = [(ALL, 'All posts'), (CATEGORY, 'Category'), (AUTHOR, 'Author')]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    scope_id = models.PositiveBigIntegerField(default=0)  # Category or author id; 0 for ALL
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    posts = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('scope', 'scope_id', 'year', 'month')  # Also serves the newest-first archive listing
+        ordering = ['-year', '-month']
+
+    def __str__(self):
+        return f"{self.scope} {self.scope_id} {self.year}-{self.month:02}: {self.posts}"
+
+    def get_absolute_url(self):
+        """The month's posts, in the list this count is for."""
+        if self.scope == self.CATEGORY:
+            url = reverse('accounts:posts-by-category', args=[self.scope_id])
+        elif self.scope == self.AUTHOR:
+            url = reverse('accounts:posts-by-author', args=[self.scope_id])
+        else:
+            url = reverse('accounts:post-list-create')
+        return f'{url}?published_date={self.year}-{self.month:02}'
+
+
+class Feed(models.Model):
+    """
+    A ready-to-serve Atom or RSS feed of the newest posts, site-wide or of one
+    author, category or tag. Regenerated by accounts.feeds as posts change.
+    """
+    ALL = 'all'
+    AUTHOR = 'author'
+    CATEGORY = 'category'
+    TAG = 'tag'
+    SCOPE_CHOICES = [(ALL, 'All posts'), (AUTHOR, 'Author'), (CATEGORY, 'Category'), (TAG, 'Tag')]
+    FORMAT_CHOICES = [('atom', 'Atom'), ('rss', 'RSS')]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    scope_id = models.PositiveBigIntegerField(default=0)  # Author, category or tag id; 0 for ALL
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    body = models.BinaryField()  # gzip-compressed XML
+    etag = models.CharField(max_length=64)  # Hash of the uncompressed XML
+    last_modified = models.DateTimeField()  # When the XML last changed, not when it was last regenerated
+
+    class Meta:
+        unique_together = ('scope', 'scope_id', 'format')
+
+    def __str__(self):
+        return f"{self.format} feed of {self.scope} {self.scope_id}"
+
+
+class SitemapShard(models.Model):
+    """One written sitemap file (accounts.sitemaps) and the fingerprint of the posts it was written from."""
+    section = models.CharField(max_length=20)
+    number = models.PositiveIntegerField()
+    fingerprint = models.CharField(max_length=200)
+    urls = models.PositiveIntegerField(default=0)
+    lastmod = models.DateTimeField()
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('section', 'number')
+
+    def __str__(self):
+        return f"{self.section} sitemap {self.number} ({self.urls} URLs)"
+
+
+class PostRevision(models.Model):
+    """
+    One saved version of a post, written by accounts.revisions. Snapshots hold
+    the full content; other revisions hold a delta against the previous one.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    is_snapshot = models.BooleanField(default=False)
+    body = CompressedTextField()  # Full content for snapshots, a JSON delta otherwise
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('post', 'number')  # Also the index used to rebuild a version
+        ordering = ['number']
+
+    def __str__(self):
+        return f"{self.post_id} v{self.number}"
+
+
+class DigestEntry(models.Model):
+    """A published post waiting to go out in a user's next hourly or daily digest (accounts.digests)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    delivery = models.CharField(max_length=10, choices=Subscription.DELIVERY_CHOICES)
+
+    class Meta:
+        indexes = [models.Index(fields=['delivery', 'user', 'id'], name='digest_entry_pending_idx')]
+
+    def __str__(self):
+        return f"{self.post_id} for {self.user_id} ({self.delivery})"
+
+
+class DigestMark(models.Model):
+    """High-water mark of a user's digests: entries up to ``sent_through`` have been emailed."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    delivery = models.CharField(max_length=10, choices=Subscription.DELIVERY_CHOICES)
+    sent_through = models.PositiveBigIntegerField(default=0)  # DigestEntry id
+    sent_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'delivery')
+
+    def __str__(self):
+        return f"{self.user_id} {self.delivery} digest through {self.sent_through}"
+
+
+class DeletionJob(models.Model):
+    """A soft-deleted post or user whose rows the reaper is deleting chunk by chunk."""
+    POST, USER = 'post', 'user'
+
+    kind = models.CharField(max_length=10, choices=[(POST, 'Post'), (USER, 'User')])
+    object_id = models.PositiveBigIntegerField()
+    requested_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    rows_deleted = models.PositiveBigIntegerField(default=0)
+    chunks = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        state = 'done' if self.finished_at else f'{self.rows_deleted} rows so far'
+        return f"Delete {self.kind} {self.object_id} ({state})"
+
+
+class ImportRun(models.Model):
+    """An import_blog run (accounts.transfer), keyed by the export it reads; a rerun resumes after ``lines``."""
+    export_id = models.CharField(max_length=36, unique=True)
+    lines = models.PositiveBigIntegerField(default=0)  # Lines of the file committed so far
+    rows_created = models.PositiveBigIntegerField(default=0)
+    rows_skipped = models.PositiveBigIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        state = 'done' if self.finished_at else f'{self.lines} lines so far'
+        return f"Import {self.export_id} ({state})"
+
+
+class ImportedRow(models.Model):
+    """Id an imported user, category, tag, post or comment got here, for remapping the rows that point at it."""
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name='rows')
+    kind = models.CharField(max_length=10)
+    old_id = models.BigIntegerField()
+    new_id = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ('run', 'kind', 'old_id')
+
+
+def touch_posts(post_ids):
+    """Bump updated_at of posts whose comments, likes or ratings changed, so their cached fragments re-render."""
+    Post.objects.filter(pk__in=post_ids).update(updated_at=timezone.now())
+    bump_posts_version()
+
+
+def taxonomy_version():
+    """Version of the category and tag fragments; changes whenever a category or tag is saved or deleted."""
+    return cache.get_or_set(TAXONOMY_VERSION_KEY, time.time_ns, None)
+
+
+def posts_version():
+    """Version of the cached list responses; changes whenever a post or its comments, likes or ratings change."""
+    return cache.get_or_set(POSTS_VERSION_KEY, time.time_ns, None)
+
+
+def bump_posts_version():
+    cache.set(POSTS_VERSION_KEY, time.time_ns(), None)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=PostLike)
+@receiver([post_save, post_delete], sender=PostRating)
+def touch_post_on_activity(sender, instance, **kwargs):
+    touch_posts([instance.post_id])
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Tag)
+def bump_taxonomy_version(sender, **kwargs):
+    cache.set(TAXONOMY_VERSION_KEY, time.time_ns(), None)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def bump_posts_version_on_change(sender, **kwargs):
+    bump_posts_version()
+
+
+@receiver(post_save, sender=Post)
+def mark_related_stale(sender, instance, **kwargs):
+    # Queryset update so the flag is set without re-triggering post_save
+    Post.objects.filter(pk=instance.pk, related_stale=False).update(related_stale=True)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def mark_related_stale_on_tags(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        Post.objects.filter(pk=instance.pk, related_stale=False).update(related_stale=True)
+        touch_posts([instance.pk])
@@ -0,0 +1,55 @@
+"""
+Subscriber notifications.
+
+Connected to post_published, so subscribers hear about a post once, when it
+actually becomes visible (immediately or via the scheduler). Subscribers in
+immediate mode get an email at once; the others get the post in their next
+hourly or daily digest (accounts.digests).
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.dispatch import receiver
+
+from .models import DigestEntry, Subscription
+from .signals import post_published
+
+DIGEST_BATCH_SIZE = 1000
+FASTEST_FIRST = [Subscription.IMMEDIATE, Subscription.HOURLY, Subscription.DAILY]
+
+
+def subscribers_of(post):
+    """
+    ``{user: delivery}`` for users subscribed to the post's author or category,
+    excluding the author. Someone subscribed both ways gets the faster mode.
+    """
+    followed = Q(author=post.author_id)
+    if post.category_id is not None:
+        # Q(category=None) would be "category IS NULL" and match every author subscription
+        followed |= Q(category=post.category_id)
+    subscriptions = Subscription.objects.filter(followed).exclude(user=post.author_id)
+    deliveries = {}
+    for subscription in subscriptions.select_related('user'):
+        current = deliveries.get(subscription.user, Subscription.DAILY)
+        deliveries[subscription.user] = min(current, subscription.delivery, key=FASTEST_FIRST.index)
+    return deliveries
+
+
+def new_post_message(user, post):
+    subject = f"New post from {post.author.username}"
+    where = f" in {post.category.name}" if post.category_id else ''
+    body = f"There's a new post titled '{post.title}' by {post.author.username}{where}. Check it out here: {post.get_absolute_url()}"
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [user.email])
+
+
+@receiver(post_published)
+def notify_subscribers(sender, post, **kwargs):
+    deliveries = subscribers_of(post)
+    messages = [new_post_message(user, post) for user, delivery in deliveries.items() if delivery == Subscription.IMMEDIATE]
+    if messages:
+        # One SMTP connection for all of the post's subscribers
+        get_connection().send_messages(messages)
+    DigestEntry.objects.bulk_create(
+        [DigestEntry(user=user, post=post, delivery=delivery) for user, delivery in deliveries.items() if delivery != Subscription.IMMEDIATE],
+        batch_size=DIGEST_BATCH_SIZE,
+    )
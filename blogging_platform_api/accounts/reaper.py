@@ -0,0 +1,117 @@
+"""
+Background deletion of soft-deleted posts and users.
+
+Deleting a popular post through Django's collector loads every comment,
+like and rating into memory and removes them in one long transaction that
+holds the database write lock. Post.soft_delete() and
+CustomUser.soft_delete() instead hide the object at once and queue a
+DeletionJob. The reaper walks the object's reverse foreign keys depth
+first and deletes dependents (then the object) in chunks, one short
+transaction per chunk, recording progress on the job as it goes.
+"""
+import logging
+import time
+
+from django.db import DatabaseError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Comment, CustomUser, DeletionJob, Post, PostLike, PostRating, touch_posts
+from .signals import post_stats_changed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_INTERVAL = 10  # Seconds between reaper ticks
+
+JOB_MODELS = {DeletionJob.POST: Post, DeletionJob.USER: CustomUser}
+
+
+def _reverse_relations(model):
+    """Foreign keys (including auto-created many-to-many through tables) pointing at ``model``."""
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if (field.one_to_many or field.one_to_one) and field.auto_created and not field.concrete
+    ]
+
+
+def _delete(chunk):
+    post_ids = set(chunk.values_list('post_id', flat=True)) if chunk.model in (Comment, PostLike, PostRating) else ()
+    # Dependents are already gone, so skip the collector (and its per-row signals)
+    chunk._raw_delete(chunk.db)
+    if post_ids:
+        # A reaped user's activity on other people's posts changes those posts
+        touch_posts(post_ids)
+        if chunk.model is not Comment:
+            post_stats_changed.send(sender=chunk.model, post_ids=post_ids)
+
+
+def _in_chunks(queryset, job, chunk_size, action, on_chunk):
+    """Apply ``action`` to ``queryset`` ``chunk_size`` rows at a time, each chunk in its own transaction."""
+    model = queryset.model
+    while True:
+        started = time.perf_counter()
+        with transaction.atomic():
+            ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return
+            action(model._base_manager.filter(pk__in=ids))
+            DeletionJob.objects.filter(pk=job.pk).update(rows_deleted=F('rows_deleted') + len(ids), chunks=F('chunks') + 1)
+        if on_chunk is not None:
+            on_chunk(model, len(ids), time.perf_counter() - started)
+
+
+def _drain(queryset, job, chunk_size, on_chunk):
+    """Delete ``queryset`` and everything that cascades from it, dependents first."""
+    if not queryset.exists():
+        return
+    for relation in _reverse_relations(queryset.model):
+        field = relation.field
+        dependents = relation.related_model._base_manager.filter(**{f'{field.name}__in': queryset.values('pk')})
+        if relation.on_delete is models.CASCADE:
+            _drain(dependents, job, chunk_size, on_chunk)
+        elif relation.on_delete is models.SET_NULL:
+            _in_chunks(dependents, job, chunk_size, lambda chunk, name=field.name: chunk.update(**{name: None}), on_chunk)
+        elif relation.on_delete is not models.DO_NOTHING:
+            raise ValueError(f'{field.model._meta.label}.{field.name}: on_delete {relation.on_delete.__name__} is not supported by the reaper')
+    _in_chunks(queryset, job, chunk_size, _delete, on_chunk)
+
+
+def reap(job, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """
+    Delete the object of ``job`` and all its dependents, then mark the job finished.
+
+    ``on_chunk(model, rows, seconds)`` is called after each committed chunk.
+    """
+    if job.started_at is None:
+        DeletionJob.objects.filter(pk=job.pk).update(started_at=timezone.now())
+    model = JOB_MODELS[job.kind]
+    _drain(model._base_manager.filter(pk=job.object_id), job, chunk_size, on_chunk)
+    DeletionJob.objects.filter(pk=job.pk).update(finished_at=timezone.now(), last_error='')
+
+
+def reap_pending(chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """Work through unfinished jobs, oldest first, and return how many were finished."""
+    finished = 0
+    for job in DeletionJob.objects.filter(finished_at__isnull=True).order_by('requested_at'):
+        try:
+            reap(job, chunk_size=chunk_size, on_chunk=on_chunk)
+        except DatabaseError as error:
+            # Committed chunks stay deleted; the job resumes where it stopped on the next tick
+            logger.exception('Deletion job %s failed', job.pk)
+            DeletionJob.objects.filter(pk=job.pk).update(last_error=str(error))
+            continue
+        finished += 1
+    return finished
+
+
+def run_reaper(interval=DEFAULT_INTERVAL, chunk_size=DEFAULT_CHUNK_SIZE, iterations=None, sleep=time.sleep):
+    """Reap pending deletions every ``interval`` seconds, forever or for ``iterations`` ticks."""
+    tick = 0
+    while iterations is None or tick < iterations:
+        count = reap_pending(chunk_size=chunk_size)
+        if count:
+            logger.info('Finished %d deletion job(s).', count)
+        tick += 1
+        if iterations is None or tick < iterations:
+            sleep(interval)
@@ -0,0 +1,154 @@
+"""
+Offline "for you" recommendations.
+
+Likes and ratings are turned into a sparse user x post interaction matrix
+and factorised with a truncated SVD. Every user's row of the low-rank
+reconstruction is scored against all published posts in dense, BLAS-backed
+blocks; the best unseen posts are written to the Recommendation table so
+the API serves them without any online computation.
+"""
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+from django.db import transaction
+
+from .models import Post, PostLike, PostRating, Recommendation
+from .trending import stream_columns
+
+LIKE_WEIGHT = 1.0
+RATING_WEIGHT = 1.0  # Per rating, scaled by stars / 5
+DEFAULT_FACTORS = 32
+DEFAULT_TOP_N = 20
+DEFAULT_CHUNK_SIZE = 1024
+STREAM_CHUNK_SIZE = 50_000
+MAX_CHUNK_CELLS = 8_000_000  # float32 cells per dense scoring block (~32MB)
+
+
+def build_interaction_matrix(chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Return ``(user_ids, post_ids, author_ids, matrix)``.
+
+    Columns are published posts (``author_ids`` aligned with them); rows are
+    users with at least one interaction on a published post. A like and a
+    rating from the same user on the same post are summed.
+    """
+    posts = Post.objects.filter(status='published').order_by('pk')
+    columns = list(stream_columns(posts, ['id', 'author_id'], chunk_size))
+    if not columns:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64), sparse.csr_matrix((0, 0))
+    post_ids = np.concatenate([post_column for post_column, _ in columns])
+    author_ids = np.concatenate([author_column for _, author_column in columns])
+
+    users, cols, weights = [], [], []
+
+    def add(user_column, post_column, values):
+        rows = np.minimum(np.searchsorted(post_ids, post_column), len(post_ids) - 1)
+        known = post_ids[rows] == post_column
+        users.append(user_column[known])
+        cols.append(rows[known])
+        weights.append(values[known])
+
+    for user_column, post_column in stream_columns(PostLike.objects.order_by(), ['user_id', 'post_id'], chunk_size):
+        add(user_column, post_column, np.full(len(user_column), LIKE_WEIGHT, dtype=np.float32))
+    for user_column, post_column, stars in stream_columns(PostRating.objects.order_by(), ['user_id', 'post_id', 'rating'], chunk_size):
+        add(user_column, post_column, (RATING_WEIGHT * stars / 5.0).astype(np.float32))
+
+    if not users:
+        return np.empty(0, np.int64), post_ids, author_ids, sparse.csr_matrix((0, len(post_ids)), dtype=np.float32)
+    user_ids, rows = np.unique(np.concatenate(users), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.concatenate(weights), (rows, np.concatenate(cols))),
+        shape=(len(user_ids), len(post_ids)),
+        dtype=np.float32,
+    )
+    matrix.sum_duplicates()
+    return user_ids, post_ids, author_ids, matrix
+
+
+def factorize(matrix, factors=DEFAULT_FACTORS):
+    """Return ``(user_factors, post_factors)`` whose product approximates ``matrix``."""
+    factors = min(factors, min(matrix.shape) - 1)
+    if factors < 1:
+        return None, None
+    u, s, vt = svds(matrix, k=factors)
+    return (u * s).astype(np.float32), np.ascontiguousarray(vt.T, dtype=np.float32)
+
+
+def top_n_unseen(user_factors, post_factors, matrix, user_ids, author_ids, top_n=DEFAULT_TOP_N, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield ``(row, post_columns, scores)`` per user, best first.
+
+    Posts the user already liked or rated, and the user's own posts, are
+    never recommended.
+    """
+    n_posts = post_factors.shape[0]
+    top_n = min(top_n, n_posts)
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_CELLS // max(n_posts, 1)))
+    for start in range(0, len(user_ids), chunk_size):
+        stop = min(start + chunk_size, len(user_ids))
+        scores = user_factors[start:stop] @ post_factors.T
+        seen_rows, seen_cols = matrix[start:stop].nonzero()
+        scores[seen_rows, seen_cols] = -np.inf
+        scores[author_ids[None, :] == user_ids[start:stop, None]] = -np.inf
+
+        candidates = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+        for offset, (columns, column_scores) in enumerate(zip(candidates, candidate_scores)):
+            eligible = np.isfinite(column_scores)
+            yield start + offset, columns[eligible], column_scores[eligible]
+
+
+def rebuild_recommendations(factors=DEFAULT_FACTORS, top_n=DEFAULT_TOP_N, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """
+    Retrain the model and rewrite every user's recommendations. Returns the number of users written.
+
+    If ``stats`` is a dict it is filled with the matrix shape, the bytes held
+    by the interaction matrix and the factors, and the training time.
+    """
+    started = time.perf_counter()
+    user_ids, post_ids, author_ids, matrix = build_interaction_matrix()
+    user_factors, post_factors = factorize(matrix, factors) if matrix.nnz else (None, None)
+    if stats is not None:
+        stats.update(
+            train_seconds=time.perf_counter() - started,
+            users=matrix.shape[0],
+            posts=matrix.shape[1],
+            interactions=matrix.nnz,
+            matrix_bytes=matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes,
+            factor_bytes=0 if user_factors is None else user_factors.nbytes + post_factors.nbytes,
+        )
+
+    # Users who no longer have any interactions fall back to trending
+    Recommendation.objects.exclude(user_id__in=PostLike.objects.values('user_id')).exclude(
+        user_id__in=PostRating.objects.values('user_id')
+    ).delete()
+    if user_factors is None:
+        return 0
+
+    batch = []
+    for row, columns, scores in top_n_unseen(user_factors, post_factors, matrix, user_ids, author_ids, top_n, chunk_size):
+        batch.append((int(user_ids[row]), post_ids[columns].tolist(), scores.tolist()))
+        if len(batch) >= chunk_size:
+            _store_recommendations(batch)
+            batch = []
+    if batch:
+        _store_recommendations(batch)
+    return len(user_ids)
+
+
+def _store_recommendations(batch):
+    refreshed = [user_id for user_id, _, _ in batch]
+    recommendations = [
+        Recommendation(user_id=user_id, post_id=post_id, score=score, rank=rank)
+        for user_id, recommended_ids, scores in batch
+        for rank, (post_id, score) in enumerate(zip(recommended_ids, scores), start=1)
+    ]
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=refreshed).delete()
+        Recommendation.objects.bulk_create(recommendations)
@@ -0,0 +1,197 @@
+"""
+Related-posts engine.
+
+Every published post becomes a sparse row of a post x feature matrix made of
+its tags, its category and the TF-IDF weights of the terms in its title and
+content. Rows are L2-normalised, so the dot product of two rows is their
+cosine similarity. Neighbours are computed for a chunk of posts at a time
+and written to the RelatedPost table, which the API reads with one indexed
+query.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Post, RelatedPost
+
+TOKEN_RE = re.compile(r'[a-z0-9]{3,}')
+STOP_WORDS = frozenset("""
+    about after again all also and any are because been before being between both but can could did does doing down
+    each few for from further had has have having her here hers him his how into its just more most not now off once
+    only other our out over own same she should some such than that the their them then there these they this those
+    through too under until very was were what when where which while who whom why will with would you your
+""".split())
+
+TAG_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+TITLE_REPEAT = 2  # Title terms count twice as much as body terms
+MIN_DOCUMENT_FREQUENCY = 2  # A term seen in one post can't link two posts
+
+DEFAULT_NEIGHBOURS = 10
+DEFAULT_CHUNK_SIZE = 512
+MAX_CHUNK_CELLS = 8_000_000  # float32 cells per dense similarity block (~32MB)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ matrix
+
+
+def _one_hot(row_index, keys, n_rows):
+    """Build a binary (post x key) matrix from parallel lists of row indexes and keys."""
+    key_index = {key: i for i, key in enumerate(sorted(set(keys)))}
+    cols = np.fromiter((key_index[key] for key in keys), dtype=np.int64, count=len(keys))
+    data = np.ones(len(keys), dtype=np.float32)
+    return sparse.csr_matrix((data, (np.asarray(row_index, dtype=np.int64), cols)), shape=(n_rows, max(len(key_index), 1)))
+
+
+def build_feature_matrix(chunk_size=2000):
+    """
+    Return ``(post_ids, matrix)`` for all published posts.
+
+    ``post_ids`` is a NumPy array giving the post id of each matrix row.
+    """
+    post_ids = []
+    category_rows, category_keys = [], []
+    term_rows, term_cols, term_counts = [], [], []
+    vocabulary = {}
+
+    posts = Post.objects.filter(status='published').order_by('pk').values_list('id', 'title', 'content', 'category_id')
+    for row, (post_id, title, content, category_id) in enumerate(posts.iterator(chunk_size=chunk_size)):
+        post_ids.append(post_id)
+        if category_id is not None:
+            category_rows.append(row)
+            category_keys.append(category_id)
+        counts = Counter(tokenize(title) * TITLE_REPEAT + tokenize(content))
+        for term, count in counts.items():
+            term_rows.append(row)
+            term_cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            term_counts.append(count)
+
+    n_posts = len(post_ids)
+    post_ids = np.asarray(post_ids, dtype=np.int64)
+    if not n_posts:
+        return post_ids, sparse.csr_matrix((0, 0), dtype=np.float32)
+
+    row_of = {post_id: row for row, post_id in enumerate(post_ids.tolist())}
+    tag_rows, tag_keys = [], []
+    tag_links = Post.tags.through.objects.filter(post__status='published').values_list('post_id', 'tag_id')
+    for post_id, tag_id in tag_links.iterator(chunk_size=chunk_size):
+        tag_rows.append(row_of[post_id])
+        tag_keys.append(tag_id)
+
+    # Sublinear TF * smoothed IDF, dropping terms too rare to connect two posts
+    terms = sparse.csr_matrix(
+        (1.0 + np.log(np.asarray(term_counts, dtype=np.float32)), (term_rows, term_cols)),
+        shape=(n_posts, max(len(vocabulary), 1)),
+        dtype=np.float32,
+    )
+    document_frequency = np.bincount(terms.indices, minlength=terms.shape[1])
+    keep = np.flatnonzero(document_frequency >= MIN_DOCUMENT_FREQUENCY)
+    idf = np.log((1.0 + n_posts) / (1.0 + document_frequency[keep])) + 1.0
+    terms = terms[:, keep] @ sparse.diags(idf.astype(np.float32))
+
+    blocks = [
+        TAG_WEIGHT * _normalize_rows(_one_hot(tag_rows, tag_keys, n_posts)),
+        CATEGORY_WEIGHT * _normalize_rows(_one_hot(category_rows, category_keys, n_posts)),
+        TEXT_WEIGHT * _normalize_rows(terms),
+    ]
+    matrix = _normalize_rows(sparse.hstack(blocks, format='csr', dtype=np.float32))
+    return post_ids, matrix.astype(np.float32)
+
+
+def top_k_neighbours(matrix, rows, k=DEFAULT_NEIGHBOURS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield ``(row, neighbour_rows, scores)`` for each requested row, best first.
+
+    Similarities are computed as dense blocks of ``chunk_size`` rows against
+    the whole matrix, so memory is bounded by the block size rather than the
+    number of posts. Neighbours with zero similarity are dropped.
+    """
+    n_posts = matrix.shape[0]
+    k = min(k, n_posts - 1)
+    if k <= 0:
+        for row in rows:
+            yield row, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return
+
+    rows = np.asarray(rows, dtype=np.int64)
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_CELLS // n_posts))
+    matrix_t = matrix.T.tocsr()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        similarities = (matrix[chunk] @ matrix_t).toarray()
+        similarities[np.arange(len(chunk)), chunk] = -np.inf  # A post is not related to itself
+
+        candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(similarities, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+        for row, neighbours, scores in zip(chunk, candidates, candidate_scores):
+            positive = scores > 0
+            yield int(row), neighbours[positive], scores[positive]
+
+
+def refresh_related_posts(full=False, k=DEFAULT_NEIGHBOURS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recompute stored neighbours and return the number of posts refreshed.
+
+    By default only posts flagged ``related_stale`` (edited, retagged or newly
+    published) are recomputed, together with the posts that currently list
+    one of them or a post that is no longer published, since their scores
+    changed too. A changed post can also become a neighbour of posts that
+    don't list it yet; only ``full=True``, which recomputes every published
+    post, finds those, so run a full rebuild periodically as well.
+    """
+    started = timezone.now()
+    # Drop rows that point at or belong to posts that are no longer published
+    orphaned = set(RelatedPost.objects.exclude(related__status='published').values_list('post_id', flat=True))
+    RelatedPost.objects.exclude(post__status='published').delete()
+    RelatedPost.objects.exclude(related__status='published').delete()
+
+    post_ids, matrix = build_feature_matrix()
+    if full:
+        rows = np.arange(len(post_ids))
+    else:
+        stale = Post.objects.filter(status='published', related_stale=True).values_list('id', flat=True)
+        listing = RelatedPost.objects.filter(related_id__in=stale).values_list('post_id', flat=True)
+        targets = orphaned.union(stale.iterator(), listing.iterator())
+        rows = np.flatnonzero(np.isin(post_ids, np.fromiter(targets, dtype=np.int64, count=len(targets))))
+    if not len(rows):
+        return 0
+
+    batch = []
+    for row, neighbours, scores in top_k_neighbours(matrix, rows, k=k, chunk_size=chunk_size):
+        batch.append((int(post_ids[row]), post_ids[neighbours].tolist(), scores.tolist()))
+        if len(batch) >= chunk_size:
+            _store_neighbours(batch, started)
+            batch = []
+    if batch:
+        _store_neighbours(batch, started)
+    return len(rows)
+
+
+def _store_neighbours(batch, started):
+    refreshed = [post_id for post_id, _, _ in batch]
+    related = [
+        RelatedPost(post_id=post_id, related_id=related_id, score=score, rank=rank)
+        for post_id, neighbour_ids, scores in batch
+        for rank, (related_id, score) in enumerate(zip(neighbour_ids, scores), start=1)
+    ]
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=refreshed).delete()
+        RelatedPost.objects.bulk_create(related)
+        # Posts edited or retagged after the matrix was read keep the flag for the next run
+        Post.objects.filter(pk__in=refreshed, updated_at__lt=started).update(related_stale=False)
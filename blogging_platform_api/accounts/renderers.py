@@ -0,0 +1,27 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    DRF's JSONRenderer with the compact case built on orjson.
+
+    Output is compact UTF-8 like JSONRenderer's, with U+2028 and U+2029
+    escaped the same way so it stays a strict JavaScript subset. Datetimes,
+    decimals, lazy strings and other non-JSON types are handed to DRF's own
+    encoder so they are formatted exactly as before. Indented output (an
+    ``indent=`` media type parameter, or the browsable API) is rare and goes
+    through JSONRenderer itself, which honours the requested width.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=_encoder.default, option=self.options)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
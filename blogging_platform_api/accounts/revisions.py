@@ -0,0 +1,140 @@
+"""
+Post revision history.
+
+Every saved change to a post's title or content becomes a PostRevision.
+Most revisions store only a delta against the previous version; every
+REVISION_SNAPSHOT_INTERVAL-th stores the full content, so rebuilding any version
+replays fewer than REVISION_SNAPSHOT_INTERVAL deltas read in a single query.
+
+Content is diffed as a sequence of sentence and line pieces, and a delta
+is a JSON list of operations on the previous version's pieces:
+a positive int keeps that many, a negative int skips that many, and a
+list of strings inserts them. Bodies are stored in a CompressedTextField.
+"""
+import difflib
+import json
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Post, PostRevision
+
+DEFAULT_SNAPSHOT_INTERVAL = 10
+
+# Split after newlines and sentence ends, keeping the separators, so ''.join(pieces) == text
+_PIECE = re.compile(r'(?<=[\n.!?])')
+
+
+def _pieces(text):
+    return [piece for piece in _PIECE.split(text) if piece]
+
+
+def make_delta(old, new):
+    """JSON delta turning ``old`` into ``new``."""
+    old_pieces, new_pieces = _pieces(old), _pieces(new)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_pieces, new_pieces, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new_pieces[j1:j2])
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_delta(old, delta):
+    pieces, result, position = _pieces(old), [], 0
+    for op in json.loads(delta):
+        if isinstance(op, list):
+            result.extend(op)
+        elif op > 0:
+            result.extend(pieces[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(result)
+
+
+def rebuild(post_id, number):
+    """Return ``(title, content)`` of revision ``number``, or None if it doesn't exist."""
+    last_snapshot = PostRevision.objects.filter(
+        post_id=OuterRef('post_id'), number__lte=number, is_snapshot=True
+    ).order_by('-number').values('number')[:1]
+    chain = list(
+        PostRevision.objects.filter(post_id=post_id, number__lte=number, number__gte=Subquery(last_snapshot))
+        .order_by('number').values_list('number', 'title', 'body')
+    )
+    if not chain or chain[-1][0] != number:
+        return None
+    content = chain[0][2]
+    for _, _, delta in chain[1:]:
+        content = apply_delta(content, delta)
+    return chain[-1][1], content
+
+
+def record_revision(post):
+    """
+    Store the post's current title and content as a new revision if they
+    changed since the last one. Returns the new PostRevision or None.
+    """
+    with transaction.atomic():
+        # Serialise concurrent saves of the same post so revision numbers don't collide
+        Post.all_objects.select_for_update().filter(pk=post.pk).exists()
+        latest = PostRevision.objects.filter(post=post).aggregate(number=Max('number'))['number']
+        if latest is None:
+            return PostRevision.objects.create(post=post, number=1, title=post.title, is_snapshot=True, body=post.content)
+        title, content = rebuild(post.pk, latest)
+        if (title, content) == (post.title, post.content):
+            return None
+        number = latest + 1
+        if (number - 1) % getattr(settings, 'REVISION_SNAPSHOT_INTERVAL', DEFAULT_SNAPSHOT_INTERVAL) == 0:
+            return PostRevision.objects.create(post=post, number=number, title=post.title, is_snapshot=True, body=post.content)
+        return PostRevision.objects.create(
+            post=post, number=number, title=post.title, body=make_delta(content, post.content)
+        )
+
+
+def prune_revisions(post_id, keep_from):
+    """
+    Delete the post's revisions numbered below ``keep_from``. If the first kept
+    revision is a delta it becomes a snapshot first, so every kept version can
+    still be rebuilt. Returns the number of revisions deleted.
+    """
+    with transaction.atomic():
+        first = PostRevision.objects.filter(post_id=post_id, number=keep_from).first()
+        if first is None:
+            return 0
+        if not first.is_snapshot:
+            first.body = rebuild(post_id, keep_from)[1]
+            first.is_snapshot = True
+            first.save(update_fields=['body', 'is_snapshot'])
+        deleted, _ = PostRevision.objects.filter(post_id=post_id, number__lt=keep_from).delete()
+        return deleted
+
+
+def revisions_to_prune(keep_last, older_than):
+    """
+    ``(post_id, keep_from)`` for posts with revisions outside the policy: keep
+    the ``keep_last`` newest revisions of each post, plus any created after
+    ``older_than``.
+    """
+    for post_id, latest in PostRevision.objects.values_list('post_id').annotate(latest=Max('number')).order_by('post_id'):
+        keep_from = latest - keep_last + 1
+        recent = PostRevision.objects.filter(post_id=post_id, created_at__gt=older_than, number__lt=keep_from)
+        keep_from = recent.order_by('number').values_list('number', flat=True).first() or keep_from
+        if keep_from > 1 and PostRevision.objects.filter(post_id=post_id, number__lt=keep_from).exists():
+            yield post_id, keep_from
+
+
+@receiver(post_save, sender=Post)
+def record_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {'title', 'content'} & set(update_fields)):
+        return
+    record_revision(instance)
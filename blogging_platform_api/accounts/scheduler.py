@@ -0,0 +1,67 @@
+"""
+Scheduled publishing.
+
+Posts saved as published with a future published_date are stored as
+'scheduled'. publish_due_posts flips the ones that are due to 'published'
+in batches, walking the (status, published_date) index, and sends
+post_published once per post after each batch commits.
+"""
+import logging
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .archive import adjust
+from .feeds import regenerate_later, scopes_of
+from .models import Post, bump_posts_version
+from .signals import post_published
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_INTERVAL = 30  # Seconds between scheduler ticks
+
+
+def publish_due_posts(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Publish every scheduled post due at ``now`` and return how many were published."""
+    now = now or timezone.now()
+    published = 0
+    while True:
+        with transaction.atomic():
+            due = Post.objects.filter(status='scheduled', published_date__lte=now).order_by('published_date')
+            if connection.features.has_select_for_update_skip_locked:
+                # Lets several schedulers share the work without publishing a post twice
+                due = due.select_for_update(skip_locked=True)
+            batch = list(due.values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                return published
+            adjust(Post.objects.filter(pk__in=batch, status='scheduled'), 1)  # Counted as the update below will leave them
+            Post.objects.filter(pk__in=batch, status='scheduled').update(status='published', related_stale=True)
+            regenerate_later(scopes_of(Post.objects.filter(pk__in=batch)))
+            transaction.on_commit(bump_posts_version)
+            transaction.on_commit(lambda batch=batch: _announce(batch))
+        published += len(batch)
+
+
+def _announce(post_ids):
+    for post in Post.objects.filter(pk__in=post_ids).select_related('author', 'category'):
+        for receiver, response in post_published.send_robust(sender=Post, post=post):
+            if isinstance(response, Exception):
+                logger.error('post_published hook %r failed for post %s: %s', receiver, post.pk, response)
+
+
+def run_scheduler(interval=DEFAULT_INTERVAL, batch_size=DEFAULT_BATCH_SIZE, iterations=None, clock=timezone.now, sleep=time.sleep):
+    """
+    Publish due posts every ``interval`` seconds, forever or for ``iterations`` ticks.
+
+    ``clock`` and ``sleep`` are injectable so the loop can be driven by a fake clock.
+    """
+    tick = 0
+    while iterations is None or tick < iterations:
+        count = publish_due_posts(now=clock(), batch_size=batch_size)
+        if count:
+            logger.info('Published %d scheduled post(s).', count)
+        tick += 1
+        if iterations is None or tick < iterations:
+            sleep(interval)
@@ -0,0 +1,119 @@
+"""
+Full-text index of post bodies.
+
+Post content is stored compressed (accounts.fields), so neither LIKE nor an
+expression index can read it. Instead each body is indexed as plain text
+(HTML stripped) when its post is saved, in tables created by migration 0026:
+
+- SQLite: a contentless FTS5 table, accounts_post_fts, keeps only the index,
+  not the text. A contentless row can only be removed by passing the exact
+  text it was built from, so a save adds a new row and accounts_post_search
+  points the post at it. Searches go through that mapping and never see a
+  superseded row; rebuild() drops them.
+- PostgreSQL: accounts_post_search holds a tsvector per post under a GIN index.
+
+accounts_post_search rows are deleted with their post (ON DELETE CASCADE),
+including when the reaper deletes it with raw SQL. Posts written without
+save() (bulk_create) are indexed with index_posts(). The rebuild_search_index
+command reindexes every post, e.g. after copying the database to PostgreSQL.
+
+Every word of a query must start a word of the body, case-insensitively.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .fields import plain_text
+from .models import Post
+
+TERM_RE = re.compile(r'[^\W_]+')
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _postgres(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def index_posts(posts, using=DEFAULT_DB_ALIAS):
+    """Index ``(post_id, content)`` pairs, replacing whatever each post had indexed."""
+    postgres = _postgres(using)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        for post_id, content in posts:
+            text = plain_text(content)
+            if postgres:
+                cursor.execute(
+                    "INSERT INTO accounts_post_search (post_id, document) VALUES (%s, to_tsvector('simple', %s)) "
+                    "ON CONFLICT (post_id) DO UPDATE SET document = excluded.document",
+                    [post_id, text],
+                )
+            else:
+                cursor.execute("INSERT INTO accounts_post_fts (body) VALUES (%s)", [text])
+                cursor.execute(
+                    "INSERT INTO accounts_post_search (post_id, doc_id) VALUES (%s, %s) "
+                    "ON CONFLICT (post_id) DO UPDATE SET doc_id = excluded.doc_id",
+                    [post_id, cursor.lastrowid],
+                )
+
+
+def matching(query, using=DEFAULT_DB_ALIAS):
+    """Q matching the posts whose body contains every word of ``query``."""
+    terms = TERM_RE.findall(query.lower())
+    if not terms:
+        return Q(pk__in=[])
+    if _postgres(using):
+        sql = "SELECT post_id FROM accounts_post_search WHERE document @@ to_tsquery('simple', %s)"
+        expression = ' & '.join(f'{term}:*' for term in terms)
+    else:
+        sql = (
+            "SELECT post_id FROM accounts_post_search WHERE doc_id IN "
+            "(SELECT rowid FROM accounts_post_fts WHERE accounts_post_fts MATCH %s)"
+        )
+        expression = ' '.join(f'"{term}"*' for term in terms)
+    return Q(pk__in=RawSQL(sql, [expression]))
+
+
+def rebuild(using=DEFAULT_DB_ALIAS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Reindex every post from scratch in one transaction. Returns the number of posts indexed."""
+    indexed = 0
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute("DELETE FROM accounts_post_search")
+            if not _postgres(using):
+                cursor.execute("INSERT INTO accounts_post_fts (accounts_post_fts) VALUES ('delete-all')")
+        chunk = []
+        for row in Post.all_objects.using(using).order_by('pk').values_list('pk', 'content').iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                index_posts(chunk, using)
+                indexed += len(chunk)
+                chunk = []
+        index_posts(chunk, using)
+        indexed += len(chunk)
+    if not _postgres(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute("INSERT INTO accounts_post_fts (accounts_post_fts) VALUES ('optimize')")
+    return indexed
+
+
+def index_size(using=DEFAULT_DB_ALIAS):
+    """Bytes taken by the index tables (SQLite needs the dbstat table)."""
+    with connections[using].cursor() as cursor:
+        if _postgres(using):
+            cursor.execute("SELECT pg_total_relation_size('accounts_post_search')")
+        else:
+            cursor.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'accounts_post_fts%' OR name = 'accounts_post_search'"
+                " OR name LIKE 'sqlite_autoindex_accounts_post_search%'"
+            )
+        return cursor.fetchone()[0] or 0
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, using, update_fields=None, **kwargs):
+    # Saves that leave the body out (deferred content, update_fields=[...]) keep the current entry
+    if update_fields is None or 'content' in update_fields:
+        index_posts([(instance.pk, instance.content)], using)
@@ -2,15 +2,17 @@ from rest_framework.serializers import ModelSerializer
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Post, Category, Tag, Comment,Subscription,Profile,PostLike 
+from .models import Post, Category, Tag, Comment,Subscription,Profile,PostLike,RelatedPost,PostRevision,ArchiveMonth
 from django.db.models import Q
-from markdown2 import Markdown
-import markdown2
 from django.db.models import Avg, Count
+from .interactions import ACTIONS
+from .images import set_profile_picture, variant_urls
+from django.core.exceptions import ValidationError as DjangoValidationError
 
 User = get_user_model()
 
+MAX_BATCH_IDS = 250  # Per request on the posts/comments/profiles batch endpoints
+
 class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -44,8 +46,8 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'author', 'category', 'category_name', 'tags', 'tags_names', 'published_date', 'created_at', 'average_rating', 'likes_count', 'status', 'comments']
-        read_only_fields = ['author', 'created_at']
+        fields = ['id', 'title', 'content', 'author', 'category', 'category_name', 'tags', 'tags_names', 'published_date', 'created_at', 'average_rating', 'likes_count', 'views', 'status', 'comments']
+        read_only_fields = ['author', 'created_at', 'views']
         extra_kwargs = {
             'title': {'required': True},  # Set required as needed
             'content': {'required': True},  # Set required as needed
@@ -70,6 +72,11 @@ class PostSerializer(serializers.ModelSerializer):
             representation['tags'] = [tag.name for tag in instance.tags.all()]
         else:
             representation['tags'] = []
+
+        # The requesting user's like/rating/follows, resolved for the whole page by the view
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            representation.update(viewer_state[instance.pk])
         
         return representation
     
@@ -129,6 +136,58 @@ class PostSerializer(serializers.ModelSerializer):
 
 
 
+class PostSummarySerializer(PostSerializer):
+    """
+    PostSerializer for list pages: the stored excerpt instead of the (compressed)
+    full content, plus updated_at to version each post's cached template fragment.
+    """
+
+    class Meta(PostSerializer.Meta):
+        fields = [field if field != 'content' else 'excerpt' for field in PostSerializer.Meta.fields] + ['updated_at']
+        read_only_fields = PostSerializer.Meta.read_only_fields + ['excerpt', 'updated_at']
+
+
+class RelatedPostSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='related.id', read_only=True)
+    title = serializers.CharField(source='related.title', read_only=True)
+    url = serializers.CharField(source='related.get_absolute_url', read_only=True)
+
+    class Meta:
+        model = RelatedPost
+        fields = ['id', 'title', 'url', 'score']
+
+
+class RecommendedPostSerializer(serializers.ModelSerializer):
+    url = serializers.CharField(source='get_absolute_url', read_only=True)
+    author = serializers.CharField(source='author.username', read_only=True)
+    score = serializers.FloatField(read_only=True)  # Annotated by the view
+
+    class Meta:
+        model = Post
+        fields = ['id', 'title', 'url', 'author', 'published_date', 'score']
+
+
+class ArchiveMonthSerializer(serializers.ModelSerializer):
+    url = serializers.CharField(source='get_absolute_url', read_only=True)
+
+    class Meta:
+        model = ArchiveMonth
+        fields = ['year', 'month', 'posts', 'url']
+
+
+class PostRevisionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PostRevision
+        fields = ['number', 'title', 'is_snapshot', 'created_at']
+
+
+class PostRevisionDetailSerializer(PostRevisionSerializer):
+    content = serializers.CharField(read_only=True)  # Rebuilt by the view from the snapshot and deltas
+
+    class Meta(PostRevisionSerializer.Meta):
+        fields = PostRevisionSerializer.Meta.fields + ['content']
+
+
 class PostDeleteSerializer(serializers.Serializer):
     post_id = serializers.PrimaryKeyRelatedField(queryset=Post.objects.all())
 
@@ -181,10 +240,49 @@ class RatePostSerializer(serializers.Serializer):
 class LikePostSerializer(serializers.Serializer):
     message = serializers.CharField(read_only=True)  # Dummy field just for compliance
 
+class InteractionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=ACTIONS)
+    post = serializers.IntegerField()
+    rating = serializers.IntegerField(min_value=1, max_value=5, required=False)
+
+    def validate(self, data):
+        if data['action'] == 'rate' and 'rating' not in data:
+            raise serializers.ValidationError({'rating': 'A rating is required for the rate action.'})
+        return data
+
+class InteractionBatchSerializer(serializers.Serializer):
+    actions = InteractionSerializer(many=True, allow_empty=False, max_length=500)
+
+class BatchIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_BATCH_IDS)
+
+class PublicProfileSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='user_id', read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+    avatars = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Profile
+        fields = ['id', 'username', 'bio', 'profile_picture', 'avatars']
+
+    def get_avatars(self, profile):
+        # Thumbnail URLs by size and format; clients should use these rather than the original profile_picture
+        return variant_urls(profile.picture)
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    post = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['start'] > data['end']:
+            raise serializers.ValidationError("start must be on or before end.")
+        return data
+
 class SubscriptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subscription
-        fields = ['user', 'author', 'category']
+        fields = ['user', 'author', 'category', 'delivery']
 
     def validate(self, data):
         # Ensure user doesn't subscribe to themselves
@@ -206,9 +304,14 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 class ProfileSerializer(serializers.ModelSerializer):
+    avatars = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
-        fields = ['bio', 'profile_picture']
+        fields = ['bio', 'profile_picture', 'avatars']
+
+    def get_avatars(self, profile):
+        return variant_urls(profile.picture)
 
 class UserProfileSerializer(serializers.ModelSerializer):
     profile = ProfileSerializer()  # Nested profile serializer
@@ -225,7 +328,11 @@ class UserProfileSerializer(serializers.ModelSerializer):
         if profile_data:
             profile = instance.profile
             profile.bio = profile_data.get('bio', profile.bio)
-            profile.profile_picture = profile_data.get('profile_picture', profile.profile_picture)
+            if profile_data.get('profile_picture'):
+                try:
+                    set_profile_picture(profile, profile_data['profile_picture'])
+                except DjangoValidationError as error:
+                    raise serializers.ValidationError({'profile': {'profile_picture': error.messages}})
             profile.save()
         
         # Update user fields
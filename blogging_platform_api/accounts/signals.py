@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Sent once per post when it becomes visible, either when it is saved as
+# published or when run_scheduler publishes it at its published_date.
+# Receivers get ``post``; hooks such as notifications, caches and feeds
+# listen here instead of on post_save.
+post_published = Signal()
+
+# Sent after likes or ratings are written in bulk or with raw SQL, which
+# bypasses post_save/post_delete. Receivers get ``post_ids``.
+post_stats_changed = Signal()
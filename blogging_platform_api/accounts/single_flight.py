@@ -0,0 +1,136 @@
+"""
+Single-flight cache fills.
+
+fetch(key, build, timeout) returns the cached value of ``key``, calling
+``build()`` when it is missing or expired, but never more than once at a
+time per key:
+
+- Threads of one process queue on a per-key lock; the first one builds and
+  the rest find its value in the cache once they get the lock.
+- Across workers, a builder first takes a lease: cache.add() of
+  '<key>:lease', which only one worker can win. The losers poll for the
+  value (for up to SINGLE_FLIGHT_LEASE seconds) instead of building it too.
+- Expired entries stay in the cache for SINGLE_FLIGHT_STALE more seconds:
+  while one request rebuilds, everyone else gets the stale value at once.
+- An entry can be refreshed before it expires, with a probability that
+  grows as expiry nears and with how long the value took to build
+  ("XFetch", Vattani et al. 2015), so a hot key is usually rebuilt by a
+  single request before it expires at all.
+
+Entries can also carry a version (e.g. a post's updated_at): an entry of
+another version is served stale while the current one is built.
+"""
+import math
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+DEFAULT_STALE = 60  # Seconds an expired entry is still served while it is rebuilt
+DEFAULT_LEASE = 10  # Seconds a worker may take to build before others stop waiting for it
+DEFAULT_BETA = 1.0  # Above 1 refreshes earlier, below 1 later; 0 turns early refresh off
+POLL_INTERVAL = 0.05
+
+_locks = {}  # key -> [lock, number of threads holding or waiting for it]
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _local_lock(key, blocking=True):
+    """Hold this process's lock for ``key``; yields whether it was acquired."""
+    with _locks_guard:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    acquired = entry[0].acquire(blocking)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            entry[0].release()
+        with _locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _locks[key]
+
+
+def _take_lease(cache, key):
+    token = uuid.uuid4().hex
+    if cache.add(f'{key}:lease', token, getattr(settings, 'SINGLE_FLIGHT_LEASE', DEFAULT_LEASE)):
+        return token
+    return None
+
+
+def _release_lease(cache, key, token):
+    # Not atomic, but a lease that ran out and was taken over is only deleted early, never left behind
+    if cache.get(f'{key}:lease') == token:
+        cache.delete(f'{key}:lease')
+
+
+def should_refresh(expires_at, delta, now=None, beta=None, rand=random.random):
+    """True once ``expires_at`` has passed, and with rising probability as it nears."""
+    now = time.time() if now is None else now
+    beta = getattr(settings, 'SINGLE_FLIGHT_BETA', DEFAULT_BETA) if beta is None else beta
+    # 1 - rand() is in (0, 1], so the log is defined and the jump ahead is never negative
+    return now - delta * beta * math.log(1.0 - rand()) >= expires_at
+
+
+def _fill(cache, key, build, timeout, version):
+    started = time.monotonic()
+    value = build()
+    delta = time.monotonic() - started
+    stale = getattr(settings, 'SINGLE_FLIGHT_STALE', DEFAULT_STALE)
+    cache.set(key, (value, version, time.time() + timeout, delta), timeout + stale)
+    return value
+
+
+def _wait(cache, key):
+    deadline = time.monotonic() + getattr(settings, 'SINGLE_FLIGHT_LEASE', DEFAULT_LEASE)
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def fetch(key, build, timeout, version=None, cache=None):
+    """
+    The value of ``key`` in ``cache`` (the default cache), built by ``build()``
+    and kept for ``timeout`` seconds if it is missing, expired or of another
+    ``version``. ``build`` runs at most once at a time per key.
+    """
+    cache = cache or default_cache
+    entry = cache.get(key)
+    if entry is not None:
+        value, entry_version, expires_at, delta = entry
+        if entry_version == version and not should_refresh(expires_at, delta):
+            return value
+        # Stale: one request rebuilds, everyone else is answered with what is there
+        with _local_lock(key, blocking=False) as acquired:
+            token = acquired and _take_lease(cache, key)
+            if token:
+                try:
+                    return _fill(cache, key, build, timeout, version)
+                finally:
+                    _release_lease(cache, key, token)
+        return value
+    with _local_lock(key):
+        # Anything cached since the miss above was built after it, so it is fresh enough
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        token = _take_lease(cache, key)
+        if token is None:
+            entry = _wait(cache, key)
+            if entry is not None:
+                return entry[0]
+            # The lease holder died or is too slow; build without the lease rather than fail
+        try:
+            return _fill(cache, key, build, timeout, version)
+        finally:
+            if token:
+                _release_lease(cache, key, token)
@@ -0,0 +1,203 @@
+"""
+Sharded sitemaps, written to files.
+
+Posts and author pages are split into shards of SITEMAP_SHARD_SIZE URLs by
+primary key: shard n of posts holds the visible posts with
+n * size < pk <= (n + 1) * size, so a shard's membership never shifts when
+other posts come and go. Each shard is a gzipped sitemap file under
+SITEMAP_ROOT, and sitemap.xml indexes them.
+
+build_sitemaps() fingerprints every shard with one grouped query per
+section (URL and post counts, sum of post ids and newest updated_at) and rewrites only
+the shards whose fingerprint changed. A shard is written by walking its
+key range in keyset chunks with .iterator(), straight into the gzip
+stream, so memory stays flat however many posts there are. Files are
+written under a temporary name and renamed into place, so a crawler never
+fetches half a file.
+"""
+import gzip
+import os
+from datetime import timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.contrib.syndication.views import add_domain
+from django.db.models import Case, Count, F, Max, Q, Sum, When
+from django.db.models.functions import Floor
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Post, SitemapShard
+
+MAX_SHARD_SIZE = 50_000  # URLs per file allowed by the sitemap protocol
+DEFAULT_CHUNK_SIZE = 5000
+INDEX_NAME = 'sitemap.xml'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def sitemap_root():
+    return getattr(settings, 'SITEMAP_ROOT', os.path.join(settings.BASE_DIR, 'sitemaps'))
+
+
+def shard_size():
+    return min(getattr(settings, 'SITEMAP_SHARD_SIZE', MAX_SHARD_SIZE), MAX_SHARD_SIZE)
+
+
+def shard_name(section, number):
+    return f'sitemap-{section}-{number}.xml.gz'
+
+
+def _w3c(moment):
+    return moment.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _url_pattern(domain, url_name):
+    # Reversed once; formatting a string per row is far cheaper than reverse() per row
+    return add_domain(domain, reverse(url_name, args=[0]), secure=True).replace('/0/', '/{}/')
+
+
+class PostSection:
+    """Every visible post, keyed by its own id."""
+    name = 'posts'
+    url_name = 'accounts:post-retrieve-update-destroy'
+    key = 'pk'
+
+    def url_count(self):
+        return Count('pk')
+
+    def fingerprints(self, size):
+        """
+        ``{shard number: (fingerprint, urls, lastmod)}`` for every non-empty
+        shard. updated_at only moves forward, so any edit raises the newest
+        one; posts leaving or joining change the count and the sum of ids.
+        """
+        rows = Post.objects.visible().order_by().annotate(shard=Floor((F(self.key) - 1) / size)).values('shard').annotate(
+            urls=self.url_count(), posts=Count('pk'), ids=Sum('pk'), lastmod=Max('updated_at'),
+        ).values_list('shard', 'urls', 'posts', 'ids', 'lastmod')
+        return {
+            int(shard): (f'{size}:{urls}:{posts}:{ids}:{lastmod.isoformat()}', urls, lastmod)
+            for shard, urls, posts, ids, lastmod in rows
+        }
+
+    def listed(self, now):
+        return Q(status='published', published_date__lte=now)
+
+    def rows(self, low, high, chunk_size):
+        """``(key, lastmod)`` of listed keys in ``(low, high]``, in key order, read in keyset chunks."""
+        now = timezone.now()
+        last = low
+        while True:
+            count = 0
+            for key, lastmod in self.chunk(last, high, chunk_size, now).iterator(chunk_size=chunk_size):
+                count += 1
+                last = key
+                if lastmod is not None:
+                    yield key, lastmod
+            if count < chunk_size:
+                return
+
+    def chunk(self, after, high, chunk_size, now):
+        # Only the key range is filtered in SQL, so the primary key drives the query; a
+        # visible() filter lets SQLite pick the status index and sort every listed post
+        return Post.objects.filter(pk__gt=after, pk__lte=high).order_by('pk').annotate(
+            lastmod=Case(When(self.listed(now), then='updated_at'))
+        ).values_list('pk', 'lastmod')[:chunk_size]
+
+
+class AuthorSection(PostSection):
+    """The post list of every author with a visible post, keyed by the author's id."""
+    name = 'authors'
+    url_name = 'accounts:posts-by-author'
+    key = 'author_id'
+
+    def url_count(self):
+        return Count('author_id', distinct=True)
+
+    def chunk(self, after, high, chunk_size, now):
+        # Walks the (author, published_date) index; authors without a listed post get None
+        return Post.objects.filter(author_id__gt=after, author_id__lte=high).values('author_id').annotate(
+            lastmod=Max('updated_at', filter=self.listed(now))
+        ).order_by('author_id').values_list('author_id', 'lastmod')[:chunk_size]
+
+
+SECTIONS = [PostSection(), AuthorSection()]
+
+
+def _replace(path, write):
+    partial = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.partial')
+    write(partial)
+    os.replace(partial, path)
+
+
+def write_shard(section, number, size, domain, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write one shard file and return how many URLs it holds."""
+    # Keys are integers, so the pattern is escaped once rather than every URL
+    pattern = escape(_url_pattern(domain, section.url_name))
+    written = 0
+
+    def write(path):
+        nonlocal written
+        # mtime=0 keeps the bytes identical for identical content
+        with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as stream:
+            stream.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n'.encode())
+            lines = []
+            for key, lastmod in section.rows(number * size, (number + 1) * size, chunk_size):
+                lines.append(f'<url><loc>{pattern.format(key)}</loc><lastmod>{_w3c(lastmod)}</lastmod></url>\n')
+                if len(lines) == chunk_size:  # One write per chunk; the buffer never outgrows it
+                    stream.write(''.join(lines).encode())
+                    written += len(lines)
+                    lines.clear()
+            stream.write((''.join(lines) + '</urlset>\n').encode())
+            written += len(lines)
+
+    _replace(os.path.join(sitemap_root(), shard_name(section.name, number)), write)
+    return written
+
+
+def write_index(domain):
+    base = add_domain(domain, '/', secure=True)
+
+    def write(path):
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n')
+            for section, number, lastmod in SitemapShard.objects.order_by('section', 'number').values_list('section', 'number', 'lastmod'):
+                stream.write(f'<sitemap><loc>{escape(base + shard_name(section, number))}</loc><lastmod>{_w3c(lastmod)}</lastmod></sitemap>\n')
+            stream.write('</sitemapindex>\n')
+
+    _replace(os.path.join(sitemap_root(), INDEX_NAME), write)
+
+
+def build_sitemaps(chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Rewrite the shards whose posts changed since the last build, drop empty
+    ones and rewrite the index if anything moved. Returns ``(written, removed)``.
+    """
+    root = sitemap_root()
+    os.makedirs(root, exist_ok=True)
+    size = shard_size()
+    domain = Site.objects.get_current().domain
+    written = removed = 0
+    for section in SECTIONS:
+        stored = {shard.number: shard for shard in SitemapShard.objects.filter(section=section.name)}
+        current = section.fingerprints(size)
+        for number, (fingerprint, urls, lastmod) in sorted(current.items()):
+            shard = stored.get(number)
+            if shard and shard.fingerprint == fingerprint and os.path.exists(os.path.join(root, shard_name(section.name, number))):
+                continue
+            urls = write_shard(section, number, size, domain, chunk_size)
+            SitemapShard.objects.update_or_create(
+                section=section.name, number=number,
+                defaults={'fingerprint': fingerprint, 'urls': urls, 'lastmod': lastmod, 'generated_at': timezone.now()},
+            )
+            written += 1
+        for number in stored.keys() - current.keys():
+            stored[number].delete()
+            try:
+                os.remove(os.path.join(root, shard_name(section.name, number)))
+            except FileNotFoundError:
+                pass
+            removed += 1
+    if written or removed or not os.path.exists(os.path.join(root, INDEX_NAME)):
+        write_index(domain)
+    return written, removed
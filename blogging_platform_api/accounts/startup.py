@@ -0,0 +1,90 @@
+"""
+Cold-start measurement.
+
+Boots the project in a fresh interpreter under ``python -X importtime``,
+the way a new worker process starts: load the WSGI application, build the
+URLconf, then serve one request. The child reports how long each phase
+took and which of the modules we expect to stay unloaded at boot slipped
+in; the parent parses the importtime log into per-module timings.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Boot to first response must stay under this on a warm disk cache. It is
+# deliberately generous so slow CI machines don't flake; the point is to
+# catch an import that drags in seconds of work, not milliseconds.
+STARTUP_BUDGET_SECONDS = 2.0
+
+# Heavy or rarely needed modules that must not be imported just by starting
+# a worker. numpy/scipy are only for the offline recommendation and related
+# post jobs; markdown2 is not used by the web process at all.
+LAZY_MODULES = ('numpy', 'scipy', 'markdown2', 'PIL')
+
+FIRST_REQUEST_PATH = '/'
+
+_CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {base_dir!r})
+os.environ['DJANGO_SETTINGS_MODULE'] = {settings!r}
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+booted = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+routed = time.perf_counter()
+from django.test import Client
+from django.test.utils import setup_test_environment
+setup_test_environment()
+status = Client().get({path!r}).status_code
+served = time.perf_counter()
+print(json.dumps({{
+    'setup': booted - started,
+    'urlconf': routed - booted,
+    'first_response': served - routed,
+    'total': served - started,
+    'status': status,
+    'loaded_lazy_modules': [name for name in {lazy!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(log):
+    """
+    Turn ``-X importtime`` output into ``[(module, self_us, cumulative_us)]``,
+    in import order.
+    """
+    modules = []
+    for line in log.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_startup(path=FIRST_REQUEST_PATH, settings_module=None):
+    """
+    Start the project in a child interpreter and return a dict with phase
+    timings in seconds (``setup``, ``urlconf``, ``first_response``, ``total``),
+    the first response's ``status``, ``loaded_lazy_modules`` and the parsed
+    ``imports``.
+    """
+    settings_module = settings_module or os.environ.get('DJANGO_SETTINGS_MODULE', 'blogging_platform_api.settings')
+    script = _CHILD.format(base_dir=str(BASE_DIR), settings=settings_module, path=path, lazy=LAZY_MODULES)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        capture_output=True, text=True, cwd=BASE_DIR, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Startup probe failed:\n{result.stderr[-2000:]}')
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['imports'] = parse_importtime(result.stderr)
+    return report
@@ -0,0 +1,21 @@
+from django import template
+from django.utils.html import format_html
+
+from accounts.images import VARIANTS, variant_urls
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar(profile, size='medium', alt=''):
+    """
+    ``<picture>`` for the ``size`` thumbnail of a profile's picture: WebP for
+    browsers that take it, JPEG otherwise. Empty if there is no picture.
+    """
+    urls = variant_urls(profile.picture).get(size)
+    if not urls:
+        return ''
+    return format_html(
+        '<picture><source srcset="{}" type="image/webp"><img src="{}" alt="{}" width="{}" height="{}" loading="lazy" style="object-fit: cover;"></picture>',
+        urls['webp'], urls['jpeg'], alt, VARIANTS[size], VARIANTS[size],
+    )
@@ -0,0 +1,48 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from accounts.single_flight import fetch
+
+register = template.Library()
+
+
+class SingleFlightCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on, version):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+        self.version = version
+
+    def render(self, context):
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(f'single_flight.{self.fragment_name}', vary_on)
+        version = self.version.resolve(context) if self.version else None
+        return fetch(key, lambda: self.nodelist.render(context), int(self.timeout.resolve(context)), version=version)
+
+
+@register.tag
+def single_flight_cache(parser, token):
+    """
+    Like ``{% cache %}``, but filled through accounts.single_flight: one
+    request renders a missing or expired fragment while the others wait for
+    it, or get the stale copy if there is one.
+
+    A trailing ``version=`` is kept in the entry rather than in the key, so a
+    new version is rendered once while the old one is still served::
+
+        {% single_flight_cache 86400 post_detail post.id version=post.updated_at %}
+            ...
+        {% endsingle_flight_cache %}
+    """
+    nodelist = parser.parse(('endsingle_flight_cache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    version = None
+    if bits[-1].startswith('version='):
+        version = parser.compile_filter(bits.pop().removeprefix('version='))
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a timeout and a fragment name.")
+    return SingleFlightCacheNode(
+        nodelist, parser.compile_filter(bits[1]), bits[2], [parser.compile_filter(bit) for bit in bits[3:]], version
+    )
@@ -193,3 +193,1839 @@ class PostCRUDTest(TestCase):
 
         self.assertEqual(response.status_code, 403)
         self.assertTrue(Post.objects.exists())
+
+
+#Related Posts Tests
+from io import StringIO
+from django.core.management import call_command
+from accounts.models import RelatedPost, Tag
+from unittest import mock
+from accounts.related import build_feature_matrix, refresh_related_posts
+
+class RelatedPostsTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='testuser', email='test@example.com')
+        self.tech = Category.objects.create(name='Technology')
+        self.food = Category.objects.create(name='Food')
+        python = Tag.objects.create(name='python')
+        django = Tag.objects.create(name='django')
+        baking = Tag.objects.create(name='baking')
+
+        self.django_post = self._post('Django querysets', 'Optimising django querysets and database indexes.', self.tech, [python, django])
+        self.orm_post = self._post('Django ORM tips', 'Database indexes make django querysets fast.', self.tech, [python, django])
+        self.bread_post = self._post('Sourdough bread', 'Baking bread with a sourdough starter.', self.food, [baking])
+        self.cake_post = self._post('Chocolate cake', 'Baking a cake without a starter.', self.food, [baking])
+
+    def _post(self, title, content, category, tags):
+        post = Post.objects.create(title=title, content=content, author=self.user, category=category, status='published')
+        post.tags.set(tags)
+        return post
+
+    def test_nearest_neighbour_shares_tags_and_category(self):
+        call_command('build_related_posts', '--full', stdout=StringIO())
+
+        top = RelatedPost.objects.filter(post=self.django_post).first()
+        self.assertEqual(top.related, self.orm_post)
+        self.assertFalse(RelatedPost.objects.filter(post=self.django_post, related=self.django_post).exists())
+        self.assertEqual(RelatedPost.objects.filter(post=self.bread_post).first().related, self.cake_post)
+
+    def test_incremental_refresh_only_recomputes_changed_posts(self):
+        refresh_related_posts(full=True)
+        self.assertFalse(Post.objects.filter(related_stale=True).exists())
+
+        listing = set(RelatedPost.objects.filter(related=self.cake_post).values_list('post_id', flat=True))
+        self.cake_post.title = 'Chocolate cake with django'
+        self.cake_post.save()
+
+        # The edited post, plus the posts whose lists it was in
+        self.assertEqual(listing, {self.bread_post.pk})
+        self.assertEqual(refresh_related_posts(), 2)
+        self.assertFalse(Post.objects.filter(related_stale=True).exists())
+
+    def test_incremental_refresh_recomputes_posts_listing_a_changed_post(self):
+        refresh_related_posts(full=True)
+        self.assertTrue(RelatedPost.objects.filter(post=self.bread_post, related=self.cake_post).exists())
+
+        self.cake_post.title = 'Django cache'
+        self.cake_post.content = 'Django querysets and database indexes.'
+        self.cake_post.category = self.tech
+        self.cake_post.save()
+        self.cake_post.tags.set(Tag.objects.filter(name='django'))
+        refresh_related_posts()
+
+        self.assertFalse(RelatedPost.objects.filter(post=self.bread_post, related=self.cake_post).exists())
+
+    def test_post_edited_during_a_refresh_stays_stale(self):
+        def build_then_edit():
+            built = build_feature_matrix()
+            self.cake_post.title = 'Chocolate cake with django'
+            self.cake_post.save()
+            return built
+
+        with mock.patch('accounts.related.build_feature_matrix', build_then_edit):
+            refresh_related_posts(full=True)
+
+        self.assertEqual(list(Post.objects.filter(related_stale=True)), [self.cake_post])
+
+    def test_related_endpoint_serves_stored_neighbours(self):
+        refresh_related_posts(full=True)
+        url = reverse('accounts:related-posts', kwargs={'pk': self.django_post.pk})
+
+        with self.assertNumQueries(1):
+            response = APIClient().get(url, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['id'], self.orm_post.pk)
+        self.assertEqual(response.data[0]['title'], 'Django ORM tips')
+
+
+#Trending Tests
+from datetime import timedelta
+from django.utils import timezone
+from accounts.models import PostLike, Comment
+from accounts.trending import recompute_trending_scores
+
+class TrendingScoreTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='testuser', email='test@example.com')
+        self.fans = [CustomUser.objects.create(username=f'fan{i}', email=f'fan{i}@example.com') for i in range(4)]
+        self.now = timezone.now()
+        self.old_post = Post.objects.create(title='Old', content='Old news', author=self.user, status='published', published_date=self.now - timedelta(days=30))
+        self.new_post = Post.objects.create(title='New', content='Fresh news', author=self.user, status='published', published_date=self.now - timedelta(hours=1))
+        self.draft = Post.objects.create(title='Draft', content='Unpublished', author=self.user, status='draft')
+
+        # The old post has more all-time engagement than the new one
+        for fan in self.fans:
+            PostLike.objects.create(post=self.old_post, user=fan)
+        PostLike.objects.create(post=self.new_post, user=self.fans[0])
+        Comment.objects.create(post=self.new_post, user=self.fans[1], content='Nice')
+
+    def test_recent_engagement_outranks_old_totals(self):
+        self.assertEqual(recompute_trending_scores(now=self.now), 2)
+
+        self.old_post.refresh_from_db()
+        self.new_post.refresh_from_db()
+        self.assertGreater(self.new_post.trending_score, self.old_post.trending_score)
+        self.assertAlmostEqual(self.new_post.trending_score, 3.0 * 0.5 ** (1 / 48), places=6)
+
+    def test_trending_endpoint_orders_by_score(self):
+        recompute_trending_scores(now=self.now)
+
+        response = APIClient().get(reverse('accounts:trending-posts'), format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.data['results']], [self.new_post.pk, self.old_post.pk])
+
+
+#Recommendation Tests
+from accounts.models import PostRating, Recommendation
+from accounts.recommendations import rebuild_recommendations
+
+class RecommendationTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.readers = [CustomUser.objects.create(username=f'reader{i}', email=f'reader{i}@example.com') for i in range(4)]
+        self.newcomer = CustomUser.objects.create(username='newcomer', email='newcomer@example.com')
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', content='Content', author=self.author, status='published')
+            for i in range(4)
+        ]
+        # Readers 0-2 all like posts 0 and 1; reader 3 only liked post 0
+        for reader in self.readers[:3]:
+            PostLike.objects.create(user=reader, post=self.posts[0])
+            PostLike.objects.create(user=reader, post=self.posts[1])
+        PostLike.objects.create(user=self.readers[3], post=self.posts[0])
+        PostRating.objects.create(user=self.readers[0], post=self.posts[2], rating=5)
+
+    def test_recommends_unseen_posts_liked_by_similar_users(self):
+        self.assertEqual(rebuild_recommendations(factors=2), 4)
+
+        recommended = list(Recommendation.objects.filter(user=self.readers[3]).values_list('post_id', flat=True))
+        self.assertEqual(recommended[0], self.posts[1].pk)
+        self.assertNotIn(self.posts[0].pk, recommended)
+
+    def test_endpoint_serves_stored_rows_and_falls_back_to_trending(self):
+        rebuild_recommendations(factors=2)
+        client = APIClient()
+
+        client.force_authenticate(self.readers[3])
+        response = client.get(reverse('accounts:recommendations'), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['id'], self.posts[1].pk)
+
+        Post.objects.filter(pk=self.posts[3].pk).update(trending_score=10)
+        client.force_authenticate(self.newcomer)
+        response = client.get(reverse('accounts:recommendations'), format='json')
+        self.assertEqual(response.data[0]['id'], self.posts[3].pk)
+
+
+#View Count Tests
+from unittest import mock
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import override_settings
+from accounts import view_counts
+from accounts.view_counts import flush_view_counts, pending_views, record_view
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=None)
+class ViewCountTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='testuser', email='test@example.com')
+        self.post = Post.objects.create(title='Viewed', content='Content', author=self.user, status='published')
+        self.other = Post.objects.create(title='Other', content='Content', author=self.user, status='published')
+        flush_view_counts()  # Start every test with an empty buffer
+
+    def test_views_are_buffered_then_flushed_in_one_statement(self):
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                record_view(self.post.pk)
+            record_view(self.other.pk)
+        self.assertEqual(pending_views()[self.post.pk], 3)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_view_counts(), 4)
+
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.post.views, self.other.views), (3, 1))
+        self.assertFalse(pending_views())
+
+    def test_post_detail_records_view(self):
+        self.client.get(reverse('accounts:post-retrieve-update-destroy', kwargs={'pk': self.post.pk}))
+        flush_view_counts()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    def test_saving_a_stale_post_keeps_flushed_views(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        for _ in range(5):
+            record_view(self.post.pk)
+        flush_view_counts()
+
+        stale.title = 'Renamed'
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.title, self.post.views), ('Renamed', 5))
+
+    def test_saving_a_stale_post_keeps_database_managed_columns(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        Post.objects.filter(pk=self.post.pk).update(trending_score=7.5)
+        self.post.soft_delete()
+
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        saved = Post.all_objects.get(pk=self.post.pk)
+        self.assertEqual((saved.title, saved.trending_score), ('Renamed', 7.5))
+        self.assertIsNotNone(saved.deleted_at)
+
+    def test_failed_flush_requeues_only_uncommitted_batches(self):
+        for _ in range(3):
+            record_view(self.post.pk)
+        record_view(self.other.pk)
+        real_update = QuerySet.update
+
+        def fail_after_first(queryset, **kwargs):
+            if not fail_after_first.called:
+                fail_after_first.called = True
+                return real_update(queryset, **kwargs)
+            raise DatabaseError('connection lost')
+        fail_after_first.called = False
+
+        with mock.patch.object(view_counts, 'FLUSH_BATCH_SIZE', 1), mock.patch.object(QuerySet, 'update', fail_after_first):
+            with self.assertRaises(DatabaseError):
+                flush_view_counts()
+        self.assertEqual(pending_views(), {self.other.pk: 1})
+
+        flush_view_counts()
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.post.views, self.other.views), (3, 1))
+
+
+#Interaction Ingestion Tests
+from accounts import interactions
+from accounts.interactions import Interaction, MicroBatcher, apply_interactions, like_post, rate_post
+from accounts.signals import post_stats_changed
+
+class InteractionIngestionTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='testuser', email='test@example.com')
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.post = Post.objects.create(title='Post', content='Content', author=self.author, status='published')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_like_and_rate_are_single_upserts(self):
+        # One upsert each, plus the updated_at bump that versions the post's cached fragments
+        with self.assertNumQueries(2):
+            self.assertEqual(like_post(self.user.pk, self.post.pk), interactions.CREATED)
+        with self.assertNumQueries(2):
+            rate_post(self.user.pk, self.post.pk, 2)
+        with self.assertNumQueries(2):
+            rate_post(self.user.pk, self.post.pk, 5)
+
+        self.assertEqual(like_post(self.user.pk, self.post.pk), interactions.EXISTS)
+        self.assertEqual(like_post(self.user.pk, 999999), interactions.NOT_FOUND)
+        self.assertEqual(PostRating.objects.get(user=self.user, post=self.post).rating, 5)
+
+    def test_like_unlike_rate_and_clear_endpoints(self):
+        like_url = reverse('accounts:like-post', kwargs={'pk': self.post.pk})
+        rate_url = reverse('accounts:rate-post', kwargs={'pk': self.post.pk})
+
+        self.assertEqual(self.client.post(like_url).status_code, 200)
+        self.assertEqual(self.client.post(like_url).status_code, 400)
+        self.assertEqual(self.client.delete(like_url).status_code, 200)
+        self.assertEqual(self.client.delete(like_url).status_code, 404)
+        self.assertEqual(self.client.post(rate_url, {'rating': 4}, format='json').status_code, 200)
+        self.assertEqual(self.client.delete(rate_url).status_code, 200)
+        self.assertFalse(PostLike.objects.exists() or PostRating.objects.exists())
+        self.assertEqual(self.client.post(reverse('accounts:like-post', kwargs={'pk': 999999})).status_code, 404)
+
+    def test_batch_endpoint_coalesces_actions(self):
+        other = Post.objects.create(title='Other', content='Content', author=self.author, status='published')
+        actions = [
+            {'action': 'like', 'post': self.post.pk},
+            {'action': 'rate', 'post': self.post.pk, 'rating': 2},
+            {'action': 'rate', 'post': self.post.pk, 'rating': 4},
+            {'action': 'like', 'post': other.pk},
+            {'action': 'unlike', 'post': other.pk},
+            {'action': 'like', 'post': 999999},
+        ]
+
+        response = self.client.post(reverse('accounts:interaction-batch'), {'actions': actions}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['result'] for result in response.data['results']],
+            ['created', 'updated', 'updated', 'not_found', 'not_found', 'not_found'],
+        )
+        self.assertEqual(list(PostLike.objects.values_list('post_id', flat=True)), [self.post.pk])
+        self.assertEqual(PostRating.objects.get(user=self.user).rating, 4)
+
+    def test_micro_batcher_applies_queued_actions_in_one_batch(self):
+        batcher = MicroBatcher(window=0)
+        self.assertEqual(batcher.submit(Interaction(self.user.pk, interactions.LIKE, self.post.pk)), interactions.CREATED)
+        self.assertEqual(batcher.submit(Interaction(self.user.pk, interactions.LIKE, self.post.pk)), interactions.EXISTS)
+        self.assertEqual(apply_interactions([Interaction(self.user.pk, interactions.CLEAR_RATING, self.post.pk)]), [interactions.NOT_FOUND])
+
+    def test_unlikes_and_clears_delete_without_per_row_signals(self):
+        posts = [Post.objects.create(title=f'Post {i}', content='Content', author=self.author, status='published') for i in range(5)]
+        for post in posts:
+            PostLike.objects.create(user=self.user, post=post)
+            PostRating.objects.create(user=self.user, post=post, rating=3)
+        with self.assertNumQueries(2):  # The delete and the updated_at bump
+            self.assertEqual(interactions.unlike_post(self.user.pk, posts[0].pk), interactions.DELETED)
+        with self.assertNumQueries(2):
+            self.assertEqual(interactions.clear_rating(self.user.pk, posts[0].pk), interactions.DELETED)
+        with self.assertNumQueries(1):
+            self.assertEqual(interactions.unlike_post(self.user.pk, posts[0].pk), interactions.NOT_FOUND)
+
+        batch = [Interaction(self.user.pk, interactions.UNLIKE, post.pk) for post in posts[1:]]
+        batch += [Interaction(self.user.pk, interactions.CLEAR_RATING, post.pk) for post in posts[1:]]
+        batch.append(Interaction(self.user.pk, interactions.UNLIKE, posts[0].pk))
+        received = []
+        receiver = lambda sender, post_ids, **kwargs: received.append(set(post_ids))
+        post_stats_changed.connect(receiver)
+        try:
+            # Existing posts, savepoint, liked and rated pairs, one delete each, the bump, release
+            with self.assertNumQueries(8):
+                outcomes = apply_interactions(batch)
+        finally:
+            post_stats_changed.disconnect(receiver)
+
+        self.assertEqual(outcomes, [interactions.DELETED] * 8 + [interactions.NOT_FOUND])
+        self.assertEqual(received, [{post.pk for post in posts[1:]}])
+        self.assertFalse(PostLike.objects.exists() or PostRating.objects.exists())
+
+
+#Analytics Tests
+import datetime
+from accounts.models import AuthorDailyStats, PostDailyStats, Subscription
+from accounts.analytics import aggregate_range, aggregate_since_checkpoint
+
+class AnalyticsRollupTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.readers = [CustomUser.objects.create(username=f'reader{i}', email=f'reader{i}@example.com') for i in range(3)]
+        self.post = Post.objects.create(title='Post', content='Content', author=self.author, status='published')
+        self.day1 = datetime.datetime(2024, 10, 1, 12, tzinfo=datetime.timezone.utc)
+        self.day2 = self.day1 + timedelta(days=1)
+
+        PostLike.objects.create(post=self.post, user=self.readers[0], created_at=self.day1)
+        PostLike.objects.create(post=self.post, user=self.readers[1], created_at=self.day2)
+        PostRating.objects.create(post=self.post, user=self.readers[0], rating=5, created_at=self.day1)
+        PostRating.objects.create(post=self.post, user=self.readers[1], rating=2, created_at=self.day1)
+        comment = Comment.objects.create(post=self.post, user=self.readers[2], content='Hi')
+        Comment.objects.filter(pk=comment.pk).update(created_at=self.day2)  # auto_now_add ignores values passed to create()
+        Subscription.objects.create(user=self.readers[2], author=self.author, created_at=self.day2)
+
+    def test_backfill_is_idempotent(self):
+        for _ in range(2):
+            aggregate_range(self.day1.date(), self.day2.date())
+
+        self.assertEqual(PostDailyStats.objects.count(), 2)
+        day1 = AuthorDailyStats.objects.get(author=self.author, day=self.day1.date())
+        self.assertEqual((day1.likes, day1.ratings, day1.rating_total, day1.comments), (1, 2, 7, 0))
+        day2 = AuthorDailyStats.objects.get(author=self.author, day=self.day2.date())
+        self.assertEqual((day2.likes, day2.comments, day2.new_subscribers), (1, 1, 1))
+
+    def test_incremental_run_picks_up_new_events(self):
+        aggregate_since_checkpoint(now=self.day2)
+        PostLike.objects.create(post=self.post, user=self.readers[2], created_at=self.day2 + timedelta(hours=1))
+        aggregate_since_checkpoint(now=self.day2 + timedelta(hours=2))
+
+        self.assertEqual(AuthorDailyStats.objects.get(day=self.day2.date()).likes, 2)
+
+    def test_endpoint_sums_rollups_for_a_range(self):
+        aggregate_range(self.day1.date(), self.day2.date())
+        client = APIClient()
+        client.force_authenticate(self.author)
+
+        response = client.get(reverse('accounts:author-analytics'), {'start': '2024-10-01', 'end': '2024-10-02'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals']['likes'], 2)
+        self.assertEqual(response.data['totals']['new_subscribers'], 1)
+        self.assertEqual(response.data['totals']['average_rating'], 3.5)
+        self.assertEqual(len(response.data['daily']), 2)
+        self.assertEqual(response.data['posts'][0]['post'], self.post.pk)
+
+
+#Scheduled Publishing Tests
+from django.core import mail
+from accounts.models import DigestEntry, Subscription
+from accounts.scheduler import publish_due_posts, run_scheduler
+from accounts.signals import post_published
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+class ScheduledPublishingTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        Subscription.objects.create(user=self.reader, author=self.author)
+        self.clock = FakeClock(timezone.now())
+        self.post = Post.objects.create(
+            title='Later', content='Content', author=self.author, status='published',
+            published_date=self.clock.now + timedelta(minutes=5),
+        )
+        self.announced = []
+        post_published.connect(self._record, dispatch_uid='scheduled-publishing-test')
+        self.addCleanup(post_published.disconnect, dispatch_uid='scheduled-publishing-test')
+
+    def _record(self, sender, post, **kwargs):
+        self.announced.append(post.pk)
+
+    def test_future_post_is_scheduled_and_hidden(self):
+        self.assertEqual(self.post.status, 'scheduled')
+        self.assertFalse(Post.objects.visible(now=self.clock.now).exists())
+
+    def test_scheduler_publishes_due_posts_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            run_scheduler(interval=60, iterations=7, clock=self.clock, sleep=self.clock.sleep)
+            # A later tick finds nothing left to publish
+            publish_due_posts(now=self.clock.now)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, 'published')
+        self.assertEqual(self.announced, [self.post.pk])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertTrue(Post.objects.visible(now=self.clock.now).exists())
+
+    def test_posts_not_yet_due_stay_scheduled(self):
+        run_scheduler(interval=60, iterations=2, clock=self.clock, sleep=self.clock.sleep)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, 'scheduled')
+
+    def test_scheduled_posts_stay_out_of_top_lists(self):
+        live = Post.objects.create(title='Live', content='Content', author=self.author, status='published')
+        PostRating.objects.create(post=self.post, user=self.reader, rating=5)
+        self.post.likes.add(self.reader)
+        for name in ('top-rated-posts', 'top-liked-posts'):
+            anonymous = self.client.get(reverse(f'accounts:{name}')).json()
+            self.client.force_login(self.reader)
+            signed_in = self.client.get(reverse(f'accounts:{name}')).json()
+            self.client.logout()
+            self.assertEqual([post['id'] for post in anonymous], [live.pk], name)
+            self.assertEqual([post['id'] for post in signed_in], [live.pk], name)
+
+    def test_scheduled_posts_are_listed_with_drafts(self):
+        Post.objects.create(title='Unfinished', content='Content', author=self.author)
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('accounts:draft-posts'))
+        self.assertEqual(sorted(post['title'] for post in response.json()), ['Later', 'Unfinished'])
+
+    def test_uncategorized_post_reaches_only_its_followers(self):
+        other = CustomUser.objects.create(username='other', email='other@example.com')
+        stranger = CustomUser.objects.create(username='stranger', email='stranger@example.com')
+        Subscription.objects.create(user=stranger, author=other, delivery=Subscription.DAILY)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='Now', content='Content', author=self.author, status='published')
+
+        self.assertEqual([message.to for message in mail.outbox], [['reader@example.com']])
+        self.assertNotIn('category', mail.outbox[0].body)
+        self.assertFalse(DigestEntry.objects.filter(user=stranger).exists())
+
+
+#Compressed Content Tests
+from django.db import connection
+from accounts.compression import recompress, train_and_store
+from accounts.fields import RAW, ZLIB, ZLIB_DICT, reset_dictionary_cache
+from accounts.serializers import PostSerializer, PostSummarySerializer
+
+class CompressedContentTest(TestCase):
+    def setUp(self):
+        reset_dictionary_cache()
+        self.addCleanup(reset_dictionary_cache)
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.body = '<p>Derma rollers can help smooth out skin texture.</p> ' * 40
+        self.post = Post.objects.create(title='Long read', content=self.body, author=self.author, status='published')
+
+    def stored_bytes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT content FROM accounts_post WHERE id = %s', [self.post.pk])
+            return bytes(cursor.fetchone()[0])
+
+    def test_round_trip_is_transparent(self):
+        self.assertEqual(Post.objects.get(pk=self.post.pk).content, self.body)
+        self.assertEqual(PostSerializer(Post.objects.get(pk=self.post.pk)).data['content'], self.body)
+        stored = self.stored_bytes()
+        self.assertEqual(stored[0], ZLIB)
+        self.assertLess(len(stored), len(self.body) // 5)
+
+    def test_short_values_are_stored_raw(self):
+        comment = Comment.objects.create(user=self.author, post=self.post, content='great tip')
+        self.assertEqual(Comment.objects.get(pk=comment.pk).content, 'great tip')
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT content FROM accounts_comment WHERE id = %s', [comment.pk])
+            self.assertEqual(bytes(cursor.fetchone()[0]), bytes([RAW]) + b'great tip')
+
+    def test_trained_dictionary_keeps_old_rows_readable(self):
+        train_and_store()
+        recompress(Post, 'content')
+        self.assertEqual(self.stored_bytes()[0], ZLIB_DICT)
+        train_and_store()  # A newer dictionary must not break rows written with the previous one
+        self.assertEqual(Post.objects.get(pk=self.post.pk).content, self.body)
+
+    def test_excerpt_is_stored_and_served_to_lists(self):
+        self.assertTrue(self.post.excerpt.startswith('Derma rollers can help'))
+        self.assertNotIn('<p>', self.post.excerpt)
+        self.assertLessEqual(len(self.post.excerpt), 280)
+        data = PostSummarySerializer(Post.objects.defer('content').get(pk=self.post.pk)).data
+        self.assertNotIn('content', data)
+        self.assertEqual(data['excerpt'], self.post.excerpt)
+
+    def test_search_reads_the_whole_body(self):
+        Post.objects.filter(pk=self.post.pk).delete()
+        post = Post.objects.create(title='Long read', content=self.body + '<p>Try microneedling last.</p>', author=self.author, status='published')
+        self.assertNotIn('microneedling', post.excerpt)
+
+        response = self.client.get(reverse('accounts:posts-by-author', args=[self.author.pk]), {'search': 'MICRONEEDLING'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [post.pk])
+        response = self.client.get(reverse('accounts:post-list-create'), {'search': 'microneedling'})
+        self.assertContains(response, 'Long read')
+        self.assertNotContains(self.client.get(reverse('accounts:post-list-create'), {'search': 'retinol'}), 'Long read')
+
+        admin = CustomUser.objects.create_superuser(username='admin', email='admin@example.com', password='s3cret-pass')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:accounts_post_changelist'), {'q': 'microneedling'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+#Search Index Tests
+import io
+from django.core.management import call_command
+from accounts import search
+from accounts.reaper import reap_pending
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.post = Post.objects.create(
+            title='Routine', content='<p>Apply <em>Hyaluronic</em> serum before moisturiser.</p>', author=self.author, status='published',
+        )
+        self.other = Post.objects.create(title='Other', content='Sunscreen every morning.', author=self.author, status='published')
+
+    def found(self, query):
+        return set(Post.objects.filter(search.matching(query)).values_list('pk', flat=True))
+
+    def index_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT post_id FROM accounts_post_search ORDER BY post_id')
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_words_match_as_case_insensitive_prefixes(self):
+        self.assertEqual(self.found('HYALURON serum'), {self.post.pk})
+        self.assertEqual(self.found('serum sunscreen'), set())
+        self.assertEqual(self.found('em'), set())  # Markup isn't indexed
+        self.assertEqual(self.found('"*) OR NOT ('), set())
+
+    def test_edits_replace_the_indexed_body(self):
+        self.post.content = 'Retinol at night only.'
+        self.post.save()
+        self.assertEqual(self.found('hyaluronic'), set())
+        self.assertEqual(self.found('retinol night'), {self.post.pk})
+
+        Post.objects.get(pk=self.post.pk).save(update_fields=['title'])
+        Post.objects.defer('content').get(pk=self.post.pk).save()  # Neither writes the body
+        self.assertEqual(self.found('retinol'), {self.post.pk})
+
+    def test_deleted_posts_leave_the_index(self):
+        self.post.soft_delete()
+        self.assertEqual(reap_pending(), 1)
+        self.assertEqual(self.index_rows(), [self.other.pk])
+
+    def test_rebuild_reindexes_every_post(self):
+        self.post.content = 'Retinol at night only.'
+        self.post.save()
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM accounts_post_search WHERE post_id = %s', [self.other.pk])
+
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+
+        self.assertIn('Indexed 2 posts', out.getvalue())
+        self.assertEqual(self.index_rows(), [self.post.pk, self.other.pk])
+        self.assertEqual(self.found('sunscreen'), {self.other.pk})
+        self.assertEqual(self.found('hyaluronic'), set())
+
+
+#Fast Read Path Tests
+import orjson
+from rest_framework.renderers import JSONRenderer
+from accounts.interactions import VIEWER_FIELDS
+from accounts.models import Category, Tag
+from accounts.renderers import ORJSONRenderer
+
+class FastPathParityTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.category = Category.objects.create(name='Beauty')
+        tags = [Tag.objects.create(name='skin'), Tag.objects.create(name='café')]
+        for i in range(3):
+            post = Post.objects.create(
+                title=f'Post {i} – ünïcode', content=f'Body {i} ' * 30, author=self.author,
+                category=self.category, status='published', published_date=timezone.now() - timedelta(days=i),
+                trending_score=i,
+            )
+            post.tags.set(tags[:i])
+            for rating, user in enumerate([self.author, self.reader][:i], start=3):
+                PostRating.objects.create(post=post, user=user, rating=rating)
+            if i:
+                PostLike.objects.create(post=post, user=self.reader)
+                parent = Comment.objects.create(user=self.reader, post=post, content='First!')
+                Comment.objects.create(user=self.author, post=post, content='Thanks', parent_comment=parent)
+                Comment.objects.create(user=self.author, post=post, content='Later comment')
+
+    def assert_parity(self, url):
+        fast = self.client.get(url)
+        self.client.force_login(self.reader)
+        slow = self.client.get(url)
+        self.client.logout()
+        self.assertEqual(fast.status_code, 200)
+        # Logged-in responses also carry the viewer's own state; everything else is byte-identical
+        slow_data = slow.json()
+        for row in slow_data['results'] if isinstance(slow_data, dict) else slow_data:
+            for field in VIEWER_FIELDS:
+                row.pop(field)
+        self.assertEqual(fast.content, orjson.dumps(slow_data))
+        return fast
+
+    def test_fast_path_matches_serializer_bytes(self):
+        for url in [
+            reverse('accounts:posts-by-category', args=[self.category.pk]),
+            reverse('accounts:posts-by-author', args=[self.author.pk]),
+            reverse('accounts:trending-posts'),
+            reverse('accounts:top-rated-posts'),
+            reverse('accounts:top-liked-posts'),
+        ]:
+            with self.subTest(url=url):
+                self.assert_parity(url)
+
+    def test_fast_path_uses_constant_queries(self):
+        url = reverse('accounts:posts-by-author', args=[self.author.pk])
+        with self.assertNumQueries(5):  # count, page ids, tags, comments, posts
+            response = self.client.get(url)
+        self.assertEqual(response.json()['count'], 3)
+
+    def test_orjson_renderer_matches_drf_json_renderer(self):
+        self.client.force_login(self.reader)
+        data = self.client.get(reverse('accounts:trending-posts')).data
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_orjson_renderer_matches_line_separators_and_indents(self):
+        data = {'title': 'Line\u2028break\u2029here', 'tags': ['café', 1]}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        for media_type, context in [('application/json; indent=4', {}), ('application/json', {'indent': 4})]:
+            with self.subTest(media_type=media_type, context=context):
+                self.assertEqual(
+                    ORJSONRenderer().render(data, media_type, context),
+                    JSONRenderer().render(data, media_type, context),
+                )
+
+
+#Batch Read Tests
+from accounts import fast_path
+
+class BatchReadTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', content='Body', author=self.author, status='published')
+            for i in range(3)
+        ]
+        self.draft = Post.objects.create(title='Draft', content='Body', author=self.author, status='draft')
+        self.comment = Comment.objects.create(user=self.reader, post=self.posts[0], content='Nice')
+        self.reply = Comment.objects.create(user=self.author, post=self.posts[0], content='Thanks', parent_comment=self.comment)
+        self.hidden_comment = Comment.objects.create(user=self.reader, post=self.draft, content='Early')
+
+    def get_batch(self, name, ids):
+        return self.client.get(reverse(f'accounts:{name}'), {'ids': ','.join(map(str, ids))})
+
+    def test_posts_follow_request_order_with_not_found_markers(self):
+        ids = [self.posts[2].pk, 999, self.posts[0].pk, self.draft.pk]
+        with self.assertNumQueries(4):  # readable ids, tags, comments, posts
+            response = self.get_batch('post-batch', ids)
+        results = response.json()['results']
+        self.assertEqual([row['id'] for row in results], ids)
+        self.assertEqual(results[0]['title'], 'Post 2')
+        self.assertEqual(results[1], {'id': 999, 'error': 'not_found'})
+        self.assertEqual(results[2]['comments'][0]['replies'][0]['content'], 'Thanks')
+        self.assertEqual(results[3], {'id': self.draft.pk, 'error': 'not_found'})
+
+    def test_authors_can_batch_read_their_drafts(self):
+        self.client.force_login(self.author)
+        results = self.get_batch('post-batch', [self.draft.pk]).json()['results']
+        self.assertEqual(results[0]['title'], 'Draft')
+
+    def test_comments_batch_hides_comments_on_hidden_posts(self):
+        results = self.get_batch('comment-batch', [self.reply.pk, self.hidden_comment.pk, self.comment.pk]).json()['results']
+        self.assertEqual(results[0]['content'], 'Thanks')
+        self.assertEqual(results[1]['error'], 'not_found')
+        self.assertEqual(results[2]['replies'][0]['id'], self.reply.pk)
+
+    def test_comments_batch_loads_only_the_requested_threads(self):
+        deep = Comment.objects.create(user=self.reader, post=self.posts[0], content='Deeper', parent_comment=self.reply)
+        Comment.objects.bulk_create([Comment(user=self.reader, post=self.posts[0], content=f'Other {i}') for i in range(20)])
+        real_nest, loaded = fast_path._nest, []
+
+        def nest(rows):
+            rows = list(rows)
+            loaded.extend(row[0] for row in rows)
+            return real_nest(rows)
+
+        with mock.patch.object(fast_path, '_nest', nest), self.assertNumQueries(2):  # Readable ids, then the threads
+            results = self.get_batch('comment-batch', [self.comment.pk]).json()['results']
+        self.assertEqual(results[0]['replies'][0]['replies'][0]['id'], deep.pk)
+        self.assertEqual(sorted(loaded), [self.comment.pk, self.reply.pk, deep.pk])
+
+        tree = fast_path.comment_subtrees([self.comment.pk], limit=2)
+        self.assertEqual(tree[self.comment.pk]['replies'][0]['replies'], [])  # The deepest reply is past the cap
+
+    def test_profiles_batch(self):
+        results = self.get_batch('profile-batch', [self.reader.pk, 999]).json()['results']
+        self.assertEqual(results[0]['username'], 'reader')
+        self.assertNotIn('email', results[0])
+        self.assertEqual(results[1]['error'], 'not_found')
+
+    def test_batch_size_is_limited(self):
+        self.assertEqual(self.get_batch('post-batch', range(1, 300)).status_code, 400)
+        self.assertEqual(self.get_batch('post-batch', []).status_code, 400)
+
+
+#Template Fragment Cache Tests
+from django.core.cache import cache
+from accounts.models import touch_posts
+
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(flush_view_counts)  # Page hits are buffered; don't leak them into other tests
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.post = Post.objects.create(title='Cached title', content='Body', author=self.author, status='published')
+        self.url = reverse('accounts:post-retrieve-update-destroy', args=[self.post.pk])
+
+    def test_fragment_is_reused_until_the_post_changes(self):
+        self.assertContains(self.client.get(self.url), 'Cached title')
+        # A queryset update does not bump the version, so the cached card is served
+        Post.objects.filter(pk=self.post.pk).update(title='Silently changed')
+        self.assertContains(self.client.get(self.url), 'Cached title')
+
+        touch_posts([self.post.pk])
+        self.assertContains(self.client.get(self.url), 'Silently changed')
+
+    def test_likes_and_comments_invalidate_the_fragments(self):
+        self.client.get(self.url)
+        like_post(self.reader.pk, self.post.pk)
+        self.assertContains(self.client.get(self.url), '<strong>Likes:</strong> 1', html=False)
+
+        Comment.objects.create(user=self.reader, post=self.post, content='Fresh comment')
+        self.assertContains(self.client.get(self.url), 'Fresh comment')
+
+    def test_per_viewer_controls_stay_outside_the_cache(self):
+        self.client.force_login(self.author)
+        self.assertContains(self.client.get(self.url), 'Edit Post')
+        self.client.force_login(self.reader)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'Edit Post')
+        self.assertContains(response, 'Rate this post')
+
+    def test_category_sidebar_is_versioned(self):
+        list_url = reverse('accounts:post-list-create')
+        self.client.get(list_url)
+        Category.objects.create(name='Brand new category')
+        self.assertContains(self.client.get(list_url), 'Brand new category')
+
+
+#Startup Tests
+from django.test import SimpleTestCase
+from .startup import LAZY_MODULES, STARTUP_BUDGET_SECONDS, measure_startup, parse_importtime
+
+
+class StartupBudgetTest(SimpleTestCase):
+    def test_cold_start_stays_within_budget(self):
+        report = measure_startup()
+        self.assertEqual(report['status'], 200)
+        self.assertLess(report['total'], STARTUP_BUDGET_SECONDS,
+                        f"Cold start took {report['total']:.2f}s; run `manage.py benchmark_startup` to see why")
+        self.assertEqual(report['loaded_lazy_modules'], [], f"Expected {LAZY_MODULES} to stay unloaded at boot")
+        self.assertIn('accounts.views', [name for name, self_us, cumulative_us in report['imports']])
+
+    def test_parse_importtime(self):
+        log = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:        80 |        200 | json\n"
+        )
+        self.assertEqual(parse_importtime(log), [('json.decoder', 120, 120), ('json', 80, 200)])
+
+
+#Viewer State Tests
+from django.test.utils import CaptureQueriesContext
+from accounts.interactions import viewer_state
+
+class ViewerStateTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.category = Category.objects.create(name='Beauty')
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', content='Body', author=self.author, category=self.category,
+                                status='published', trending_score=i)
+            for i in range(4)
+        ]
+        PostLike.objects.create(post=self.posts[0], user=self.reader)
+        PostRating.objects.create(post=self.posts[1], user=self.reader, rating=4)
+        Subscription.objects.create(user=self.reader, author=self.author)
+
+    def test_state_is_resolved_with_one_query_per_relation(self):
+        keys = [(post.pk, post.author_id, post.category_id) for post in self.posts]
+        with self.assertNumQueries(4):
+            state = viewer_state(self.reader.pk, keys)
+        self.assertEqual(state[self.posts[0].pk], {
+            'liked_by_me': True, 'my_rating': None, 'following_author': True, 'following_category': False,
+        })
+        self.assertEqual(state[self.posts[1].pk]['my_rating'], 4)
+        self.assertEqual(viewer_state(self.reader.pk, []), {})
+
+    def test_list_endpoints_include_state_for_logged_in_users(self):
+        self.client.force_login(self.reader)
+        rows = {row['id']: row for row in self.client.get(reverse('accounts:trending-posts')).json()['results']}
+        self.assertTrue(rows[self.posts[0].pk]['liked_by_me'])
+        self.assertFalse(rows[self.posts[1].pk]['liked_by_me'])
+        self.assertEqual(rows[self.posts[1].pk]['my_rating'], 4)
+        self.assertTrue(all(row['following_author'] for row in rows.values()))
+
+        batch = self.client.get(reverse('accounts:post-batch'), {'ids': f'{self.posts[1].pk}'}).json()['results']
+        self.assertEqual(batch[0]['my_rating'], 4)
+
+    def test_follow_lookups_do_not_grow_with_the_page(self):
+        self.client.force_login(self.reader)
+        url = reverse('accounts:posts-by-category', args=[self.category.pk])
+
+        def subscription_queries(**params):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url, params)
+            return len([query for query in queries if 'accounts_subscription' in query['sql']])
+
+        self.assertEqual(subscription_queries(page_size=1), subscription_queries(page_size=4))
+
+    def test_anonymous_users_get_no_state(self):
+        row = self.client.get(reverse('accounts:trending-posts')).json()['results'][0]
+        self.assertFalse(set(VIEWER_FIELDS) & set(row))
+
+    def test_detail_page_shows_the_viewers_like(self):
+        self.client.force_login(self.reader)
+        url = reverse('accounts:post-retrieve-update-destroy', args=[self.posts[0].pk])
+        self.assertContains(self.client.get(url), 'Unlike')
+
+
+#Live Event Tests
+from asgiref.sync import sync_to_async
+from django.test import override_settings
+from accounts import events
+from accounts.interactions import like_post
+
+class LiveEventsTest(TestCase):
+    def setUp(self):
+        events.reset_broker()
+        self.addCleanup(events.reset_broker)
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.post = Post.objects.create(title='Live', content='Body', author=self.author, status='published')
+        self.url = reverse('accounts:post-events', args=[self.post.pk])
+
+    async def test_resume_replays_from_the_ring_buffer(self):
+        broker = events.EventBroker(buffer_size=3)
+        published = [broker.publish('post', 'stats', {'n': n}) for n in range(5)]
+        async with broker.listen('post', last_event_id=published[2].id) as listener:
+            self.assertEqual([(await listener.next(0)).data for _ in range(2)], [{'n': 3}, {'n': 4}])
+            self.assertIsNone(await listener.next(0.01))
+        # Event 1 has been overwritten, so resuming from event 0 can't be served
+        async with broker.listen('post', last_event_id=published[0].id) as listener:
+            self.assertEqual(await listener.next(0), events.RESET)
+        self.assertEqual(broker.listener_count(), 0)
+
+    async def test_live_events_reach_listeners(self):
+        broker = events.EventBroker()
+        async with broker.listen('post') as listener:
+            await sync_to_async(broker.publish)('post', 'stats', {'likes_count': 1})
+            event = await listener.next(1)
+        self.assertEqual(event.data, {'likes_count': 1})
+        self.assertEqual(events.format_event(event), f'id: {event.id}\nevent: stats\ndata: {{"likes_count":1}}\n\n')
+
+    async def test_comments_and_likes_publish_deltas(self):
+        def write():
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(user=self.reader, post=self.post, content='Nice post')
+            with self.captureOnCommitCallbacks(execute=True):
+                like_post(self.reader.pk, self.post.pk)  # Raw SQL, announced via post_stats_changed
+
+        async with events.get_broker().listen(self.post.pk) as listener:
+            await sync_to_async(write)()
+            comment, stats = await listener.next(1), await listener.next(1)
+        self.assertEqual((comment.type, comment.data['content'], comment.data['user']),
+                         ('comment', 'Nice post', 'reader@example.com'))
+        self.assertEqual((stats.type, stats.data), ('stats', {'likes_count': 1, 'average_rating': None}))
+
+    def test_nothing_is_built_without_listeners(self):
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(0):
+            events.publish_stats(PostLike, PostLike(post=self.post, user=self.reader))
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    async def test_stream_endpoint(self):
+        broker = events.get_broker()
+        missed = await sync_to_async(broker.publish)(self.post.pk, 'stats', {'likes_count': 3})
+        response = await self.async_client.get(self.url, headers={'Last-Event-ID': str(missed.id - 1)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        self.assertIn(b'data: {"likes_count":3}', await anext(stream))
+        await stream.aclose()
+
+        missing = reverse('accounts:post-events', args=[self.post.pk + 100])
+        self.assertEqual((await self.async_client.get(missing)).status_code, 404)
+
+    def test_wsgi_requests_are_refused(self):
+        self.assertEqual(self.client.get(self.url).status_code, 501)
+
+
+#Soft Delete Tests
+from accounts.models import DeletionJob, RelatedPost
+from accounts.reaper import reap_pending
+
+class SoftDeleteTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.post = Post.objects.create(title='Doomed', content='Body', author=self.author, status='published')
+        self.other = Post.objects.create(title='Survivor', content='Body', author=self.reader, status='published')
+        parent = Comment.objects.create(user=self.reader, post=self.post, content='Top')
+        reply = Comment.objects.create(user=self.author, post=self.post, content='Reply', parent_comment=parent)
+        Comment.objects.create(user=self.reader, post=self.post, content='Deeper', parent_comment=reply)
+        PostLike.objects.create(post=self.post, user=self.reader)
+        PostRating.objects.create(post=self.post, user=self.reader, rating=5)
+        RelatedPost.objects.create(post=self.other, related=self.post, score=1, rank=1)
+        # The author's activity on someone else's post
+        Comment.objects.create(user=self.author, post=self.other, content='Nice')
+        PostLike.objects.create(post=self.other, user=self.author)
+
+    def test_soft_deleted_post_disappears_at_once(self):
+        self.post.soft_delete()
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(Comment.all_objects.filter(post=self.post).count(), 3)  # Still there until reaped
+        self.assertFalse(Comment.objects.filter(post=self.post).exists())
+        self.assertFalse(PostLike.objects.filter(post=self.post).exists())
+        self.assertEqual(self.client.get(reverse('accounts:related-posts', args=[self.other.pk])).json(), [])
+        self.assertEqual(like_post(self.author.pk, self.post.pk), 'not_found')
+        self.assertEqual(self.client.get(reverse('accounts:comment-list-create', args=[self.post.pk])).json(), [])
+
+    def test_reaper_deletes_dependents_in_chunks(self):
+        self.post.soft_delete()
+        chunks = []
+        self.assertEqual(reap_pending(chunk_size=1, on_chunk=lambda model, rows, seconds: chunks.append(model)), 1)
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(Comment.all_objects.filter(post_id=self.post.pk).exists())
+        self.assertFalse(PostLike.all_objects.filter(post_id=self.post.pk).exists())
+        self.assertFalse(RelatedPost.objects.exists())
+        self.assertEqual(chunks.count(Comment), 3)  # Deepest reply first, one row per transaction
+        self.assertEqual(chunks[-1], Post)
+        job = DeletionJob.objects.get()
+        self.assertEqual((job.rows_deleted, job.chunks), (len(chunks), len(chunks)))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(Comment.objects.filter(post=self.other).count(), 1)
+
+    def test_soft_deleted_user_and_their_activity_are_reaped(self):
+        before = Post.objects.get(pk=self.other.pk).updated_at
+        self.author.soft_delete()
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+        # Hidden from other people's posts before the reaper runs
+        self.assertGreater(Post.objects.get(pk=self.other.pk).updated_at, before)  # Cached fragments re-render
+        self.assertEqual(self.client.get(reverse('accounts:comment-list-create', args=[self.other.pk])).json(), [])
+        self.assertEqual(Post.objects.get(pk=self.other.pk).likes_count(), 0)
+
+        reap_pending()
+        self.assertFalse(CustomUser.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(list(Comment.all_objects.filter(post=self.other).values_list('content', flat=True)), [])
+        self.assertFalse(PostLike.all_objects.filter(post=self.other).exists())
+
+
+#Revision Tests
+from django.test import override_settings
+from accounts.models import PostRevision
+from accounts.revisions import apply_delta, make_delta, rebuild
+
+@override_settings(REVISION_SNAPSHOT_INTERVAL=3)
+class RevisionTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.post = Post.objects.create(title='v1', content='First. Second.\nThird!', author=self.author)
+        self.versions = [('v1', self.post.content)]
+        for number in range(2, 8):
+            self.post.title = f'v{number}'
+            self.post.content = self.post.content.replace('Second.', f'Second {number}.') + f' Extra {number}.'
+            self.post.save()
+            self.versions.append((self.post.title, self.post.content))
+
+    def test_delta_round_trip(self):
+        old, new = 'One. Two. Three.', 'One. Deux. Three. Four.'
+        self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+        self.assertEqual(apply_delta(new, make_delta(new, '')), '')
+
+    def test_every_version_rebuilds_from_snapshots_and_deltas(self):
+        revisions = list(PostRevision.objects.filter(post=self.post))
+        self.assertEqual([revision.is_snapshot for revision in revisions], [True, False, False, True, False, False, True])
+        for number, version in enumerate(self.versions, start=1):
+            with self.assertNumQueries(1):
+                self.assertEqual(rebuild(self.post.pk, number), version)
+
+    def test_unchanged_save_records_nothing(self):
+        self.post.save()
+        self.post.save(update_fields=['status'])
+        self.assertEqual(PostRevision.objects.filter(post=self.post).count(), 7)
+
+    def test_endpoint_is_private_to_the_author(self):
+        url = reverse('accounts:post-revision-detail', args=[self.post.pk, 5])
+        self.client.force_login(CustomUser.objects.create(username='other', email='other@example.com'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.author)
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual((response.json()['title'], response.json()['content']), self.versions[4])
+        listing = self.client.get(reverse('accounts:post-revisions', args=[self.post.pk]), HTTP_ACCEPT='application/json').json()
+        numbers = [revision['number'] for revision in listing]
+        self.assertEqual(numbers, [7, 6, 5, 4, 3, 2, 1])
+
+    def test_prune_keeps_recent_versions_rebuildable(self):
+        call_command('prune_revisions', keep_last=2, days=0, stdout=StringIO())
+        self.assertEqual(list(PostRevision.objects.filter(post=self.post).values_list('number', 'is_snapshot')), [(6, True), (7, True)])
+        self.assertEqual(rebuild(self.post.pk, 6), self.versions[5])
+        self.assertEqual(rebuild(self.post.pk, 7), self.versions[6])
+
+
+#Digest Tests
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from accounts.digests import send_digests
+from accounts.models import DigestEntry, DigestMark
+
+class FlakyBackend(LocmemBackend):
+    """Delivers the first ``budget`` messages of a run, then fails like a dropped SMTP connection."""
+    budget = None
+
+    def send_messages(self, messages):
+        if FlakyBackend.budget is not None:
+            if FlakyBackend.budget < len(messages):
+                raise ConnectionError('relay went away')
+            FlakyBackend.budget -= len(messages)
+        return super().send_messages(messages)
+
+class DigestTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.category = Category.objects.create(name='Skin')
+        self.readers = [CustomUser.objects.create(username=f'reader{i}', email=f'reader{i}@example.com') for i in range(3)]
+        Subscription.objects.create(user=self.readers[0], author=self.author)
+        for reader in self.readers[1:]:
+            Subscription.objects.create(user=reader, author=self.author, delivery=Subscription.HOURLY)
+        # Subscribed both ways: the faster mode wins and the post is listed once
+        Subscription.objects.create(user=self.readers[2], category=self.category, delivery=Subscription.DAILY)
+
+    def publish(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                Post.objects.create(title=f'Post {i}', content='Body', author=self.author, category=self.category, status='published')
+
+    def test_immediate_subscribers_are_emailed_and_the_rest_queued(self):
+        self.publish(2)
+        self.assertEqual([message.to for message in mail.outbox], [['reader0@example.com']] * 2)
+        self.assertEqual(DigestEntry.objects.filter(delivery=Subscription.HOURLY).count(), 4)
+        self.assertFalse(DigestEntry.objects.filter(delivery=Subscription.DAILY).exists())
+
+    def test_one_digest_per_user_per_period(self):
+        self.publish(3)
+        mail.outbox.clear()
+        now = timezone.now()
+        with self.assertNumQueries(6):  # Due users, pending rows, one mark per user, cleanup, no more due users
+            self.assertEqual(send_digests(Subscription.HOURLY, now=now), 2)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['reader1@example.com', 'reader2@example.com'])
+        self.assertEqual(mail.outbox[0].body.count('Post '), 3)
+        self.assertFalse(DigestEntry.objects.exists())
+
+        self.publish(1)
+        self.assertEqual(send_digests(Subscription.HOURLY, now=now + timedelta(minutes=30)), 0)
+        self.assertEqual(send_digests(Subscription.HOURLY, now=now + timedelta(hours=1)), 2)
+
+    @override_settings(EMAIL_BACKEND='accounts.tests.FlakyBackend')
+    def test_crashed_run_resumes_without_repeating(self):
+        self.publish(2)
+        mail.outbox.clear()
+        FlakyBackend.budget = 1
+        self.addCleanup(setattr, FlakyBackend, 'budget', None)
+        with self.assertRaises(ConnectionError):
+            send_digests(Subscription.HOURLY)
+        self.assertEqual(DigestMark.objects.count(), 1)
+
+        FlakyBackend.budget = None
+        self.assertEqual(send_digests(Subscription.HOURLY), 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['reader1@example.com', 'reader2@example.com'])
+
+
+#Profile Picture Tests
+import io
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from accounts.images import process_pending
+from accounts.models import Profile, StoredImage
+from accounts.serializers import PublicProfileSerializer
+
+def photo(size=(1200, 900), color=(200, 80, 40), image_format='JPEG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    return buffer.getvalue()
+
+class ProfilePictureTest(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.users = [CustomUser.objects.create(username=f'user{i}', email=f'user{i}@example.com') for i in range(2)]
+
+    def upload(self, user, data, name='me.jpg'):
+        self.client.force_login(user)
+        return self.client.post(reverse('accounts:profile'), {'bio': 'Hi', 'profile_picture': SimpleUploadedFile(name, data)})
+
+    def test_identical_uploads_are_stored_once(self):
+        data = photo()
+        for user in self.users:
+            self.assertEqual(self.upload(user, data).status_code, 200)
+        image = StoredImage.objects.get()
+        self.assertEqual((image.width, image.height), (1200, 900))
+        self.assertEqual(Profile.objects.filter(picture=image).count(), 2)
+        self.assertEqual(default_storage.listdir(f'images/{image.sha256[:2]}/{image.sha256}')[1], ['original.jpg'])
+        self.assertEqual(Profile.objects.get(user=self.users[1]).profile_picture.name, image.original)
+
+    def test_thumbnails_replace_the_original_once_processed(self):
+        self.upload(self.users[0], photo(image_format='PNG'), name='me.png')
+        profile = Profile.objects.select_related('picture').get(user=self.users[0])
+        original_url = default_storage.url(profile.picture.original)
+        self.assertEqual(PublicProfileSerializer(profile).data['avatars']['small']['webp'], original_url)
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(process_pending(executor), 1)
+        profile = Profile.objects.select_related('picture').get(user=self.users[0])
+        avatars = PublicProfileSerializer(profile).data['avatars']
+        self.assertTrue(avatars['small']['webp'].endswith('/small.webp'))
+        for size, longest in [('small', 48), ('large', 256)]:
+            for image_format in ['webp', 'jpeg']:
+                with default_storage.open(profile.picture.variants[size][image_format]) as file, Image.open(file) as thumbnail:
+                    self.assertEqual(thumbnail.format, image_format.upper())
+                    self.assertEqual(max(thumbnail.size), longest)
+        self.assertContains(self.client.get(reverse('accounts:profile')), 'large.webp')
+
+    def test_broken_uploads_are_refused(self):
+        response = self.upload(self.users[0], b'not an image')
+        self.assertContains(response, 'Upload a valid image.')
+        self.assertFalse(StoredImage.objects.exists())
+
+
+#Admin Changelist Tests
+from unittest import mock
+from django.contrib.admin.models import LogEntry
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from accounts import changelists
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(self.admin)
+        self.added = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            i = self.added = self.added + 1
+            user = CustomUser.objects.create(username=f'user{i}', email=f'user{i}@example.com')
+            category = Category.objects.create(name=f'Category {i}')
+            post = Post.objects.create(title=f'Post {i}', content='Body', author=user, category=category, status='published')
+            post.tags.add(Tag.objects.create(name=f'tag{i}'))
+            parent = Comment.objects.create(user=user, post=post, content='Top')
+            Comment.objects.create(user=self.admin, post=post, content='Reply', parent_comment=parent)
+            Subscription.objects.create(user=self.admin, author=user, category=category)
+        return post
+
+    def changelist_queries(self, model, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:accounts_{model}_changelist') + query)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        post = self.add_rows(3)
+        filtered = {'post': f'?tags__id__exact={post.tags.get().pk}', 'comment': f'?post__id__exact={post.pk}', 'subscription': f'?author__id__exact={post.author_id}'}
+        few = {model: (self.changelist_queries(model), self.changelist_queries(model, query)) for model, query in filtered.items()}
+        self.add_rows(20)
+        many = {model: (self.changelist_queries(model), self.changelist_queries(model, query)) for model, query in filtered.items()}
+        self.assertEqual(many, few)
+        self.assertContains(self.client.get(reverse('admin:accounts_comment_changelist') + filtered['comment']), f'>{post.title}</option>')
+        # The sidebar no longer links to every post
+        self.assertNotContains(self.client.get(reverse('admin:accounts_comment_changelist')), 'href="?post__id__exact=')
+
+    def test_long_lists_use_the_table_estimate(self):
+        self.add_rows(6)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.add_rows(2)  # Not yet in the statistics
+        with mock.patch.object(changelists, 'EXACT_COUNT_LIMIT', 5):
+            self.assertEqual(changelists.EstimatedCountPaginator(Comment.objects.order_by('pk'), 10).count, 12)
+            # A long filtered list also stops counting at the limit
+            self.assertEqual(changelists.EstimatedCountPaginator(Comment.objects.filter(parent_comment=None).order_by('pk'), 10).count, 12)
+            self.assertEqual(changelists.EstimatedCountPaginator(Comment.objects.filter(post__title='Post 1').order_by('pk'), 10).count, 2)
+        self.assertEqual(changelists.EstimatedCountPaginator(Comment.objects.order_by('pk'), 10).count, 16)
+
+    def test_delete_selected_runs_in_chunks(self):
+        self.add_rows(5)
+        url = reverse('admin:accounts_subscription_changelist')
+        data = {'action': 'delete_selected', 'select_across': '1', 'index': '0', '_selected_action': [Subscription.objects.first().pk]}
+        with CaptureQueriesContext(connection) as queries:
+            confirmation = self.client.post(url, data)
+        self.assertContains(confirmation, 'delete 5 subscriptions')
+        self.assertNotContains(confirmation, 'name="_selected_action"')
+        self.assertFalse([query for query in queries if 'accounts_category' in query['sql']])  # No cascade collection
+
+        with mock.patch('accounts.admin.SubscriptionAdmin.delete_chunk_size', 2):
+            self.client.post(url, {**data, 'post': 'yes'})
+        self.assertFalse(Subscription.objects.exists())
+        self.assertEqual(LogEntry.objects.count(), 5)
+
+
+#Single-flight Cache Tests
+import threading
+import time
+from accounts import single_flight
+
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.builds = {}
+        self.builds_lock = threading.Lock()
+
+    def build(self, key):
+        def build():
+            with self.builds_lock:
+                self.builds[key] = self.builds.get(key, 0) + 1
+            time.sleep(0.05)  # Long enough for every other thread to miss too
+            return f'value of {key}'
+        return build
+
+    def test_concurrent_misses_rebuild_once_per_key(self):
+        keys = ['hot-post', 'top-liked', 'top-rated']
+        threads_per_key = 10
+        barrier = threading.Barrier(len(keys) * threads_per_key)
+        results = []
+
+        def request(key):
+            barrier.wait()
+            results.append(single_flight.fetch(key, self.build(key), 60))
+
+        threads = [threading.Thread(target=request, args=(key,)) for key in keys for _ in range(threads_per_key)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.builds, {key: 1 for key in keys})
+        self.assertEqual(sorted(results), sorted(f'value of {key}' for key in keys for _ in range(threads_per_key)))
+        self.assertEqual(single_flight._locks, {})
+
+    def test_stale_value_is_served_while_another_worker_rebuilds(self):
+        cache.set('key', ('old', None, time.time() - 1, 0.0))
+        cache.add('key:lease', 'another worker')
+        self.assertEqual(single_flight.fetch('key', self.build('key'), 60), 'old')
+        self.assertEqual(self.builds, {})
+
+        cache.delete('key:lease')
+        self.assertEqual(single_flight.fetch('key', self.build('key'), 60), 'value of key')
+        self.assertIsNone(cache.get('key:lease'))
+
+    def test_cold_miss_waits_for_the_lease_holder(self):
+        cache.add('key:lease', 'another worker')
+        timer = threading.Timer(0.1, lambda: cache.set('key', ('theirs', None, time.time() + 60, 0.0)))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(single_flight.fetch('key', self.build('key'), 60), 'theirs')
+        self.assertEqual(self.builds, {})
+
+    def test_new_version_rebuilds(self):
+        self.assertEqual(single_flight.fetch('key', lambda: 'first', 60, version=1), 'first')
+        self.assertEqual(single_flight.fetch('key', lambda: 'again', 60, version=1), 'first')
+        self.assertEqual(single_flight.fetch('key', lambda: 'second', 60, version=2), 'second')
+
+    def test_refresh_gets_likelier_near_expiry(self):
+        now = 1000.0
+        # A build that takes a second is never refreshed early by a draw of 0...
+        self.assertFalse(single_flight.should_refresh(now + 10, 1.0, now=now, beta=1.0, rand=lambda: 0.0))
+        # ...and is by a draw of 0.99999 (a jump of 11.5 s), as is anything already expired
+        self.assertTrue(single_flight.should_refresh(now + 10, 1.0, now=now, beta=1.0, rand=lambda: 0.99999))
+        self.assertTrue(single_flight.should_refresh(now - 1, 1.0, now=now, beta=0.0))
+
+
+class SharedListTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.post = Post.objects.create(title='Liked', content='Body', author=self.author, status='published')
+        self.url = reverse('accounts:top-liked-posts')
+
+    def test_anonymous_readers_share_one_build_until_a_post_changes(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        like_post(self.reader.pk, self.post.pk)
+        self.assertEqual(self.client.get(self.url).json()[0]['likes_count'], 1)
+
+
+#Archive Tests
+from datetime import datetime as dt
+from accounts import archive
+from accounts.filters import PostFilter
+from accounts.models import ArchiveMonth
+from accounts.scheduler import publish_due_posts
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.other = CustomUser.objects.create(username='other', email='other@example.com')
+        self.news = Category.objects.create(name='News')
+        self.sport = Category.objects.create(name='Sport')
+
+    def publish(self, month, day=15, **fields):
+        fields = {'author': self.author, 'category': self.news, 'status': 'published', **fields}
+        return Post.objects.create(title='Post', content='Body', published_date=timezone.make_aware(dt(2024, month, day, 12)), **fields)
+
+    def counts(self, scope=ArchiveMonth.ALL, scope_id=0):
+        return {(row.year, row.month): row.posts for row in ArchiveMonth.objects.filter(scope=scope, scope_id=scope_id, posts__gt=0)}
+
+    def test_counts_follow_publishing_and_deleting(self):
+        march = self.publish(3)
+        self.publish(3, author=self.other, category=self.sport)
+        self.publish(4)
+        self.publish(4, status='draft')
+        self.assertEqual(self.counts(), {(2024, 3): 2, (2024, 4): 1})
+        self.assertEqual(self.counts(ArchiveMonth.CATEGORY, self.news.pk), {(2024, 3): 1, (2024, 4): 1})
+        self.assertEqual(self.counts(ArchiveMonth.AUTHOR, self.other.pk), {(2024, 3): 1})
+
+        march.category = self.sport
+        march.save()
+        self.assertEqual(self.counts(ArchiveMonth.CATEGORY, self.sport.pk), {(2024, 3): 2})
+        march.status = 'draft'
+        march.save()
+        self.assertEqual(self.counts(), {(2024, 3): 1, (2024, 4): 1})
+
+        Post.objects.get(published_date__month=4, status='published').soft_delete()
+        self.other.soft_delete()
+        self.assertEqual(self.counts(), {})
+        self.assertEqual(archive.rebuild(), 0)
+
+    def test_saves_that_cannot_move_the_post_read_nothing_extra(self):
+        post = self.publish(3)
+        with CaptureQueriesContext(connection) as queries:
+            post.save(update_fields=['views'])
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT') or 'accounts_archivemonth' in query['sql']])
+
+    def test_scheduled_posts_are_counted_when_published(self):
+        post = Post.objects.create(title='Later', content='Body', author=self.author, status='published',
+                                   published_date=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.counts(), {})
+        publish_due_posts(now=timezone.now() + timedelta(hours=2))
+        local = timezone.localtime(post.published_date)
+        self.assertEqual(self.counts(), {(local.year, local.month): 1})
+
+    def test_incremental_counts_match_a_rebuild(self):
+        for month in (1, 1, 2, 5):
+            self.publish(month, author=self.other if month == 2 else self.author)
+        self.publish(5, category=None).delete()
+        self.news.delete()
+        before = set(ArchiveMonth.objects.filter(posts__gt=0).values_list('scope', 'scope_id', 'year', 'month', 'posts'))
+        archive.rebuild()
+        self.assertEqual(set(ArchiveMonth.objects.values_list('scope', 'scope_id', 'year', 'month', 'posts')), before)
+
+    def test_archive_endpoint(self):
+        self.publish(3)
+        self.publish(3, category=self.sport)
+        self.publish(6)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('accounts:archive'))
+        self.assertEqual([(row['year'], row['month'], row['posts']) for row in response.json()], [(2024, 6, 1), (2024, 3, 2)])
+
+        rows = self.client.get(reverse('accounts:archive'), {'category': self.sport.pk}).json()
+        self.assertEqual(rows, [{'year': 2024, 'month': 3, 'posts': 1, 'url': reverse('accounts:posts-by-category', args=[self.sport.pk]) + '?published_date=2024-03'}])
+        # The link lists exactly the posts the archive counted
+        self.assertEqual(self.client.get(rows[0]['url']).json()['count'], 1)
+        self.assertEqual(self.client.get(reverse('accounts:archive'), {'author': 'x'}).status_code, 400)
+
+    def test_date_filters_are_half_open_ranges(self):
+        self.publish(3, day=31)
+        self.publish(4, day=1)
+        url = reverse('accounts:posts-by-author', args=[self.author.pk])
+        self.assertEqual(self.client.get(url, {'published_date': '2024-03-31'}).json()['count'], 1)
+        self.assertEqual(self.client.get(url, {'published_date': '2024-04'}).json()['count'], 1)
+        self.assertEqual(self.client.get(url, {'published_date': '2024-13'}).status_code, 400)
+        start, end = archive.published_range('2024-12')
+        self.assertEqual((start.month, end.year, end.month), (12, 2025, 1))
+
+        queryset = PostFilter({'published_date_after': '2024-03-31', 'published_date_before': '2024-03-31'}, Post.objects.all()).qs
+        self.assertEqual(queryset.count(), 1)
+        sql = str(queryset.query)
+        self.assertNotIn('django_datetime_cast_date', sql)
+        self.assertIn('"accounts_post"."published_date" <', sql)
+
+
+#Feed Tests
+import gzip
+from accounts import feeds
+from accounts.models import Feed
+
+
+class FeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.author = CustomUser.objects.create(username='author', email='author@example.com')
+        self.category = Category.objects.create(name='News')
+        self.tag = Tag.objects.create(name='python')
+
+    def publish(self, title, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title=title, content='Body', author=self.author, category=self.category, status='published',
+                                       published_date=timezone.now() - timedelta(minutes=1), **fields)
+        return post
+
+    def fetch(self, url, **headers):
+        return self.client.get(url, headers={'Accept-Encoding': 'gzip', **headers})
+
+    def test_feeds_are_regenerated_when_posts_change(self):
+        post = self.publish('First post')
+        self.assertEqual(Feed.objects.filter(scope__in=[Feed.ALL, Feed.AUTHOR, Feed.CATEGORY]).count(), 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.add(self.tag)
+        tag_feed = gzip.decompress(Feed.objects.get(scope=Feed.TAG, scope_id=self.tag.pk, format='atom').body)
+        self.assertIn(b'First post', tag_feed)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Renamed post'
+            post.save()
+        site = gzip.decompress(Feed.objects.get(scope=Feed.ALL, format='rss').body)
+        self.assertIn(b'Renamed post', site)
+        self.assertIn(b'<category>python</category>', site)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.soft_delete()
+        self.assertNotIn(b'Renamed post', gzip.decompress(Feed.objects.get(scope=Feed.ALL, format='rss').body))
+
+    def test_scheduled_posts_enter_the_feeds_when_published(self):
+        Post.objects.create(title='Scheduled post', content='Body', author=self.author, status='scheduled',
+                            published_date=timezone.now() - timedelta(minutes=1))  # Just came due
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_due_posts()
+        self.assertIn(b'Scheduled post', gzip.decompress(Feed.objects.get(scope=Feed.AUTHOR, scope_id=self.author.pk, format='atom').body))
+
+    def test_drafts_and_unrelated_saves_regenerate_nothing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            draft = Post.objects.create(title='Draft', content='Body', author=self.author, status='draft')
+            draft.save()
+        self.assertEqual(callbacks, [])
+        post = self.publish('Published')
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.save(update_fields=['views'])
+        self.assertEqual(callbacks, [])
+
+    def test_unchanged_feed_keeps_its_validators(self):
+        self.publish('Post')
+        before = Feed.objects.get(scope=Feed.ALL, format='atom')
+        self.assertEqual(feeds.regenerate(Feed.ALL, 0), 0)
+        self.assertEqual(Feed.objects.get(pk=before.pk).last_modified, before.last_modified)
+
+    def test_polls_that_find_nothing_new_cost_no_queries(self):
+        self.publish('Post')
+        url = reverse('accounts:scoped-feed', args=[Feed.CATEGORY, self.category.pk, 'atom'])
+        response = self.fetch(url)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertIn(b'<title>Post</title>', gzip.decompress(response.content))
+        with self.assertNumQueries(0):
+            by_etag = self.fetch(url, **{'If-None-Match': response['ETag']})
+            by_date = self.fetch(url, **{'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual((by_etag.status_code, by_date.status_code), (304, 304))
+        self.assertEqual(by_etag['ETag'], response['ETag'])
+
+        # Without gzip the body is decompressed and the representation has its own ETag
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertNotEqual(plain['ETag'], response['ETag'])
+        self.assertEqual(plain.content, gzip.decompress(response.content))
+
+        self.publish('Newer post')
+        self.assertEqual(self.fetch(url, **{'If-None-Match': response['ETag']}).status_code, 200)
+
+    def test_missing_feeds(self):
+        self.assertEqual(self.client.get(reverse('accounts:feed', args=['rss'])).status_code, 200)  # Built on first request
+        self.assertEqual(self.client.get(reverse('accounts:scoped-feed', args=[Feed.TAG, 999, 'rss'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('accounts:feed', args=['json'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('accounts:scoped-feed', args=['planet', 1, 'rss'])).status_code, 404)
+        self.tag.delete()
+        self.assertFalse(Feed.objects.filter(scope=Feed.TAG).exists())
+
+
+#Sitemap Tests
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+from accounts.models import SitemapShard
+from accounts.sitemaps import build_sitemaps
+
+
+class SitemapTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(SITEMAP_ROOT=self.root, SITEMAP_SHARD_SIZE=3)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.authors = [CustomUser.objects.create(username=f'author{i}', email=f'author{i}@example.com') for i in range(2)]
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', content='Body', author=self.authors[i % 2], status='published',
+                                published_date=timezone.now() - timedelta(days=1))
+            for i in range(7)
+        ]
+
+    def shard(self, section, number):
+        with gzip.open(os.path.join(self.root, f'sitemap-{section}-{number}.xml.gz'), 'rt') as stream:
+            return stream.read()
+
+    def test_posts_are_split_into_shards_by_id(self):
+        build_sitemaps(chunk_size=2)
+        shards = dict(SitemapShard.objects.filter(section='posts').values_list('number', 'urls'))
+        self.assertEqual(sum(shards.values()), 7)
+        for post in self.posts:
+            self.assertIn(f'<loc>https://example.com/posts/{post.pk}/</loc>', self.shard('posts', (post.pk - 1) // 3))
+        authors = self.shard('authors', (self.authors[0].pk - 1) // 3)
+        self.assertIn(f'/posts/author/{self.authors[0].pk}/</loc>', authors)
+
+        with open(os.path.join(self.root, 'sitemap.xml')) as stream:
+            index = stream.read()
+        self.assertEqual(index.count('<sitemap>'), SitemapShard.objects.count())
+        self.assertIn(f'<loc>https://example.com/sitemap-posts-{(self.posts[0].pk - 1) // 3}.xml.gz</loc>', index)
+
+    def test_only_changed_shards_are_rewritten(self):
+        build_sitemaps()
+        self.assertEqual(build_sitemaps(), (0, 0))
+
+        changed = self.posts[3]
+        before = {(section, number): generated for section, number, generated in SitemapShard.objects.values_list('section', 'number', 'generated_at')}
+        changed.title = 'Edited'
+        changed.save()
+        self.assertEqual(build_sitemaps(), (2, 0))  # Its posts shard and its author's shard
+        rewritten = {
+            (section, number) for section, number, generated in SitemapShard.objects.values_list('section', 'number', 'generated_at')
+            if generated != before[section, number]
+        }
+        self.assertEqual(rewritten, {('posts', (changed.pk - 1) // 3), ('authors', (changed.author_id - 1) // 3)})
+
+    def test_hidden_posts_leave_and_empty_shards_are_removed(self):
+        build_sitemaps()
+        hidden = self.posts[0]
+        Post.objects.filter(pk=hidden.pk).update(status='draft')
+        self.assertEqual(build_sitemaps(), (2, 0))  # Its posts shard, and its author's shard has one post fewer
+        self.assertNotIn(f'/posts/{hidden.pk}/<', self.shard('posts', (hidden.pk - 1) // 3))
+
+        last = (self.posts[-1].pk - 1) // 3
+        for post in self.posts:
+            if (post.pk - 1) // 3 == last:
+                post.soft_delete()
+        self.assertEqual(build_sitemaps()[1], 1)
+        self.assertFalse(SitemapShard.objects.filter(section='posts', number=last).exists())
+        self.assertFalse(os.path.exists(os.path.join(self.root, f'sitemap-posts-{last}.xml.gz')))
+
+    def test_files_are_served_from_the_site_root(self):
+        build_sitemaps()
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'<sitemapindex', b''.join(response.streaming_content))
+        self.assertEqual(self.client.get(f'/sitemap-posts-{(self.posts[0].pk - 1) // 3}.xml.gz').status_code, 200)
+        self.assertEqual(self.client.get('/sitemap-posts-999.xml.gz').status_code, 404)
+
+
+#Export and Import Tests
+import orjson
+
+from accounts.models import ImportedRow, ImportRun, PostLike, Subscription
+from accounts.transfer import export_ndjson, import_lines
+
+
+class BlogTransferTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username='author', email='author@example.com', password='s3cret-pass')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com')
+        Profile.objects.filter(user=self.author).update(bio='Writes things')
+        self.category = Category.objects.create(name='News')
+        self.tags = [Tag.objects.create(name='python'), Tag.objects.create(name='django')]
+        self.post = Post.objects.create(title='Exported', content='<p>Body</p>', author=self.author, category=self.category,
+                                        status='published', published_date=timezone.now() - timedelta(days=3))
+        self.post.tags.set(self.tags)
+        Post.objects.create(title='Draft', content='Later', author=self.author)
+        top = Comment.objects.create(post=self.post, user=self.reader, content='First!')
+        Comment.objects.create(post=self.post, user=self.author, content='Thanks', parent_comment=top)
+        Comment.objects.filter(pk=top.pk).update(created_at=timezone.now() - timedelta(days=2))
+        PostLike.objects.create(post=self.post, user=self.reader)
+        PostRating.objects.create(post=self.post, user=self.reader, rating=4)
+        Subscription.objects.create(user=self.reader, author=self.author)
+        Subscription.objects.create(user=self.reader, category=self.category, delivery=Subscription.DAILY)
+
+    def export(self, **kwargs):
+        return b''.join(export_ndjson(**kwargs)).splitlines()
+
+    def wipe(self):
+        CustomUser.objects.all().delete()
+        Category.objects.all().delete()
+        Tag.objects.all().delete()
+
+    def assert_restored(self):
+        author = CustomUser.objects.get(email='author@example.com')
+        self.assertTrue(author.check_password('s3cret-pass'))
+        self.assertEqual(author.profile.bio, 'Writes things')
+        post = Post.objects.get(title='Exported')
+        self.assertEqual((post.author, post.category.name, post.content), (author, 'News', '<p>Body</p>'))
+        self.assertEqual(post.excerpt, 'Body')
+        self.assertEqual(sorted(post.tags.values_list('name', flat=True)), ['django', 'python'])
+        self.assertEqual(Post.objects.get(title='Draft').status, 'draft')
+        reply = Comment.objects.get(content='Thanks')
+        self.assertEqual((reply.parent_comment.content, reply.parent_comment.user.username), ('First!', 'reader'))
+        self.assertLess(reply.parent_comment.created_at, timezone.now() - timedelta(days=1))  # Not stamped on import
+        self.assertEqual(PostRating.objects.get(post=post).rating, 4)
+        self.assertTrue(PostLike.objects.filter(post=post, user__username='reader').exists())
+        self.assertEqual(Subscription.objects.filter(user__username='reader').count(), 2)
+
+    def test_round_trip_remaps_ids(self):
+        lines = self.export(chunk_size=1)
+        self.assertEqual(orjson.loads(lines[0])['type'], 'header')
+        self.assertEqual(orjson.loads(lines[-1]), {'type': 'end', 'rows': len(lines) - 2})
+        self.wipe()
+        Tag.objects.create(name='unrelated')  # New rows won't get the old ids
+
+        run = import_lines(lines, batch_size=2)
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual((run.rows_created, run.rows_skipped), (len(lines) - 2, 0))
+        self.assert_restored()
+        self.assertFalse(ImportedRow.objects.exists())
+        self.assertEqual(ArchiveMonth.objects.get(scope=ArchiveMonth.ALL).posts, 1)
+
+    def test_import_links_existing_users_and_taxonomy(self):
+        import_lines(self.export())
+        self.assertEqual(CustomUser.objects.count(), 2)
+        self.assertEqual((Category.objects.count(), Tag.objects.count()), (1, 2))
+        self.assertEqual(Post.objects.filter(title='Exported', author=self.author, category=self.category).count(), 2)
+        self.assertEqual(PostLike.objects.count(), 2)
+        self.assertEqual(Subscription.objects.count(), 2)  # Already subscribed
+
+    def test_interrupted_import_resumes(self):
+        lines = self.export()
+        self.wipe()
+        with self.assertRaisesMessage(ValueError, 'ends before its end line'):
+            import_lines(lines[:8], batch_size=2)
+        self.assertEqual(ImportRun.objects.get().lines, 8)
+        self.assertEqual(CustomUser.objects.count(), 2)
+
+        import_lines(lines, batch_size=2)
+        self.assertEqual(CustomUser.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assert_restored()
+
+        import_lines(lines)  # Finished runs are not imported again
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_rejects_other_files(self):
+        with self.assertRaisesMessage(ValueError, 'Not a blog export'):
+            import_lines([b'{"title": "x"}'])
+
+    def test_export_endpoint_is_staff_only(self):
+        url = reverse('accounts:blog-export')
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        CustomUser.objects.filter(pk=self.reader.pk).update(is_staff=True)
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [orjson.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['type'] for row in rows[:3]], ['header', 'user', 'user'])
+        self.assertEqual(rows[-1]['type'], 'end')
+
+
+#Database Copy Tests
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from accounts import dbcopy
+from accounts.models import Feed, StoredImage
+
+
+class DatabaseCopyTest(TestCase):
+    target = 'copy_target'
+
+    def setUp(self):
+        author = CustomUser.objects.create_user(username='author', email='author@example.com', password='s3cret-pass')
+        self.reader = CustomUser.objects.create(username='reader', email='reader@example.com', is_staff=True)
+        category = Category.objects.create(name='News')
+        self.post = Post.objects.create(title='Copied', content='Tab\there\nand a \\ backslash', author=author, category=category,
+                                        status='published', published_date=timezone.now() - timedelta(days=1))
+        self.post.tags.set([Tag.objects.create(name='python')])
+        top = Comment.objects.create(post=self.post, user=self.reader, content='First!')
+        Comment.objects.create(post=self.post, user=author, content='Thanks', parent_comment=top)
+        PostLike.objects.create(post=self.post, user=self.reader)
+        PostRating.objects.create(post=self.post, user=self.reader, rating=5)
+        StoredImage.objects.create(sha256='a' * 64, original='a.png', width=10, height=10, variants={'small': {'webp': 'a.webp'}})
+        Feed.objects.create(scope=Feed.ALL, scope_id=0, format='atom', body=b'\x00\xff', etag='x', last_modified=timezone.now())
+
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        # Registered for this thread only, like a connection opened on the fly
+        settings_dict = {**connections.settings['default'], 'NAME': path}
+        connections[self.target] = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, self.target)
+        self.addCleanup(self.drop_target, path)
+        with connections[self.target].schema_editor() as editor:
+            for model in apps.get_app_config('accounts').get_models():
+                editor.create_model(model)
+
+    def drop_target(self, path):
+        connections[self.target].close()
+        del connections[self.target]
+        os.remove(path)
+
+    def assert_same(self):
+        for table in dbcopy.tables():
+            source, target = dbcopy.verify('default', self.target, table, chunk_size=2)
+            self.assertEqual(source, target, table)
+
+    def test_waves_follow_foreign_keys(self):
+        order = {table.name: number for number, wave in enumerate(dbcopy.waves(dbcopy.tables())) for table in wave}
+        self.assertNotIn('accounts_customuser_groups', order)
+        self.assertLess(order['accounts_customuser'], order['accounts_post'])
+        self.assertLess(order['accounts_category'], order['accounts_post'])
+        self.assertLess(order['accounts_post'], order['accounts_comment'])
+        self.assertLess(order['accounts_post'], order['accounts_postlike'])
+
+    def test_copy_matches_source(self):
+        dbcopy.copy_all('default', self.target, workers=4, chunk_size=2)
+        self.assert_same()
+        reply = Comment.objects.using(self.target).get(content='Thanks')
+        self.assertEqual(reply.parent_comment.content, 'First!')
+        copied = Post.objects.using(self.target).get(pk=self.post.pk)
+        self.assertEqual((copied.content, copied.author.username), (self.post.content, 'author'))
+        self.assertEqual(bytes(Feed.objects.using(self.target).get().body), b'\x00\xff')
+        self.assertTrue(CustomUser.objects.using(self.target).get(username='reader').is_staff)
+
+    def test_catch_up_applies_changes(self):
+        dbcopy.copy_all('default', self.target, chunk_size=2)
+        Post.objects.filter(pk=self.post.pk).update(title='Edited')
+        PostLike.objects.all().delete()
+        Comment.objects.create(post=self.post, user=self.reader, content='Later', parent_comment=Comment.objects.get(content='Thanks'))
+        table = next(table for table in dbcopy.tables() if table.name == 'accounts_post')
+        source, target = dbcopy.verify('default', self.target, table)
+        self.assertEqual(source[0], target[0])
+        self.assertNotEqual(source[1], target[1])
+
+        dbcopy.catch_up('default', self.target, chunk_size=2)
+        self.assert_same()
+        self.assertEqual(Post.objects.using(self.target).get(pk=self.post.pk).title, 'Edited')
+        self.assertFalse(PostLike.objects.using(self.target).exists())
+        self.assertEqual(Comment.objects.using(self.target).get(content='Later').parent_comment.content, 'Thanks')
+
+    def test_command_refuses_a_filled_target(self):
+        call_command('migrate_to_postgres', target=self.target, stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, 'already has rows'):
+            call_command('migrate_to_postgres', target=self.target, stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('migrate_to_postgres', target=self.target, catch_up=True, stdout=out)
+        self.assertIn('checksums match', out.getvalue())
+
+    def test_copy_text_escapes_values(self):
+        self.assertEqual(
+            dbcopy.copy_text([(1, None, b'\x00\xff', 'a\tb\\c\nd\re', True)]),
+            '1\t\\N\t\\\\x00ff\ta\\tb\\\\c\\nd\\re\tTrue\n',
+        )
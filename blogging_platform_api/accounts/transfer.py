@@ -0,0 +1,335 @@
+"""
+NDJSON export and import of the blog's content.
+
+An export is one JSON object per line: a header carrying a fresh export
+id, then users, categories, tags, posts (with their tag ids), comments,
+likes, ratings and subscriptions, and an ``end`` line. Each section is in
+primary-key order, so parent comments come before their replies. Ids are
+those of the exporting database.
+
+export_ndjson() reads every table in keyset chunks and import_lines()
+writes one bulk_create batch per transaction, so neither holds more than
+a chunk in memory however large the blog is. The id each imported user,
+category, tag, post and comment gets is kept in ImportedRow, and
+ImportRun counts the lines committed: an import that stops part-way
+resumes after its last batch when the same export is imported again.
+
+Users are matched by email and categories and tags by name, so an import
+into a database that already has them links to the existing rows. Rows
+whose user, post or parent comment isn't in the export (deleted while it
+was being written, say) are skipped and counted.
+
+bulk_create sends no signals. Once an import finishes, the archive is
+rebuilt and cached lists are invalidated here; feeds, sitemaps and related
+posts catch up on their next build.
+"""
+import time
+import uuid
+
+import orjson
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import reset_queries, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import search
+from .archive import rebuild as rebuild_archive
+from .models import (
+    TAXONOMY_VERSION_KEY, Category, Comment, ImportedRow, ImportRun, Post, PostLike, PostRating, Profile,
+    Subscription, Tag, bump_posts_version, make_excerpt,
+)
+
+User = get_user_model()
+
+FORMAT = 1
+DEFAULT_CHUNK_SIZE = 2000  # Rows per export query
+DEFAULT_BATCH_SIZE = 1000  # Rows per import transaction
+
+
+def _line(row):
+    return orjson.dumps(row) + b'\n'
+
+
+def _datetime(value):
+    return parse_datetime(value) if value else None
+
+
+def _mapping(run, kind, old_ids):
+    """``{old id: new id}`` of the ``kind`` rows of ``old_ids`` imported so far."""
+    old_ids = {old_id for old_id in old_ids if old_id is not None}
+    if not old_ids:
+        return {}
+    return dict(ImportedRow.objects.filter(run=run, kind=kind, old_id__in=old_ids).values_list('old_id', 'new_id'))
+
+
+def _remember(run, kind, pairs):
+    ImportedRow.objects.bulk_create(
+        [ImportedRow(run=run, kind=kind, old_id=old_id, new_id=new_id) for old_id, new_id in pairs]
+    )
+
+
+class Section:
+    """
+    One table of the export: which rows and fields are written, which fields
+    point at rows of other sections, and which of those a row can't do without.
+    """
+
+    def __init__(self, kind, model, fields, refs=None, required=(), dates=('created_at',)):
+        self.kind = kind
+        self.model = model
+        self.fields = fields
+        self.refs = refs or {}
+        self.required = required
+        self.dates = dates
+
+    def queryset(self):
+        return self.model._default_manager.all()
+
+    def chunks(self, chunk_size):
+        """Lists of up to ``chunk_size`` row dicts, read in keyset chunks."""
+        last = 0
+        while True:
+            rows = list(self.queryset().filter(pk__gt=last).order_by('pk').values(*self.fields)[:chunk_size])
+            if rows:
+                yield self.complete(rows)
+                last = rows[-1]['id']
+            if len(rows) < chunk_size:
+                return
+
+    def complete(self, rows):
+        return rows
+
+    def remap(self, run, rows):
+        """``(row, values)`` for the rows whose references resolve here, values carrying the ids of this database."""
+        mappings = {field: _mapping(run, kind, (row[field] for row in rows)) for field, kind in self.refs.items()}
+        for row in rows:
+            values = {field: row[field] for field in self.fields if field != 'id'}
+            for field in self.refs:
+                values[field] = mappings[field].get(row[field])
+            if self.usable(values):
+                for field in self.dates:
+                    values[field] = _datetime(values[field])
+                yield row, values
+
+    def usable(self, values):
+        return all(values[field] is not None for field in self.required)
+
+    def load(self, run, rows):
+        """Create ``rows``; returns ``(created, skipped)``. Nothing points at these, so no ids are kept."""
+        objects = [self.model(**values) for row, values in self.remap(run, rows)]
+        # Likes, ratings and subscriptions are unique per user: ones already here are left as they are
+        self.model.objects.bulk_create(objects, ignore_conflicts=True)
+        return len(objects), len(rows) - len(objects)
+
+
+class PostActivitySection(Section):
+    """Comments, likes and ratings of posts that are in the export."""
+
+    def queryset(self):
+        return self.model.objects.filter(post__deleted_at__isnull=True)
+
+
+class UserSection(Section):
+    def queryset(self):
+        return User.objects.filter(deleted_at__isnull=True)
+
+    def complete(self, rows):
+        bios = dict(Profile.objects.filter(user__in=[row['id'] for row in rows]).values_list('user_id', 'bio'))
+        for row in rows:
+            row['bio'] = bios.get(row['id'], '')
+        return rows
+
+    def load(self, run, rows):
+        existing = dict(User.objects.filter(email__in=[row['email'] for row in rows]).values_list('email', 'pk'))
+        taken = set(User.objects.filter(username__in=[row['username'] for row in rows]).values_list('username', flat=True))
+        new_rows = [row for row in rows if row['email'] not in existing]
+        users = []
+        for row in new_rows:
+            values = {field: row[field] for field in self.fields if field != 'id'}
+            if values['username'] in taken:
+                values['username'] = f"{values['username']}-{row['id']}"
+            taken.add(values['username'])
+            for field in self.dates:
+                values[field] = _datetime(values[field])
+            users.append(User(**values))
+        User.objects.bulk_create(users)
+        Profile.objects.bulk_create([Profile(user=user, bio=row['bio']) for user, row in zip(users, new_rows)])
+        _remember(run, self.kind, [(row['id'], existing[row['email']]) for row in rows if row['email'] in existing]
+                  + [(row['id'], user.pk) for user, row in zip(users, new_rows)])
+        return len(users), 0
+
+
+class NamedSection(Section):
+    """Categories and tags, linked to an existing one of the same name if there is one."""
+
+    def load(self, run, rows):
+        # Newest first, so the oldest row of a name wins
+        existing = dict(self.model.objects.filter(name__in=[row['name'] for row in rows]).order_by('-pk').values_list('name', 'pk'))
+        new_rows = [row for row in rows if row['name'] not in existing]
+        objects = self.model.objects.bulk_create(
+            [self.model(**{field: row[field] for field in self.fields if field != 'id'}) for row in new_rows]
+        )
+        _remember(run, self.kind, [(row['id'], existing[row['name']]) for row in rows if row['name'] in existing]
+                  + [(row['id'], obj.pk) for obj, row in zip(objects, new_rows)])
+        return len(objects), 0
+
+
+class PostSection(Section):
+    def complete(self, rows):
+        tags = {}
+        for post_id, tag_id in Post.tags.through.objects.filter(post__in=[row['id'] for row in rows]).order_by('pk').values_list('post_id', 'tag_id'):
+            tags.setdefault(post_id, []).append(tag_id)
+        for row in rows:
+            row['tags'] = tags.get(row['id'], [])
+        return rows
+
+    def load(self, run, rows):
+        tags = _mapping(run, 'tag', (tag_id for row in rows for tag_id in row['tags']))
+        kept, posts = [], []
+        now = timezone.now()
+        for row, values in self.remap(run, rows):
+            values['excerpt'] = make_excerpt(values['content'])  # save() isn't called
+            if values['status'] == 'published' and values['published_date'] > now:
+                values['status'] = 'scheduled'
+            kept.append(row)
+            posts.append(Post(**values))
+        created_at = [post.created_at for post in posts]
+        Post.objects.bulk_create(posts)
+        search.index_posts((post.pk, post.content) for post in posts)  # post_save isn't sent either
+        Post.tags.through.objects.bulk_create(
+            [Post.tags.through(post_id=post.pk, tag_id=tags[tag_id]) for post, row in zip(posts, kept) for tag_id in row['tags'] if tag_id in tags],
+            ignore_conflicts=True,  # Two exported tags can be linked to one tag here
+        )
+        # bulk_create stamps auto_now_add fields with the current time
+        for post, moment in zip(posts, created_at):
+            post.created_at = moment
+        Post.objects.bulk_update(posts, ['created_at'])
+        _remember(run, self.kind, [(row['id'], post.pk) for post, row in zip(posts, kept)])
+        return len(posts), len(rows) - len(posts)
+
+
+class CommentSection(PostActivitySection):
+    def load(self, run, rows):
+        posts = _mapping(run, 'post', (row['post_id'] for row in rows))
+        users = _mapping(run, 'user', (row['user_id'] for row in rows))
+        parents = _mapping(run, 'comment', (row['parent_comment_id'] for row in rows))
+        comments, kept, batch = [], [], set()
+        for row in rows:
+            parent = row['parent_comment_id']
+            if row['post_id'] not in posts or row['user_id'] not in users or (parent is not None and parent not in parents and parent not in batch):
+                continue
+            comments.append(Comment(post_id=posts[row['post_id']], user_id=users[row['user_id']], content=row['content'], parent_comment_id=parents.get(parent)))
+            kept.append(row)
+            batch.add(row['id'])
+        Comment.objects.bulk_create(comments)
+        # Replies to comments of this batch get their parent's id once it has one
+        created = {row['id']: comment.pk for comment, row in zip(comments, kept)}
+        for comment, row in zip(comments, kept):
+            comment.created_at = _datetime(row['created_at'])
+            if comment.parent_comment_id is None and row['parent_comment_id'] is not None:
+                comment.parent_comment_id = created[row['parent_comment_id']]
+        Comment.objects.bulk_update(comments, ['created_at', 'parent_comment'])
+        _remember(run, self.kind, created.items())
+        return len(comments), len(rows) - len(comments)
+
+
+class SubscriptionSection(Section):
+    def usable(self, values):
+        return values['user_id'] is not None and (values['author_id'] is not None or values['category_id'] is not None)
+
+
+SECTIONS = [
+    UserSection('user', User, (
+        'id', 'username', 'email', 'password', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser',
+        'date_joined', 'last_login',
+    ), dates=('date_joined', 'last_login')),
+    NamedSection('category', Category, ('id', 'name', 'description')),
+    NamedSection('tag', Tag, ('id', 'name')),
+    PostSection('post', Post, (
+        'id', 'title', 'content', 'author_id', 'category_id', 'status', 'published_date', 'created_at', 'views',
+    ), refs={'author_id': 'user', 'category_id': 'category'}, required=('author_id',), dates=('published_date', 'created_at')),
+    CommentSection('comment', Comment, ('id', 'post_id', 'user_id', 'parent_comment_id', 'content', 'created_at')),
+    PostActivitySection('like', PostLike, ('id', 'post_id', 'user_id', 'created_at'),
+            refs={'post_id': 'post', 'user_id': 'user'}, required=('post_id', 'user_id')),
+    PostActivitySection('rating', PostRating, ('id', 'post_id', 'user_id', 'rating', 'created_at'),
+            refs={'post_id': 'post', 'user_id': 'user'}, required=('post_id', 'user_id')),
+    SubscriptionSection('subscription', Subscription, ('id', 'user_id', 'author_id', 'category_id', 'delivery', 'created_at'),
+                        refs={'user_id': 'user', 'author_id': 'user', 'category_id': 'category'}),
+]
+BY_KIND = {section.kind: section for section in SECTIONS}
+
+
+def export_ndjson(chunk_size=DEFAULT_CHUNK_SIZE):
+    """The whole export as blocks of complete NDJSON lines, one block per chunk read."""
+    yield _line({'type': 'header', 'format': FORMAT, 'export_id': str(uuid.uuid4()), 'created_at': timezone.now()})
+    rows = 0
+    for section in SECTIONS:
+        for chunk in section.chunks(chunk_size):
+            yield b''.join(_line({'type': section.kind, **row}) for row in chunk)
+            reset_queries()
+            rows += len(chunk)
+    yield _line({'type': 'end', 'rows': rows})
+
+
+def _finish(run):
+    ImportRun.objects.filter(pk=run.pk).update(finished_at=timezone.now())
+    ImportedRow.objects.filter(run=run).delete()  # Only needed while the run can still resume
+    rebuild_archive()
+    bump_posts_version()
+    cache.set(TAXONOMY_VERSION_KEY, time.time_ns(), None)
+
+
+def import_lines(lines, batch_size=DEFAULT_BATCH_SIZE, on_batch=None):
+    """
+    Import an export from an iterable of its lines (bytes or str), such as
+    an open file. Every batch of up to ``batch_size`` rows of one section is
+    written in its own transaction. Returns the ImportRun; raises ValueError
+    if the input isn't an export or ends before its ``end`` line (the
+    batches written so far stay, and importing the whole file resumes).
+    ``on_batch(kind, rows, seconds)`` is called after each batch.
+    """
+    lines = iter(lines)
+    try:
+        header = orjson.loads(next(lines, b'null'))
+    except orjson.JSONDecodeError:
+        header = None
+    if not isinstance(header, dict) or header.get('type') != 'header':
+        raise ValueError('Not a blog export: the first line must be its header.')
+    if header.get('format') != FORMAT:
+        raise ValueError(f"Unsupported export format {header.get('format')!r}; expected {FORMAT}.")
+    run, _ = ImportRun.objects.get_or_create(export_id=header['export_id'])
+    if run.finished_at:
+        return run
+
+    def flush(kind, rows, through):
+        started = time.perf_counter()
+        with transaction.atomic():
+            created, skipped = BY_KIND[kind].load(run, rows)
+            ImportRun.objects.filter(pk=run.pk).update(
+                lines=through, rows_created=F('rows_created') + created, rows_skipped=F('rows_skipped') + skipped
+            )
+        reset_queries()  # With DEBUG on, the SQL of every bulk insert would be kept
+        if on_batch:
+            on_batch(kind, len(rows), time.perf_counter() - started)
+
+    kind, rows = None, []
+    for number, line in enumerate(lines, start=2):
+        if number <= run.lines or not line.strip():
+            continue
+        row = orjson.loads(line)
+        if rows and (row['type'] != kind or len(rows) == batch_size):
+            flush(kind, rows, number - 1)
+            rows = []
+        if row['type'] == 'end':
+            _finish(run)
+            run.refresh_from_db()
+            return run
+        if row['type'] not in BY_KIND:
+            raise ValueError(f"Line {number}: unknown row type {row['type']!r}.")
+        kind = row['type']
+        rows.append(row)
+    if rows:
+        flush(kind, rows, number)
+    raise ValueError('The export ends before its end line; the rows so far are imported, import the complete file to finish.')
@@ -0,0 +1,93 @@
+"""
+Trending score.
+
+A post's score is its engagement (likes, ratings and comments) decayed
+exponentially by the time since it was published, so new posts with a burst
+of activity outrank old posts with large all-time totals. Interactions are
+streamed from the database in chunks and accumulated per post with NumPy.
+"""
+import math
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Post, PostLike, PostRating, bump_posts_version
+
+LIKE_WEIGHT = 1.0
+RATING_WEIGHT = 1.0  # Per rating, scaled by stars / 5
+COMMENT_WEIGHT = 2.0
+DEFAULT_HALF_LIFE_HOURS = 48.0
+DEFAULT_CHUNK_SIZE = 50_000
+UPDATE_BATCH_SIZE = 500
+
+
+def _chunks(iterable, size):
+    while True:
+        chunk = list(islice(iterable, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_columns(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.int64):
+    """Yield ``(len(fields), n)`` NumPy arrays of at most ``chunk_size`` rows from ``queryset``."""
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    for chunk in _chunks(rows, chunk_size):
+        yield np.asarray(chunk, dtype=dtype).reshape(len(chunk), len(fields)).T
+
+
+def _accumulate(totals, post_ids, positions, values=None):
+    """Add ``values`` (or 1 per row) into ``totals`` at the rows of ``post_ids``, ignoring unknown posts."""
+    rows = np.searchsorted(post_ids, positions)
+    rows = np.minimum(rows, len(post_ids) - 1)
+    known = post_ids[rows] == positions
+    weights = None if values is None else values[known]
+    totals += np.bincount(rows[known], weights=weights, minlength=len(post_ids))
+
+
+def compute_scores(post_ids, published_at, likes, rating_stars, comments, now, half_life_hours=DEFAULT_HALF_LIFE_HOURS):
+    """
+    Return the trending score for each post.
+
+    ``published_at`` is in epoch seconds; ``likes``, ``rating_stars`` (sum of
+    stars) and ``comments`` are per-post totals aligned with ``post_ids``.
+    """
+    engagement = LIKE_WEIGHT * likes + RATING_WEIGHT * rating_stars / 5.0 + COMMENT_WEIGHT * comments
+    age_hours = np.maximum(now - published_at, 0.0) / 3600.0
+    return engagement * np.exp(-math.log(2) * age_hours / half_life_hours)
+
+
+def recompute_trending_scores(now=None, half_life_hours=DEFAULT_HALF_LIFE_HOURS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Recompute and store ``Post.trending_score`` for every published post. Returns the number of posts scored."""
+    now = (now or timezone.now()).timestamp()
+
+    id_chunks, date_chunks = [], []
+    posts = Post.objects.filter(status='published').order_by('pk').values_list('id', 'published_date')
+    for chunk in _chunks(posts.iterator(chunk_size=chunk_size), chunk_size):
+        id_chunks.append(np.fromiter((post_id for post_id, _ in chunk), dtype=np.int64, count=len(chunk)))
+        date_chunks.append(np.fromiter((published.timestamp() for _, published in chunk), dtype=np.float64, count=len(chunk)))
+    if not id_chunks:
+        return 0
+    post_ids = np.concatenate(id_chunks)
+    published_at = np.concatenate(date_chunks)
+
+    likes = np.zeros(len(post_ids))
+    rating_stars = np.zeros(len(post_ids))
+    comments = np.zeros(len(post_ids))
+    for (post_column,) in stream_columns(PostLike.objects.order_by(), ['post_id'], chunk_size):
+        _accumulate(likes, post_ids, post_column)
+    for post_column, stars in stream_columns(PostRating.objects.order_by(), ['post_id', 'rating'], chunk_size):
+        _accumulate(rating_stars, post_ids, post_column, stars.astype(np.float64))
+    for (post_column,) in stream_columns(Comment.objects.order_by(), ['post_id'], chunk_size):
+        _accumulate(comments, post_ids, post_column)
+
+    scores = compute_scores(post_ids, published_at, likes, rating_stars, comments, now, half_life_hours)
+
+    updates = [Post(pk=post_id, trending_score=score) for post_id, score in zip(post_ids.tolist(), scores.tolist())]
+    with transaction.atomic():
+        Post.objects.exclude(status='published').exclude(trending_score=0).update(trending_score=0)
+        Post.objects.bulk_update(updates, ['trending_score'], batch_size=UPDATE_BATCH_SIZE)
+    bump_posts_version()
+    return len(updates)
@@ -1,9 +1,12 @@
-from django.urls import path
+from django.urls import path, re_path
 from .views import (
     RegisterView, ProfileView, PostListCreateView, PostRetrieveUpdateDestroyView, share_post_via_email,
     DraftPostListView, CommentListCreateView, TopLikedPostsView, TopRatedPostsView, SubscriptionView, 
     UnsubscribeView, NewPostNotification, LikePostView, RatePostView, CommentUpdateDestroyView, 
-    SharePostView, PostsByCategoryView, PostsByAuthorView, UnsubscribeView,CustomLoginView
+    SharePostView, PostsByCategoryView, PostsByAuthorView, UnsubscribeView,CustomLoginView,
+    RelatedPostsView, TrendingPostsView, RecommendationsView, InteractionBatchView, AuthorAnalyticsView,
+    PostBatchView, CommentBatchView, ProfileBatchView, post_events, PostRevisionListView, PostRevisionDetailView,
+    ArchiveView, post_feed, sitemap_file, BlogExportView
 )
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -15,6 +18,7 @@ urlpatterns = [
     path('', CustomLoginView.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('profiles/batch/', ProfileBatchView.as_view(), name='profile-batch'),
     #path('profile/<str:username>/', ProfileView.as_view(), name='profile'),
 
 
@@ -22,26 +26,49 @@ urlpatterns = [
     path('posts/', PostListCreateView.as_view(), name='post-list-create'),
     path('posts/drafts/', DraftPostListView.as_view(), name='draft-posts'),
     path('posts/<int:pk>/', PostRetrieveUpdateDestroyView.as_view(), name='post-retrieve-update-destroy'),
+    path('posts/batch/', PostBatchView.as_view(), name='post-batch'),
     
     #Comments Management
     path('posts/<int:post_id>/comments/', CommentListCreateView.as_view(), name='comment-list-create'),
     path('posts/<int:post_id>/comments/<int:comment_pk>/', CommentUpdateDestroyView.as_view(), name='comment-update-destroy'),
+    path('comments/batch/', CommentBatchView.as_view(), name='comment-batch'),
     
     #Post Features
     path('posts/top-liked/', TopLikedPostsView.as_view(), name='top-liked-posts'),
     path('posts/top-rated/', TopRatedPostsView.as_view(), name='top-rated-posts'),
+    path('posts/trending/', TrendingPostsView.as_view(), name='trending-posts'),
+    path('recommendations/', RecommendationsView.as_view(), name='recommendations'),
     
     #Subscription Management
     path('subscribe/', SubscriptionView.as_view(), name='subscribe'),
     path('unsubscribe/<int:pk>/', UnsubscribeView.as_view(), name='unsubscribe'),
     path('new-post/', NewPostNotification.as_view(), name='new-post-notification'),
+
+    #Author Analytics
+    path('analytics/', AuthorAnalyticsView.as_view(), name='author-analytics'),
     
     #Post Interaction
     path('posts/<int:pk>/like/', LikePostView.as_view(), name='like-post'),
     path('posts/<int:pk>/rate/', RatePostView.as_view(), name='rate-post'),
+    path('interactions/batch/', InteractionBatchView.as_view(), name='interaction-batch'),
     path('posts/<int:pk>/share/', SharePostView.as_view(), name='share-post'),
+    path('posts/<int:pk>/related/', RelatedPostsView.as_view(), name='related-posts'),
+    path('posts/<int:pk>/events/', post_events, name='post-events'),
+    path('posts/<int:pk>/revisions/', PostRevisionListView.as_view(), name='post-revisions'),
+    path('posts/<int:pk>/revisions/<int:number>/', PostRevisionDetailView.as_view(), name='post-revision-detail'),
     
     #Post search and filter by category and author
     path('posts/category/<int:category_id>/', PostsByCategoryView.as_view(), name='posts-by-category'),
     path('posts/author/<int:author_id>/', PostsByAuthorView.as_view(), name='posts-by-author'),
+    path('archive/', ArchiveView.as_view(), name='archive'),
+
+    #Atom and RSS feeds (fmt is atom or rss; scope is author, category or tag)
+    path('feeds/<str:fmt>/', post_feed, name='feed'),
+    path('feeds/<str:scope>/<int:scope_id>/<str:fmt>/', post_feed, name='scoped-feed'),
+
+    #Sitemap index (sitemap.xml) and its gzipped shards
+    re_path(r'^(?P<path>sitemap[\w.-]*\.xml(?:\.gz)?)$', sitemap_file, name='sitemap'),
+
+    #NDJSON export of users, posts, comments and the rest, for import_blog (staff only)
+    path('export/', BlogExportView.as_view(), name='blog-export'),
 ]
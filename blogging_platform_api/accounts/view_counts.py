@@ -0,0 +1,99 @@
+"""
+Buffered post view counting.
+
+Reading a post must not turn into a database write, so views are counted in
+a per-process buffer and a background thread flushes the coalesced deltas
+with one UPDATE every ``VIEW_COUNT_FLUSH_INTERVAL`` seconds (default 5).
+
+Loss window: views buffered in a worker that crashes or is killed before its
+next flush are lost, i.e. at most ``VIEW_COUNT_FLUSH_INTERVAL`` seconds of
+views per worker process. A normal interpreter shutdown flushes the buffer.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, Value, When
+
+from .models import Post
+
+DEFAULT_FLUSH_INTERVAL = 5.0
+FLUSH_BATCH_SIZE = 500  # Posts per UPDATE, keeps SQLite under its bound-parameter limit
+
+_buffer = Counter()
+_lock = threading.Lock()
+_flusher = None
+
+
+def _flush_interval():
+    return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+
+def record_view(post_id):
+    """Count one view of ``post_id``. Never touches the database."""
+    with _lock:
+        _buffer[int(post_id)] += 1
+    _ensure_flusher()
+
+
+def pending_views():
+    """Return a copy of the views not yet written to the database."""
+    with _lock:
+        return Counter(_buffer)
+
+
+def flush_view_counts():
+    """Write buffered views to ``Post.views`` and return the number of views flushed."""
+    with _lock:
+        deltas = dict(_buffer)
+        _buffer.clear()
+    if not deltas:
+        return 0
+
+    post_ids = sorted(deltas)
+    for start in range(0, len(post_ids), FLUSH_BATCH_SIZE):
+        batch = post_ids[start:start + FLUSH_BATCH_SIZE]
+        increment = Case(*[When(pk=post_id, then=Value(deltas[post_id])) for post_id in batch], default=Value(0))
+        try:
+            Post.objects.filter(pk__in=batch).update(views=F('views') + increment)
+        except Exception:
+            # Earlier batches are committed; put back only this one and the rest so the next flush retries them
+            with _lock:
+                _buffer.update({post_id: deltas[post_id] for post_id in post_ids[start:]})
+            raise
+    return sum(deltas.values())
+
+
+def _ensure_flusher():
+    global _flusher
+    interval = _flush_interval()
+    if not interval or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_forever, args=(interval,), name='view-count-flusher', daemon=True)
+            _flusher.start()
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush_view_counts()
+        except Exception:
+            pass  # Deltas were re-buffered; retry on the next tick
+        finally:
+            connection.close()
+
+
+@atexit.register
+def _flush_at_exit():
+    if _flusher is None:
+        return  # Only processes running the flusher (i.e. serving requests) own buffered views
+    try:
+        flush_view_counts()
+    except Exception:
+        pass  # The database may already be gone during shutdown
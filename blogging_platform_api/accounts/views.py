@@ -1,15 +1,26 @@
+import gzip
+import hashlib
+import re
+from datetime import timedelta
+
 # Django and third-party imports
 from django.contrib import messages
 from django.contrib.auth import get_user_model, authenticate, login
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.mail import send_mail
-from django.db.models import Avg, Count, Q, Prefetch
-from django.http import JsonResponse
+from django.db.models import Avg, Count, F, Q, Prefetch
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse_lazy,reverse
 from django.utils import timezone
 from django.conf import settings  # Access email configuration if needed
+from django.views.decorators.http import require_safe
 from django.views.generic import CreateView
+from django.views.static import serve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 
 # Django REST Framework imports
 from rest_framework import filters, generics, permissions, serializers, status
@@ -20,24 +31,34 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
 
 # Django Filters imports
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 
 
-# Allauth imports
-from allauth.account.models import EmailAddress
-
 # Local app imports (models, serializers, permissions, filters)
-from .models import Post, Comment, PostRating, Subscription, Category, Tag, PostLike
+from .models import Post, Comment, PostRating, Subscription, Category, Tag, PostLike, RelatedPost, Profile, PostRevision, ArchiveMonth, Feed, posts_version, taxonomy_version
 from .serializers import (
     RegisterSerializer, UserProfileSerializer, 
-    PostSerializer, CommentSerializer, SubscriptionSerializer, RatePostSerializer, LikePostSerializer, EmptySerializer
+    PostSerializer, PostSummarySerializer, CommentSerializer, SubscriptionSerializer, RatePostSerializer, LikePostSerializer, EmptySerializer,
+    RelatedPostSerializer, RecommendedPostSerializer, InteractionBatchSerializer, AnalyticsQuerySerializer,
+    BatchIdsSerializer, PublicProfileSerializer, PostRevisionSerializer, PostRevisionDetailSerializer, ArchiveMonthSerializer
 )
 from .permissions import IsAuthorOrReadOnly, IsOwner
-from .filters import PostFilter
+from .filters import PostFilter, PostSearchFilter
+from .view_counts import record_view
+from .analytics import author_report
+from . import interactions
+from .interactions import Interaction, submit_interaction
+from .fast_path import comment_subtrees, post_rows
+from .events import current_event_id, event_stream
+from .revisions import rebuild
+from .archive import published_range
+from . import feeds, search, transfer
+from .sitemaps import sitemap_root
+from .images import set_profile_picture
+from .single_flight import fetch
 
 
 
@@ -128,8 +149,12 @@ class ProfileView(generics.RetrieveUpdateAPIView):
             profile_data = request.data.get('profile', {})
             
             if 'profile_picture' in request.FILES:
-                profile_picture = request.FILES['profile_picture']
-                user.profile.profile_picture = profile_picture  # Save new profile picture
+                try:
+                    # Stored under its content hash; thumbnails are rendered by the process_images worker
+                    set_profile_picture(user.profile, request.FILES['profile_picture'])
+                except DjangoValidationError as error:
+                    context = {'form': UserProfileSerializer(user).data, 'user': user, 'picture_errors': error.messages}
+                    return render(request, self.template_name, context)
 
             # Update bio
             bio = request.data.get('bio', None)
@@ -158,26 +183,106 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class PostListCreateView(generics.ListCreateAPIView):
+DEFAULT_LIST_CACHE_TIMEOUT = 30
+
+
+def shared_list(request, name, build):
+    """
+    ``build()``, cached for every anonymous reader of the same URL until a
+    post changes (or LIST_CACHE_TIMEOUT passes) and filled single-flight, so
+    a hot list is built once however many requests miss it at the same time.
+    """
+    key = f'{name}:' + hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    timeout = getattr(settings, 'LIST_CACHE_TIMEOUT', DEFAULT_LIST_CACHE_TIMEOUT)
+    return fetch(key, build, timeout, version=posts_version())
+
+
+def filter_published_date(queryset, value):
+    """
+    Narrow ``queryset`` to posts published on ``value``, a ``YYYY-MM-DD`` day
+    or a ``YYYY-MM`` month, with a half-open range the published_date
+    indexes can serve.
+    """
+    if not value:
+        return queryset
+    try:
+        start, end = published_range(value)
+    except ValueError:
+        raise serializers.ValidationError({'published_date': 'Enter a day (YYYY-MM-DD) or a month (YYYY-MM).'})
+    return queryset.filter(published_date__gte=start, published_date__lt=end)
+
+
+class FastReadMixin:
+    """
+    Serve anonymous list GETs from accounts.fast_path instead of the serializer.
+
+    The response is identical to what ``serializer_class`` would render; the
+    rows are just built from value tuples in a fixed number of queries, and
+    shared between anonymous readers through shared_list.
+    """
+
+    def use_fast_path(self, request):
+        return request.method == 'GET' and not request.user.is_authenticated
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_path(request):
+            return super().list(request, *args, **kwargs)
+        return Response(shared_list(request, type(self).__name__, self.fast_list_data))
+
+    def fast_list_data(self):
+        post_ids = self.filter_queryset(self.get_queryset()).values_list('pk', flat=True)
+        page = self.paginate_queryset(post_ids)
+        if page is not None:
+            return self.get_paginated_response(post_rows(page, self.serializer_class.Meta.fields)).data
+        return post_rows(post_ids, self.serializer_class.Meta.fields)
+
+
+class ViewerStateMixin:
+    """
+    Add the requesting user's ``liked_by_me``, ``my_rating``,
+    ``following_author`` and ``following_category`` to serialized posts.
+
+    The state for a page is resolved in one query per relation
+    (interactions.viewer_state); anonymous users get none of these fields.
+    """
+
+    def viewer_context(self, posts):
+        context = self.get_serializer_context()
+        if self.request.user.is_authenticated:
+            context['viewer_state'] = interactions.viewer_state(
+                self.request.user.pk, [(post.pk, post.author_id, post.category_id) for post in posts]
+            )
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        if args and 'context' not in kwargs and self.request.method == 'GET' and self.request.user.is_authenticated:
+            posts = list(args[0]) if kwargs.get('many') else [args[0]]
+            if kwargs.get('many'):
+                args = (posts,) + args[1:]  # Don't evaluate a queryset twice
+            kwargs['context'] = self.viewer_context(posts)
+        return super().get_serializer(*args, **kwargs)
+
+
+class PostListCreateView(ViewerStateMixin, generics.ListCreateAPIView):
     serializer_class = PostSerializer
     pagination_class = StandardResultsSetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PostSearchFilter]
     filterset_class = PostFilter
-    search_fields = ['title', 'content', 'tags__name', 'author__username']
-    ordering_fields = ['published_date', 'category']
+    search_fields = ['title', 'tags__name', 'author__username']
+    ordering_fields = ['published_date', 'category', 'trending_score']
     ordering = ['-published_date']
 
     def get_queryset(self):
         # Start with the base queryset of published posts
-        queryset = Post.objects.filter(status='published').order_by('-published_date')
+        queryset = Post.objects.visible().order_by('-published_date')
 
-        # Apply search filter (title, content, tags, author)
+        # Apply search filter (title, body, tags, author); the body is searched through its full-text index
         search_query = self.request.GET.get('search', None)
         if search_query:
             queryset = queryset.filter(
                 Q(title__icontains=search_query) | 
-                Q(content__icontains=search_query) |
+                search.matching(search_query) |
                 Q(tags__name__icontains=search_query) |
                 Q(author__username__icontains=search_query)
             ).distinct()
@@ -192,25 +297,33 @@ class PostListCreateView(generics.ListCreateAPIView):
         if tags:
             queryset = queryset.filter(tags__id__in=tags).distinct()
 
-        return queryset
+        # Apply day or month filter (links from the archive)
+        return filter_published_date(queryset, self.request.GET.get('published_date'))
 
     def get(self, request, *args, **kwargs):
-        # Get the list of published posts
-        posts = self.get_queryset()
+        # Get the list of published posts, honouring ?ordering= (e.g. -trending_score)
+        posts = filters.OrderingFilter().filter_queryset(request, self.get_queryset(), self).defer('content')
 
-        # Fetch categories and tags for the dropdowns
+        # Fetch categories and tags for the dropdowns (lazy: only evaluated when their cached fragments miss)
         categories = Category.objects.all()  # Get all categories
         tags = Tag.objects.all()  # Get all tags
 
-        # Serialize the posts to pass to the template
-        serializer = self.serializer_class(posts, many=True)
+        # Serialize the posts to pass to the template; the list only shows excerpts
+        if request.user.is_authenticated:
+            posts = list(posts)
+            posts_data = PostSummarySerializer(posts, many=True, context=self.viewer_context(posts)).data
+        else:
+            posts_data = shared_list(
+                request, 'post_list', lambda: post_rows(posts.values_list('pk', flat=True), PostSummarySerializer.Meta.fields)
+            )
         
 
         # Render the template with the serialized data
         return render(request, 'post_list.html', {
-            'posts': serializer.data,
+            'posts': posts_data,
             'categories': categories,
             'tags': tags,
+            'taxonomy_version': taxonomy_version(),
         })
 
     def perform_create(self, serializer):
@@ -243,7 +356,7 @@ class PostListCreateView(generics.ListCreateAPIView):
             tags = Tag.objects.filter(pk__in=tags_ids)
             serializer.instance.tags.set(tags)  # Associate tags with the post
             
-class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class PostRetrieveUpdateDestroyView(ViewerStateMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
@@ -258,7 +371,15 @@ class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     
     def get(self, request, *args, **kwargs):
         post = self.get_object()
-        return render(request, self.template_name, {'post': post})
+        record_view(self.kwargs['pk'])  # Buffered in memory, flushed to Post.views in the background
+        related_posts = RelatedPost.objects.filter(
+            post=post, related__status='published', related__deleted_at__isnull=True
+        ).select_related('related')
+        viewer = self.viewer_context([post]).get('viewer_state', {}).get(post.pk)
+        return render(request, self.template_name, {
+            'post': post, 'related_posts': related_posts, 'viewer': viewer,
+            'events_since': current_event_id(),  # The live stream replays anything after this render
+        })
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
@@ -281,6 +402,9 @@ class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         # Redirect to the post list after successful update
         return redirect('accounts:post-list-create')
 
+    def perform_destroy(self, instance):
+        instance.soft_delete()  # Hidden now; the reaper deletes its comments, likes and ratings in the background
+
     def delete(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance)
@@ -293,12 +417,48 @@ class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         except Post.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-class DraftPostListView(generics.ListAPIView):
+class RelatedPostsView(generics.ListAPIView):
+    serializer_class = RelatedPostSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        # Neighbours are precomputed by the build_related_posts command, so this is a single indexed read
+        return RelatedPost.objects.filter(
+            post_id=self.kwargs['pk'], related__status='published', related__deleted_at__isnull=True
+        ).select_related('related').order_by('rank')
+
+class PostRevisionMixin:
+    """Edit history is private to the post's author; anyone else gets a 404."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_post(self):
+        return get_object_or_404(Post, pk=self.kwargs['pk'], author=self.request.user)
+
+
+class PostRevisionListView(PostRevisionMixin, generics.ListAPIView):
+    serializer_class = PostRevisionSerializer
+
+    def get_queryset(self):
+        # Deltas are only decompressed when a version is rebuilt
+        return PostRevision.objects.filter(post=self.get_post()).defer('body').order_by('-number')
+
+
+class PostRevisionDetailView(PostRevisionMixin, generics.RetrieveAPIView):
+    serializer_class = PostRevisionDetailSerializer
+
+    def get_object(self):
+        revision = get_object_or_404(PostRevision.objects.defer('body'), post=self.get_post(), number=self.kwargs['number'])
+        revision.title, revision.content = rebuild(revision.post_id, revision.number)
+        return revision
+
+
+class DraftPostListView(ViewerStateMixin, generics.ListAPIView):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Post.objects.filter(author=self.request.user, status='draft').order_by('-created_at')
+        # Scheduled posts aren't public yet either; this is the only list that shows them
+        return Post.objects.filter(author=self.request.user, status__in=['draft', 'scheduled']).order_by('-created_at')
 
 
 class PostDeleteView(LoginRequiredMixin, PermissionRequiredMixin, GenericAPIView):
@@ -309,7 +469,7 @@ class PostDeleteView(LoginRequiredMixin, PermissionRequiredMixin, GenericAPIView
         if post.author != request.user:
             # Handle unauthorized access (e.g., return 403)
             return Response(status=status.HTTP_403_FORBIDDEN)
-        post.delete()
+        post.soft_delete()  # Hidden now; the reaper deletes its comments, likes and ratings in the background
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     
@@ -318,17 +478,24 @@ class LikePostView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        post = get_object_or_404(Post, pk=pk)
-        user = request.user
+        # One INSERT ... ON CONFLICT DO NOTHING instead of a lookup plus get_or_create
+        outcome = submit_interaction(Interaction(request.user.id, interactions.LIKE, pk))
 
-        # Use get_or_create to like the post
-        like, created = PostLike.objects.get_or_create(post=post, user=user)
-
-        if not created:
+        if outcome == interactions.NOT_FOUND:
+            return Response({'error': 'Post not found.'}, status=404)
+        if outcome == interactions.EXISTS:
             return Response({'message': 'You already liked this post.'}, status=400)
 
         return Response({'message': 'Post liked successfully.'})
 
+    def delete(self, request, pk):
+        outcome = submit_interaction(Interaction(request.user.id, interactions.UNLIKE, pk))
+
+        if outcome == interactions.NOT_FOUND:
+            return Response({'error': 'You have not liked this post.'}, status=404)
+
+        return Response({'message': 'Post unliked successfully.'})
+
     
 class RatePostView(generics.GenericAPIView):
     serializer_class = RatePostSerializer
@@ -338,31 +505,108 @@ class RatePostView(generics.GenericAPIView):
         # Validate the incoming rating data using the serializer
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            post = get_object_or_404(Post, pk=pk)
-            user = request.user
-
             # Extract the validated rating value from the serializer
             rating = serializer.validated_data['rating']
 
-            # Use get_or_create to rate the post, either creating or updating the rating
-            existing_rating, created = PostRating.objects.get_or_create(
-                post=post,
-                user=user,
-                defaults={'rating': rating}
-            )
-
-            if not created:
-                # Update the existing rating
-                existing_rating.rating = rating
-                existing_rating.save()
+            # One INSERT ... ON CONFLICT DO UPDATE creates or replaces the rating
+            outcome = submit_interaction(Interaction(request.user.id, interactions.RATE, pk, rating))
+            if outcome == interactions.NOT_FOUND:
+                return Response({'error': 'Post not found.'}, status=404)
 
             return Response({'message': 'Post rated successfully.'})
         else:
             # If the data is invalid, return the serializer errors
             return Response(serializer.errors, status=400)
+
+    def delete(self, request, pk):
+        outcome = submit_interaction(Interaction(request.user.id, interactions.CLEAR_RATING, pk))
+
+        if outcome == interactions.NOT_FOUND:
+            return Response({'error': 'You have not rated this post.'}, status=404)
+
+        return Response({'message': 'Rating cleared successfully.'})
+
+
+class InteractionBatchView(generics.GenericAPIView):
+    """Apply likes, unlikes, ratings and rating removals queued by an offline client in one request."""
+    serializer_class = InteractionBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        outcomes = interactions.apply_interactions(
+            Interaction(request.user.id, action['action'], action['post'], action.get('rating'))
+            for action in serializer.validated_data['actions']
+        )
+        return Response({'results': [{'post': action['post'], 'action': action['action'], 'result': outcome}
+                                     for action, outcome in zip(serializer.validated_data['actions'], outcomes)]})
     
 
 
+def readable_posts(user):
+    """Set-wise visibility: live posts, plus the user's own drafts and scheduled posts."""
+    visible = Q(pk__in=Post.objects.visible().values('pk'))
+    if user.is_authenticated:
+        visible |= Q(author=user)
+    return Post.objects.filter(visible)
+
+
+def batch_posts(request, ids):
+    readable = list(readable_posts(request.user).filter(pk__in=ids).values_list('pk', 'author_id', 'category_id'))
+    rows = {row['id']: row for row in post_rows([post[0] for post in readable], PostSerializer.Meta.fields)}
+    if request.user.is_authenticated:
+        for post_id, state in interactions.viewer_state(request.user.pk, readable).items():
+            rows[post_id].update(state)
+    return rows
+
+
+def batch_comments(request, ids):
+    readable = list(Comment.objects.filter(pk__in=ids, post__in=readable_posts(request.user)).values_list('pk', flat=True))
+    # Only the requested comments and their replies, never every comment of their posts
+    by_id = comment_subtrees(readable)
+    return {pk: by_id[pk] for pk in readable}
+
+
+def batch_profiles(request, ids):
+    profiles = Profile.objects.filter(user_id__in=ids, user__is_active=True).select_related('user', 'picture')
+    data = PublicProfileSerializer(profiles, many=True, context={'request': request}).data
+    return {row['id']: row for row in data}
+
+
+class BatchReadView(generics.GenericAPIView):
+    """
+    Resolve ``?ids=1,2,3`` (up to MAX_BATCH_IDS) in a constant number of queries.
+
+    ``resolver(request, ids)`` returns ``{id: data}`` for the ids the user may
+    read. Results follow the request order. Ids that don't exist or that the
+    user may not see get ``{"id": ..., "error": "not_found"}`` in their slot.
+    """
+    serializer_class = BatchIdsSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        ids = [part for value in request.query_params.getlist('ids') for part in value.split(',') if part]
+        serializer = self.get_serializer(data={'ids': ids})
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        found = self.resolver(request, ids)
+        return Response({'results': [found.get(pk) or {'id': pk, 'error': interactions.NOT_FOUND} for pk in ids]})
+
+
+class PostBatchView(BatchReadView):
+    resolver = staticmethod(batch_posts)
+
+
+class CommentBatchView(BatchReadView):
+    resolver = staticmethod(batch_comments)
+
+
+class ProfileBatchView(BatchReadView):
+    resolver = staticmethod(batch_profiles)
+
+
 class CommentListCreateView(generics.ListCreateAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
@@ -400,13 +644,48 @@ class CommentUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         return super().update(request, *args, **kwargs)
 
 
-class TopRatedPostsView(generics.ListAPIView):
-    queryset = Post.objects.annotate(avg_rating=Avg('postrating__rating')).order_by('-avg_rating')
+class TopRatedPostsView(FastReadMixin, ViewerStateMixin, generics.ListAPIView):
+    serializer_class = PostSerializer
+
+    def get_queryset(self):
+        # Per request: visible() compares against the current time, so drafts and scheduled posts stay out
+        return Post.objects.visible().annotate(avg_rating=Avg('postrating__rating')).order_by('-avg_rating')
+
+class TopLikedPostsView(FastReadMixin, ViewerStateMixin, generics.ListAPIView):
     serializer_class = PostSerializer
 
-class TopLikedPostsView(generics.ListAPIView):
-    queryset = Post.objects.annotate(like_count=Count('likes')).order_by('-like_count') 
+    def get_queryset(self):
+        return Post.objects.visible().annotate(like_count=Count('likes')).order_by('-like_count')
+
+class TrendingPostsView(FastReadMixin, ViewerStateMixin, generics.ListAPIView):
     serializer_class = PostSerializer
+    pagination_class = StandardResultsSetPagination
+
+    def get_queryset(self):
+        # trending_score is precomputed by the compute_trending command and indexed with status
+        return Post.objects.visible().order_by('-trending_score')
+
+
+
+class RecommendationsView(generics.ListAPIView):
+    serializer_class = RecommendedPostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    fallback_size = 20
+
+    def get_queryset(self):
+        # Recommendations are precomputed by the build_recommendations command; nothing is scored here
+        return Post.objects.filter(
+            recommendations__user=self.request.user, status='published'
+        ).select_related('author').annotate(score=F('recommendations__score')).order_by('recommendations__rank')
+
+    def list(self, request, *args, **kwargs):
+        posts = list(self.get_queryset())
+        if not posts:
+            # Cold start: users without likes or ratings get trending posts instead
+            posts = Post.objects.visible().exclude(author=request.user).select_related('author').annotate(
+                score=F('trending_score')
+            ).order_by('-trending_score')[:self.fallback_size]
+        return Response(self.get_serializer(posts, many=True).data)
 
 
 
@@ -456,6 +735,23 @@ class SharePostView(generics.GenericAPIView):
 
 
 
+class AuthorAnalyticsView(generics.GenericAPIView):
+    """Likes, ratings, comments and new subscribers per day for the logged-in author's posts."""
+    serializer_class = AnalyticsQuerySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    default_range_days = 30
+
+    def get(self, request):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        end = serializer.validated_data.get('end') or timezone.now().date()
+        start = serializer.validated_data.get('start') or end - timedelta(days=self.default_range_days - 1)
+
+        # Sums the daily rollups written by the aggregate_analytics command
+        return Response(author_report(request.user, start, end, serializer.validated_data.get('post')))
+
+
+
 class SubscriptionView(generics.CreateAPIView):
     queryset = Subscription.objects.all()
     serializer_class = SubscriptionSerializer
@@ -529,6 +825,8 @@ class MyProtectedView(APIView):
         return Response(...)
     
 def share_post_via_email(request, post_id, recipient_email):
+    from allauth.account.models import EmailAddress  # Only this rarely used view needs allauth's models
+
     post = get_object_or_404(Post, pk=post_id)
     recipient = EmailAddress.objects.filter(email=recipient_email).first()  # Check for existing user
 
@@ -546,48 +844,110 @@ def share_post_via_email(request, post_id, recipient_email):
     return Response({'message': 'Post shared successfully.'})
 
 
-class PostsByCategoryView(generics.ListAPIView):
+async def post_events(request, pk):
+    """
+    Server-sent events for one post: ``comment``, ``comment_edited``,
+    ``comment_deleted`` and ``stats`` (likes count and average rating) deltas.
+
+    Resumes from the ``Last-Event-ID`` header (or ``?last_event_id=``).
+    Streams need the ASGI application; a WSGI worker would be tied up by
+    each one, so there it answers 501.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('Live events are only served by the ASGI application.', status=501)
+    if not await Post.objects.visible().filter(pk=pk).aexists():
+        raise Http404
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    response = StreamingHttpResponse(event_stream(pk, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+@require_safe
+def post_feed(request, fmt, scope=Feed.ALL, scope_id=0):
+    """
+    Atom or RSS feed of the site, an author, a category or a tag, as stored
+    by accounts.feeds. Polls are answered from the cache: a matching
+    If-None-Match or If-Modified-Since gets a 304 without touching the
+    database. The stored gzip bytes are sent as is to clients that accept
+    them; each encoding has its own strong ETag.
+    """
+    if fmt not in feeds.GENERATORS or scope not in dict(Feed.SCOPE_CHOICES):
+        raise Http404
+    entry = feeds.load(scope, scope_id, fmt)
+    if entry is None:
+        raise Http404
+    etag, last_modified, body = entry
+    gzipped = bool(ACCEPTS_GZIP.search(request.headers.get('Accept-Encoding', '')))
+    etag = f'"{etag}-gzip"' if gzipped else f'"{etag}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        response = HttpResponse(body if gzipped else gzip.decompress(body), content_type=feeds.GENERATORS[fmt].content_type)
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+@require_safe
+def sitemap_file(request, path):
+    """
+    The sitemap index and shards written by build_sitemaps. In production the
+    web server should serve SITEMAP_ROOT at the site root instead.
+    """
+    return serve(request, path, document_root=sitemap_root())
+
+
+class PostsByCategoryView(FastReadMixin, ViewerStateMixin, generics.ListAPIView):
     serializer_class = PostSerializer
     pagination_class = StandardResultsSetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
-    search_fields = ['title', 'content', 'tags__name']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PostSearchFilter]
+    search_fields = ['title', 'tags__name']
     ordering_fields = ['published_date']
     
     def get_queryset(self):
         category_id = self.kwargs['category_id']
-        queryset = Post.objects.filter(category_id=category_id, status='published')
+        queryset = Post.objects.visible().filter(category_id=category_id)
 
         # Apply optional filters
         published_date = self.request.query_params.get('published_date')
         tags = self.request.query_params.getlist('tags')
         
-        if published_date:
-            queryset = queryset.filter(published_date__date=published_date)
+        queryset = filter_published_date(queryset, published_date)
         
         if tags:
             queryset = queryset.filter(tags__name__in=tags).distinct()
 
         return queryset
 
-class PostsByAuthorView(generics.ListAPIView):
+class PostsByAuthorView(FastReadMixin, ViewerStateMixin, generics.ListAPIView):
     serializer_class = PostSerializer
     pagination_class = StandardResultsSetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
-    search_fields = ['title', 'content', 'tags__name']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PostSearchFilter]
+    search_fields = ['title', 'tags__name']
     ordering_fields = ['published_date']
     
     def get_queryset(self):
         author_id = self.kwargs['author_id']
-        queryset = Post.objects.filter(author_id=author_id, status='published')
+        queryset = Post.objects.visible().filter(author_id=author_id)
 
         # Apply optional filters
         published_date = self.request.query_params.get('published_date')
         tags = self.request.query_params.getlist('tags')
         
-        if published_date:
-            queryset = queryset.filter(published_date__date=published_date)
+        queryset = filter_published_date(queryset, published_date)
         
         if tags:
             queryset = queryset.filter(tags__name__in=tags).distinct()
@@ -598,3 +958,36 @@ class PostsByAuthorView(generics.ListAPIView):
 
 
 
+
+
+class ArchiveView(generics.ListAPIView):
+    """
+    Months with published posts and how many, newest first: site-wide, or
+    for one category (?category=<id>) or author (?author=<id>). Read from
+    the counts accounts.archive keeps, never from the posts table.
+    """
+    serializer_class = ArchiveMonthSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        scope, scope_id = ArchiveMonth.ALL, 0
+        for param, param_scope in (('category', ArchiveMonth.CATEGORY), ('author', ArchiveMonth.AUTHOR)):
+            value = self.request.query_params.get(param)
+            if value:
+                if not value.isdigit():
+                    raise serializers.ValidationError({param: 'Expected an id.'})
+                scope, scope_id = param_scope, int(value)
+        return ArchiveMonth.objects.filter(scope=scope, scope_id=scope_id, posts__gt=0)
+
+
+class BlogExportView(APIView):
+    """
+    The whole blog as NDJSON (accounts.transfer), streamed as it is read,
+    for import_blog on another server. Staff only: it carries password hashes.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        response = StreamingHttpResponse(transfer.export_ndjson(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="blog-export-{timezone.now():%Y%m%d-%H%M%S}.ndjson"'
+        return response
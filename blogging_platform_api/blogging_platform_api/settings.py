@@ -92,6 +92,21 @@ DATABASES = {
     }
 }
 
+# Moving to PostgreSQL: with POSTGRES_NAME set, the database is available as
+# 'postgres'. Run "migrate --database=postgres", then "migrate_to_postgres
+# --target=postgres" (accounts.dbcopy), catch up with --catch-up, and switch
+# 'default' over once a final catch-up with writes stopped has verified and
+# "rebuild_search_index --database=postgres" has indexed the post bodies.
+if os.environ.get('POSTGRES_NAME'):
+    DATABASES['postgres'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ['POSTGRES_NAME'],
+        'USER': os.environ.get('POSTGRES_USER', ''),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', ''),
+        'PORT': os.environ.get('POSTGRES_PORT', ''),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -151,6 +166,10 @@ STATIC_ROOT=os.path.join(BASE_DIR,'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads always go to a temporary file in chunks (never buffered in memory),
+# hashed on the way so identical profile pictures are stored once.
+FILE_UPLOAD_HANDLERS = ['accounts.images.HashingUploadHandler']
+
 
 
 # Default primary key field type
@@ -165,6 +184,12 @@ REST_FRAMEWORK = {
     ),
 
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+
+    # orjson-based, same output as DRF's JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'accounts.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
@@ -181,6 +206,60 @@ SIMPLE_JWT = {
 
 SITE_ID = 1
 
+# Post views are buffered per process and written every N seconds; a crashed
+# worker loses at most this many seconds of views. None disables the flusher.
+VIEW_COUNT_FLUSH_INTERVAL = 5
+
+# When set (seconds, e.g. 0.002), concurrent like/rate requests in a worker are
+# merged into one bulk upsert transaction. None writes each request on its own.
+INTERACTION_BATCH_WINDOW = None
+
+# Live post events (posts/<id>/events/, served by the ASGI app). The local
+# backend only reaches streams in the same worker; with several workers, set
+# a backend that relays events between them (see accounts.events.LocalBackend).
+# Each post keeps its last EVENTS_BUFFER_SIZE events for Last-Event-ID resume.
+EVENTS_BACKEND = 'accounts.events.LocalBackend'
+EVENTS_BUFFER_SIZE = 100
+
+# Post edits are stored as deltas against the previous revision, with a full
+# snapshot every N revisions: rebuilding a version replays at most N - 1 deltas.
+REVISION_SNAPSHOT_INTERVAL = 10
+
+# Anonymous list responses and post detail fragments are filled single-flight
+# (accounts.single_flight): one request rebuilds a missing or expired entry while
+# the others get the stale copy for up to SINGLE_FLIGHT_STALE seconds, or wait up
+# to SINGLE_FLIGHT_LEASE seconds for it on a cold cache. Lists are also rebuilt
+# when a post changes, and at least every LIST_CACHE_TIMEOUT seconds.
+LIST_CACHE_TIMEOUT = 30
+SINGLE_FLIGHT_STALE = 60
+SINGLE_FLIGHT_LEASE = 10
+SINGLE_FLIGHT_BETA = 1.0  # Early refresh: higher starts earlier, 0 turns it off
+
+# Atom/RSS feeds (accounts.feeds) hold the newest FEED_LENGTH posts and are
+# regenerated when their posts change. Each worker caches a feed's bytes and
+# validators for FEED_CACHE_TIMEOUT seconds; with a shared cache, regeneration
+# replaces the entry everywhere at once.
+FEED_LENGTH = 20
+FEED_CACHE_TIMEOUT = 300
+
+# Sitemaps (accounts.sitemaps) are written here by the build_sitemaps command:
+# sitemap.xml indexes gzipped shards of SITEMAP_SHARD_SIZE URLs (50,000 at most),
+# and only shards whose posts changed are rewritten. The files are served at the
+# site root; let the web server serve this directory there in production.
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_SHARD_SIZE = 50000
+
+# Template fragments (post cards, comment threads, category/tag lists) are cached
+# here. Local memory is per process; point this at Redis or Memcached to share
+# fragments between workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogging-platform',
+        'OPTIONS': {'MAX_ENTRIES': 10000},  # Two fragments per post; the default of 300 culls a single list page
+    }
+}
+
 """
   # Site ID (you may need to set this to the ID of your site)
 SITE_ID = 1